@@ -0,0 +1,290 @@
+import math
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ("location", "day_of_week", "hour", "rain_category", "is_peak")
+
+RAIN_CATEGORY_LIMITS = (
+    (1.0, "Tidak Hujan"),
+    (1.3, "Hujan Ringan"),
+    (1.6, "Hujan Sedang"),
+    (1.8, "Hujan Lebat"),
+)
+RAIN_CATEGORY_MAX = "Hujan Ekstrem"
+
+CUBE_MEASURES = (
+    "record_count", "vehicles_sum", "vehicles_sumsq", "vehicles_min", "vehicles_max",
+    "speed_count", "speed_sum", "speed_sumsq", "speed_min", "speed_max",
+    "rain_sum", "rain_sumsq", "rain_vehicles_sum", "macet_count",
+)
+
+
+def rain_category_for(factor: float) -> str:
+    for limit, label in RAIN_CATEGORY_LIMITS:
+        if factor <= limit:
+            return label
+    return RAIN_CATEGORY_MAX
+
+
+def _rain_category_sql(column: str) -> str:
+    cases = " ".join(f"WHEN {column} <= {limit} THEN '{label}'" for limit, label in RAIN_CATEGORY_LIMITS)
+    return f"CASE {cases} ELSE '{RAIN_CATEGORY_MAX}' END"
+
+
+def create_cube_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS traffic_cube (
+            location            TEXT NOT NULL,
+            day_of_week         INTEGER NOT NULL,
+            hour                INTEGER NOT NULL,
+            rain_category       TEXT NOT NULL,
+            is_peak             INTEGER NOT NULL,
+            record_count        INTEGER NOT NULL DEFAULT 0,
+            vehicles_sum        REAL NOT NULL DEFAULT 0,
+            vehicles_sumsq      REAL NOT NULL DEFAULT 0,
+            vehicles_min        INTEGER,
+            vehicles_max        INTEGER,
+            speed_count         INTEGER NOT NULL DEFAULT 0,
+            speed_sum           REAL NOT NULL DEFAULT 0,
+            speed_sumsq         REAL NOT NULL DEFAULT 0,
+            speed_min           REAL,
+            speed_max           REAL,
+            rain_sum            REAL NOT NULL DEFAULT 0,
+            rain_sumsq          REAL NOT NULL DEFAULT 0,
+            rain_vehicles_sum   REAL NOT NULL DEFAULT 0,
+            macet_count         INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (location, day_of_week, hour, rain_category, is_peak)
+        )
+    """)
+
+
+def _merge_min(column: str) -> str:
+    return (f"{column} = MIN(COALESCE({column}, excluded.{column}), "
+            f"COALESCE(excluded.{column}, {column}))")
+
+
+def _merge_max(column: str) -> str:
+    return (f"{column} = MAX(COALESCE({column}, excluded.{column}), "
+            f"COALESCE(excluded.{column}, {column}))")
+
+
+def _merge_updates() -> str:
+    updates = []
+    for measure in CUBE_MEASURES:
+        if measure.endswith("_min"):
+            updates.append(_merge_min(measure))
+        elif measure.endswith("_max"):
+            updates.append(_merge_max(measure))
+        else:
+            updates.append(f"{measure} = {measure} + excluded.{measure}")
+    return ", ".join(updates)
+
+
+_CUBE_COLUMNS = ", ".join(CUBE_DIMENSIONS + CUBE_MEASURES)
+_CONFLICT_CLAUSE = f"ON CONFLICT({', '.join(CUBE_DIMENSIONS)}) DO UPDATE SET {_merge_updates()}"
+_UPSERT_SQL = f"""
+    INSERT INTO traffic_cube ({_CUBE_COLUMNS})
+    VALUES ({", ".join("?" for _ in CUBE_DIMENSIONS + CUBE_MEASURES)})
+    {_CONFLICT_CLAUSE}
+"""
+
+
+def apply_to_cube(cursor, records: list):
+    cells = {}
+    weekdays = {}
+
+    for record in records:
+        day = record["timestamp"][:10]
+        day_of_week = weekdays.get(day)
+        if day_of_week is None:
+            day_of_week = datetime.strptime(day, "%Y-%m-%d").weekday()
+            weekdays[day] = day_of_week
+
+        rain = record.get("rain_factor")
+        rain = 1.0 if rain is None else float(rain)
+        key = (record["location"], day_of_week, int(record["hour"]),
+               rain_category_for(rain), int(record.get("is_peak") or 0))
+
+        cell = cells.get(key)
+        if cell is None:
+            cell = [0, 0.0, 0.0, None, None, 0, 0.0, 0.0, None, None, 0.0, 0.0, 0.0, 0]
+            cells[key] = cell
+
+        vehicles = record["vehicle_count"]
+        cell[0] += 1
+        cell[1] += vehicles
+        cell[2] += vehicles * vehicles
+        cell[3] = vehicles if cell[3] is None else min(cell[3], vehicles)
+        cell[4] = vehicles if cell[4] is None else max(cell[4], vehicles)
+
+        speed = record.get("speed_kmh")
+        if speed is not None:
+            cell[5] += 1
+            cell[6] += speed
+            cell[7] += speed * speed
+            cell[8] = speed if cell[8] is None else min(cell[8], speed)
+            cell[9] = speed if cell[9] is None else max(cell[9], speed)
+
+        cell[10] += rain
+        cell[11] += rain * rain
+        cell[12] += rain * vehicles
+        if record.get("condition") == "Macet":
+            cell[13] += 1
+
+    cursor.executemany(_UPSERT_SQL, [key + tuple(cell) for key, cell in cells.items()])
+
+
+def apply_frame_to_cube(cursor, frame: pd.DataFrame):
+    # Versi vektor apply_to_cube untuk bulk load; frame sudah punya kolom
+    # datetime hasil parsing timestamp.
+    rain = frame["rain_factor"].fillna(1.0).astype(float)
+    vehicles = frame["vehicle_count"].astype(float)
+    speed = frame["speed_kmh"].astype(float)
+    labels = np.array([label for _, label in RAIN_CATEGORY_LIMITS] + [RAIN_CATEGORY_MAX])
+    limits = [limit for limit, _ in RAIN_CATEGORY_LIMITS]
+
+    cells = pd.DataFrame({
+        "location": frame["location"],
+        "day_of_week": frame["datetime"].dt.weekday,
+        "hour": frame["hour"].astype(int),
+        "rain_category": labels[np.searchsorted(limits, rain, side="left")],
+        "is_peak": frame["is_peak"].fillna(0).astype(int),
+        "record_count": 1,
+        "vehicles_sum": vehicles,
+        "vehicles_sumsq": vehicles * vehicles,
+        "vehicles_min": frame["vehicle_count"],
+        "vehicles_max": frame["vehicle_count"],
+        "speed_count": speed.notna().astype(int),
+        "speed_sum": speed.fillna(0.0),
+        "speed_sumsq": speed.fillna(0.0) ** 2,
+        "speed_min": speed,
+        "speed_max": speed,
+        "rain_sum": rain,
+        "rain_sumsq": rain * rain,
+        "rain_vehicles_sum": rain * vehicles,
+        "macet_count": (frame["condition"] == "Macet").astype(int),
+    })
+    how = {measure: "min" if measure.endswith("_min") else "max" if measure.endswith("_max") else "sum"
+           for measure in CUBE_MEASURES}
+    grouped = cells.groupby(list(CUBE_DIMENSIONS), sort=False).agg(how).reset_index()
+    grouped = grouped.astype(object).where(grouped.notna(), None)
+    cursor.executemany(_UPSERT_SQL, grouped.itertuples(index=False, name=None))
+
+
+def rebuild_cube(cursor, min_id: int = None):
+    if min_id is None:
+        cursor.execute("DELETE FROM traffic_cube")
+    where = "WHERE 1" if min_id is None else f"WHERE id >= {int(min_id)}"
+    cursor.execute(f"""
+        INSERT INTO traffic_cube ({_CUBE_COLUMNS})
+        SELECT
+            location,
+            (CAST(strftime('%w', timestamp) AS INTEGER) + 6) % 7,
+            hour,
+            {_rain_category_sql("COALESCE(rain_factor, 1.0)")},
+            COALESCE(is_peak, 0),
+            COUNT(*),
+            SUM(vehicle_count),
+            SUM(vehicle_count * vehicle_count),
+            MIN(vehicle_count),
+            MAX(vehicle_count),
+            COUNT(speed_kmh),
+            COALESCE(SUM(speed_kmh), 0),
+            COALESCE(SUM(speed_kmh * speed_kmh), 0),
+            MIN(speed_kmh),
+            MAX(speed_kmh),
+            SUM(COALESCE(rain_factor, 1.0)),
+            SUM(COALESCE(rain_factor, 1.0) * COALESCE(rain_factor, 1.0)),
+            SUM(COALESCE(rain_factor, 1.0) * vehicle_count),
+            SUM(CASE WHEN condition = 'Macet' THEN 1 ELSE 0 END)
+        FROM traffic_data
+        {where}
+        GROUP BY 1, 2, 3, 4, 5
+        {_CONFLICT_CLAUSE}
+    """)
+
+
+class AggregateCube:
+    def __init__(self, db):
+        self.db = db
+
+    def rollup(self, dimensions: list = (), filters: dict = None) -> pd.DataFrame:
+        dimensions = list(dimensions)
+        for dim in dimensions + list(filters or {}):
+            if dim not in CUBE_DIMENSIONS:
+                raise ValueError(f"Dimensi cube tidak dikenal: {dim}")
+
+        where = []
+        params = []
+        for dim, value in (filters or {}).items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                where.append(f"{dim} IN ({', '.join('?' for _ in value)})")
+                params.extend(value)
+            else:
+                where.append(f"{dim} = ?")
+                params.append(value)
+
+        select_dims = "".join(f"{dim}, " for dim in dimensions)
+        query = f"""
+            SELECT {select_dims}
+                SUM(record_count) AS record_count,
+                SUM(vehicles_sum) AS vehicles_sum,
+                SUM(vehicles_sumsq) AS vehicles_sumsq,
+                MIN(vehicles_min) AS vehicles_min,
+                MAX(vehicles_max) AS vehicles_max,
+                SUM(speed_count) AS speed_count,
+                SUM(speed_sum) AS speed_sum,
+                SUM(speed_sumsq) AS speed_sumsq,
+                MIN(speed_min) AS speed_min,
+                MAX(speed_max) AS speed_max,
+                SUM(rain_sum) AS rain_sum,
+                SUM(rain_sumsq) AS rain_sumsq,
+                SUM(rain_vehicles_sum) AS rain_vehicles_sum,
+                SUM(macet_count) AS macet_count
+            FROM traffic_cube
+        """
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        if dimensions:
+            query += f" GROUP BY {', '.join(dimensions)} ORDER BY {', '.join(dimensions)}"
+
+        conn = self.db.get_connection()
+        df = pd.read_sql_query(query, conn, params=params)
+        conn.close()
+
+        df = df[df["record_count"].fillna(0) > 0].reset_index(drop=True)
+        if df.empty:
+            return df
+
+        n = df["record_count"]
+        df["avg_vehicles"] = df["vehicles_sum"] / n
+        df["std_vehicles"] = sample_std(n, df["vehicles_sum"], df["vehicles_sumsq"])
+        df["avg_speed"] = df["speed_sum"] / df["speed_count"].where(df["speed_count"] > 0)
+        df["std_speed"] = sample_std(df["speed_count"], df["speed_sum"], df["speed_sumsq"])
+        return df
+
+    def correlation(self, filters: dict = None) -> float:
+        totals = self.rollup([], filters)
+        if totals.empty:
+            return float("nan")
+        return rain_vehicle_correlation(totals.iloc[0])
+
+
+# Dipakai juga oleh parallel_analytics (partial sum per partisi), jadi rumus
+# dari jumlah/jumlah kuadrat hanya ada di satu tempat.
+def sample_std(count, total, total_sq):
+    variance = (total_sq - total * total / count) / (count - 1)
+    return variance.where(count > 1).clip(lower=0) ** 0.5
+
+
+def rain_vehicle_correlation(totals) -> float:
+    n = totals["record_count"]
+    cov = totals["rain_vehicles_sum"] - totals["rain_sum"] * totals["vehicles_sum"] / n
+    var_x = totals["rain_sumsq"] - totals["rain_sum"] ** 2 / n
+    var_y = totals["vehicles_sumsq"] - totals["vehicles_sum"] ** 2 / n
+    if var_x <= 0 or var_y <= 0:
+        return float("nan")
+    return cov / math.sqrt(var_x * var_y)
@@ -1,48 +1,52 @@
 import pandas as pd
 import numpy as np
+from datetime import datetime, timedelta
+from aggregate_cube import AggregateCube
+from asof_join import WeatherAsOfJoin, lagged_rain_effect, precipitation_effect, precipitation_speed_curve
+from congestion_events import CongestionEventLog
 from database import TrafficDatabase
+from parallel_analytics import ParallelAnalytics
+from sketches import SketchStore
 from config import LOCATIONS
 
 
 class TrafficAnalytics:
-    def __init__(self):
-        self.db = TrafficDatabase()
+    def __init__(self, db: TrafficDatabase = None, workers: int = 1):
+        self.db = db or TrafficDatabase()
+        self.parallel = ParallelAnalytics(self.db, workers)
+        self.cube = AggregateCube(self.db)
+        self.weather_join = WeatherAsOfJoin(self.db)
+        self.sketches = SketchStore(self.db)
+        self.events = CongestionEventLog(self.db)
 
-    def get_overall_stats(self) -> dict:
-        df = self.db.get_all_traffic_data()
+    def get_overall_stats(self, start: str = None, end: str = None) -> dict:
+        return self.parallel.overall_stats(start, end)
 
-        if df.empty:
-            return {"error": "Tidak ada data"}
+    def get_partition_aggregate(self, group_by: str = "location", start: str = None, end: str = None,
+                                location: str = None) -> pd.DataFrame:
+        return self.parallel.aggregate(group_by, start, end, location)
 
-        stats = {
-            "total_records": len(df),
-            "total_locations": df["location"].nunique(),
-            "avg_vehicles": round(df["vehicle_count"].mean(), 1),
-            "max_vehicles": int(df["vehicle_count"].max()),
-            "min_vehicles": int(df["vehicle_count"].min()),
-            "avg_speed": round(df["speed_kmh"].mean(), 1),
-            "most_common_condition": df["condition"].mode()[0] if not df["condition"].mode().empty else "N/A",
-            "peak_records": int(df["is_peak"].sum()),
-            "rainy_records": int((df["rain_factor"] > 1.0).sum()),
-        }
+    def get_top_congestion_between(self, start: str = None, end: str = None, top_n: int = 10,
+                                   location: str = None) -> pd.DataFrame:
+        return self.parallel.top_congestion(top_n, start, end, location)
 
-        return stats
+    def get_rain_correlation_between(self, start: str = None, end: str = None,
+                                     location: str = None) -> float:
+        return self.parallel.rain_correlation(start, end, location)
 
     def get_hourly_pattern(self, location: str = None) -> pd.DataFrame:
-        if location:
-            df = self.db.get_traffic_by_location(location)
-        else:
-            df = self.db.get_all_traffic_data()
+        cube = self.cube.rollup(["hour"], {"location": location})
 
-        if df.empty:
+        if cube.empty:
             return pd.DataFrame()
 
-        hourly = df.groupby("hour").agg(
-            avg_vehicles=("vehicle_count", "mean"),
-            max_vehicles=("vehicle_count", "max"),
-            avg_speed=("speed_kmh", "mean"),
-            count=("id", "count"),
-        ).reset_index()
+        hourly = pd.DataFrame({
+            "hour": cube["hour"],
+            "avg_vehicles": cube["avg_vehicles"],
+            "max_vehicles": cube["vehicles_max"],
+            "avg_speed": cube["avg_speed"],
+            "count": cube["record_count"],
+        })
 
         hourly["avg_vehicles"] = hourly["avg_vehicles"].round(1)
         hourly["avg_speed"] = hourly["avg_speed"].round(1)
@@ -50,36 +54,20 @@ class TrafficAnalytics:
         return hourly
 
     def get_rain_correlation(self) -> dict:
-        df = self.db.get_all_traffic_data()
+        cube = self.cube.rollup(["rain_category"])
 
-        if df.empty:
+        if cube.empty:
             return {"error": "Tidak ada data"}
 
-        def categorize_rain(factor):
-            if factor <= 1.0:
-                return "Tidak Hujan"
-            elif factor <= 1.3:
-                return "Hujan Ringan"
-            elif factor <= 1.6:
-                return "Hujan Sedang"
-            elif factor <= 1.8:
-                return "Hujan Lebat"
-            else:
-                return "Hujan Ekstrem"
-
-        df["rain_category"] = df["rain_factor"].apply(categorize_rain)
+        rain_stats = pd.DataFrame({
+            "rain_category": cube["rain_category"],
+            "avg_vehicles": cube["avg_vehicles"].round(1),
+            "max_vehicles": cube["vehicles_max"],
+            "avg_speed": cube["avg_speed"].round(1),
+            "count": cube["record_count"],
+        })
 
-        rain_stats = df.groupby("rain_category").agg(
-            avg_vehicles=("vehicle_count", "mean"),
-            max_vehicles=("vehicle_count", "max"),
-            avg_speed=("speed_kmh", "mean"),
-            count=("id", "count"),
-        ).reset_index()
-
-        rain_stats["avg_vehicles"] = rain_stats["avg_vehicles"].round(1)
-        rain_stats["avg_speed"] = rain_stats["avg_speed"].round(1)
-
-        correlation = df["rain_factor"].corr(df["vehicle_count"])
+        correlation = self.cube.correlation()
 
         return {
             "correlation_coefficient": round(correlation, 3),
@@ -87,6 +75,25 @@ class TrafficAnalytics:
             "interpretation": self._interpret_correlation(correlation),
         }
 
+    def get_weather_joined_traffic(self, start: str = None, end: str = None, location: str = None,
+                                   bucket_minutes: int = None, lag_hours: float = 0) -> pd.DataFrame:
+        lag = timedelta(hours=lag_hours)
+        if bucket_minutes:
+            return self.weather_join.join_buckets(bucket_minutes, start, end, location, lag)
+        return self.weather_join.join(start, end, location, lag)
+
+    def get_precipitation_speed_curve(self, start: str = None, end: str = None,
+                                      location: str = None) -> pd.DataFrame:
+        return precipitation_speed_curve(self.weather_join, start=start, end=end, location=location)
+
+    def get_lagged_rain_effect(self, lags_hours=(0, 1, 2, 3), start: str = None, end: str = None,
+                               location: str = None) -> pd.DataFrame:
+        return lagged_rain_effect(self.weather_join, lags_hours, start, end, location)
+
+    def get_precipitation_effect(self, lags_hours=(0, 1, 2, 3), start: str = None, end: str = None,
+                                 location: str = None) -> tuple:
+        return precipitation_effect(self.weather_join, lags_hours=lags_hours, start=start, end=end, location=location)
+
     def _interpret_correlation(self, corr: float) -> str:
         if corr >= 0.7:
             return "Korelasi Kuat Positif: Hujan sangat mempengaruhi kemacetan"
@@ -97,20 +104,33 @@ class TrafficAnalytics:
         else:
             return "Korelasi Sangat Lemah: Hujan tidak terlalu mempengaruhi"
 
+    def get_percentiles(self, metric: str = "speed_kmh", location: str = None, hour: int = None) -> dict:
+        return self.sketches.quantiles(metric, location=location, hour=hour)
+
+    def get_percentiles_by_location(self, metric: str = "speed_kmh") -> pd.DataFrame:
+        return self.sketches.quantiles_by(metric, "location")
+
+    def get_percentiles_by_hour(self, metric: str = "speed_kmh", location: str = None) -> pd.DataFrame:
+        return self.sketches.quantiles_by(metric, "hour", location=location)
+
+    def get_distinct_intervals(self, location: str = None) -> int:
+        return self.sketches.distinct("timestamp", location=location)
+
     def get_location_comparison(self) -> pd.DataFrame:
-        df = self.db.get_all_traffic_data()
+        cube = self.cube.rollup(["location"])
 
-        if df.empty:
+        if cube.empty:
             return pd.DataFrame()
 
-        comparison = df.groupby("location").agg(
-            avg_vehicles=("vehicle_count", "mean"),
-            max_vehicles=("vehicle_count", "max"),
-            min_vehicles=("vehicle_count", "min"),
-            avg_speed=("speed_kmh", "mean"),
-            total_records=("id", "count"),
-            macet_count=("condition", lambda x: (x == "Macet").sum()),
-        ).reset_index()
+        comparison = pd.DataFrame({
+            "location": cube["location"],
+            "avg_vehicles": cube["avg_vehicles"],
+            "max_vehicles": cube["vehicles_max"],
+            "min_vehicles": cube["vehicles_min"],
+            "avg_speed": cube["avg_speed"],
+            "total_records": cube["record_count"],
+            "macet_count": cube["macet_count"],
+        })
 
         comparison["avg_vehicles"] = comparison["avg_vehicles"].round(1)
         comparison["avg_speed"] = comparison["avg_speed"].round(1)
@@ -160,54 +180,54 @@ class TrafficAnalytics:
         }
 
     def get_weekday_vs_weekend(self) -> dict:
-        df = self.db.get_all_traffic_data()
+        weekday = self.cube.rollup([], {"day_of_week": (0, 1, 2, 3, 4)})
+        weekend = self.cube.rollup([], {"day_of_week": (5, 6)})
 
-        if df.empty:
+        if weekday.empty and weekend.empty:
             return {"error": "Tidak ada data"}
 
-        df["datetime"] = pd.to_datetime(df["timestamp"])
-        df["day_of_week"] = df["datetime"].dt.dayofweek
-
-        weekday = df[df["day_of_week"] < 5]
-        weekend = df[df["day_of_week"] >= 5]
+        def summarize(label: str, cube: pd.DataFrame) -> dict:
+            if cube.empty:
+                return {"label": label, "avg_vehicles": 0, "avg_speed": 0, "total_records": 0}
+            row = cube.iloc[0]
+            return {
+                "label": label,
+                "avg_vehicles": round(row["avg_vehicles"], 1),
+                "avg_speed": round(row["avg_speed"], 1),
+                "total_records": int(row["record_count"]),
+            }
 
         result = {
-            "weekday": {
-                "label": "Hari Kerja (Sen-Jum)",
-                "avg_vehicles": round(weekday["vehicle_count"].mean(), 1) if not weekday.empty else 0,
-                "avg_speed": round(weekday["speed_kmh"].mean(), 1) if not weekday.empty else 0,
-                "total_records": len(weekday),
-            },
-            "weekend": {
-                "label": "Weekend (Sab-Min)",
-                "avg_vehicles": round(weekend["vehicle_count"].mean(), 1) if not weekend.empty else 0,
-                "avg_speed": round(weekend["speed_kmh"].mean(), 1) if not weekend.empty else 0,
-                "total_records": len(weekend),
-            },
+            "weekday": summarize("Hari Kerja (Sen-Jum)", weekday),
+            "weekend": summarize("Weekend (Sab-Min)", weekend),
         }
 
         return result
 
-    def get_top_congestion(self, top_n: int = 10) -> pd.DataFrame:
-        df = self.db.get_all_traffic_data()
+    def get_top_congestion(self, top_n: int = 10, window: str = "all", location: str = None) -> pd.DataFrame:
+        rows = self.db.get_top_congestion(window, location, top_n)
 
-        if df.empty:
+        if not rows:
             return pd.DataFrame()
 
-        top = df.nlargest(top_n, "vehicle_count")[
+        top = pd.DataFrame(rows)[
             ["timestamp", "location", "vehicle_count", "condition", "speed_kmh", "rain_factor"]
         ]
 
         return top.reset_index(drop=True)
 
-    def get_current_status(self) -> pd.DataFrame:
-        df = self.db.get_all_traffic_data()
+    def get_longest_jams(self, days: int = 7, location: str = None, limit: int = 10) -> pd.DataFrame:
+        since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        return self.events.longest(since, location, limit)
 
-        if df.empty:
-            return pd.DataFrame()
+    def get_congestion_summary(self, days: int = 7) -> pd.DataFrame:
+        since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        return self.events.summary(since)
 
-        df["datetime"] = pd.to_datetime(df["timestamp"])
+    def get_current_status(self) -> pd.DataFrame:
+        latest = self.db.get_current_traffic()
 
-        latest = df.sort_values("datetime").groupby("location").last().reset_index()
+        if latest.empty:
+            return pd.DataFrame()
 
         return latest[["location", "vehicle_count", "condition", "speed_kmh", "rain_factor", "timestamp"]]
\ No newline at end of file
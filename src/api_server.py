@@ -0,0 +1,274 @@
+import argparse
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+import numpy as np
+import pandas as pd
+from analytics import TrafficAnalytics
+from config import LOCATIONS
+from database import TrafficDatabase
+
+API_HOST = "127.0.0.1"
+API_PORT = 8502
+API_CACHE_ENTRIES = 256
+API_VERSION_TTL_SECONDS = 0.5
+API_MAX_PAGE_ROWS = 5000
+
+HTTP_STATUS = {
+    200: "200 OK",
+    304: "304 Not Modified",
+    400: "400 Bad Request",
+    404: "404 Not Found",
+    405: "405 Method Not Allowed",
+    500: "500 Internal Server Error",
+}
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    raise TypeError(f"Tipe tidak bisa di-encode ke JSON: {type(value).__name__}")
+
+
+def _to_json(value) -> bytes:
+    if isinstance(value, pd.DataFrame):
+        return value.to_json(orient="records", force_ascii=False).encode("utf-8")
+    return json.dumps(value, default=_json_default, ensure_ascii=False).encode("utf-8")
+
+
+def _etag(key: tuple, version: int) -> str:
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=6).hexdigest()
+    return f'"{digest}-{version}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class AnalyticsAPI:
+    def __init__(self, db: TrafficDatabase = None, analytics: TrafficAnalytics = None,
+                 cache_entries: int = API_CACHE_ENTRIES, version_ttl: float = API_VERSION_TTL_SECONDS):
+        self.db = db or TrafficDatabase()
+        self.analytics = analytics or TrafficAnalytics(self.db)
+        self.cache_entries = cache_entries
+        self.version_ttl = version_ttl
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._versions = None
+        self._versions_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+        # route -> (tabel yang menentukan versi, handler)
+        self.routes = {
+            "/api/stats": ("traffic_data", self._stats),
+            "/api/hourly": ("traffic_data", self._hourly),
+            "/api/locations": ("traffic_data", self._locations),
+            "/api/status": ("traffic_data", self._status),
+            "/api/predict": ("traffic_data", self._predict),
+            "/api/traffic": ("traffic_data", self._traffic_page),
+            "/api/weather": ("weather_data", self._weather_page),
+        }
+
+    def _stats(self, params: dict):
+        return self.analytics.get_overall_stats(params.get("start"), params.get("end"))
+
+    def _hourly(self, params: dict):
+        return self.analytics.get_hourly_pattern(self._location(params))
+
+    def _locations(self, params: dict):
+        return self.analytics.get_location_comparison()
+
+    def _status(self, params: dict):
+        return self.analytics.get_current_status()
+
+    def _predict(self, params: dict):
+        location = self._location(params)
+        if not location:
+            raise ValueError("Parameter location wajib diisi")
+        hour = self._int(params, "hour", None)
+        if hour is None or not 0 <= hour <= 23:
+            raise ValueError("Parameter hour wajib diisi (0-23)")
+        return self.analytics.predict_traffic(location, hour)
+
+    def _page(self, fetch, params: dict) -> dict:
+        limit = self._int(params, "limit", 100)
+        if not 1 <= limit <= API_MAX_PAGE_ROWS:
+            raise ValueError(f"Parameter limit harus 1-{API_MAX_PAGE_ROWS}")
+        after = None
+        if params.get("after"):
+            timestamp, _, row_id = params["after"].rpartition("|")
+            if not timestamp or not row_id.isdigit():
+                raise ValueError("Parameter after harus berformat 'timestamp|id'")
+            after = (timestamp, int(row_id))
+
+        df, next_cursor = fetch(self._location(params), params.get("start"), params.get("end"), after, limit)
+        return {
+            "rows": json.loads(_to_json(df)),
+            "next": f"{next_cursor[0]}|{next_cursor[1]}" if next_cursor else None,
+        }
+
+    def _traffic_page(self, params: dict):
+        return self._page(self.db.get_traffic_page, params)
+
+    def _weather_page(self, params: dict):
+        return self._page(self.db.get_weather_page, params)
+
+    def _location(self, params: dict):
+        location = params.get("location")
+        if location and location not in LOCATIONS:
+            raise ValueError(f"Lokasi tidak dikenal: {location}")
+        return location
+
+    def _int(self, params: dict, name: str, default):
+        if name not in params:
+            return default
+        try:
+            return int(params[name])
+        except ValueError:
+            raise ValueError(f"Parameter {name} harus bilangan bulat")
+
+    def versions(self) -> dict:
+        # API biasanya jalan di proses terpisah dari writer, jadi versi dibaca
+        # ulang dari database, paling sering sekali per version_ttl.
+        with self._lock:
+            if self._versions is not None and time.monotonic() - self._versions_at < self.version_ttl:
+                return self._versions
+        versions = self.db.get_data_version(refresh=True)
+        with self._lock:
+            self._versions = versions
+            self._versions_at = time.monotonic()
+        return versions
+
+    def _cached(self, key: tuple, version: int, build) -> tuple:
+        # Request bersamaan untuk key yang sama menunggu satu perhitungan saja.
+        while True:
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and entry[0] == version:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], entry[2], True
+                waiter = self._inflight.get((key, version))
+                if waiter is None:
+                    waiter = self._inflight[(key, version)] = threading.Event()
+                    self.misses += 1
+                    break
+            waiter.wait()
+
+        try:
+            body = _to_json(build())
+            etag = _etag(key, version)
+            with self._lock:
+                self._cache[key] = (version, etag, body)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+            return etag, body, False
+        finally:
+            with self._lock:
+                self._inflight.pop((key, version)).set()
+
+    def cache_info(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "max_entries": self.cache_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+    def handle(self, method: str, path: str, query: str, if_none_match: str = None) -> tuple:
+        if method not in ("GET", "HEAD"):
+            return 405, {}, _to_json({"error": "Hanya GET/HEAD yang didukung"})
+
+        if path == "/api/version":
+            return 200, {"Cache-Control": "no-store"}, _to_json(
+                {"versions": self.versions(), "cache": self.cache_info()})
+
+        route = self.routes.get(path.rstrip("/") or path)
+        if route is None:
+            return 404, {}, _to_json({"error": f"Endpoint tidak dikenal: {path}",
+                                      "endpoints": sorted(self.routes) + ["/api/version"]})
+
+        table, handler = route
+        params = {name: values[-1] for name, values in parse_qs(query).items()}
+        key = (path.rstrip("/"), tuple(sorted(params.items())))
+        version = self.versions().get(table, 0)
+
+        # ETag hanya bergantung pada URL + versi data, jadi revalidasi bisa
+        # dijawab 304 tanpa menyentuh cache body maupun analytics.
+        etag = _etag(key, version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Data-Version": str(version)}
+        if _etag_matches(if_none_match, etag):
+            return 304, headers, b""
+
+        try:
+            etag, body, hit = self._cached(key, version, lambda: handler(params))
+        except ValueError as e:
+            return 400, {}, _to_json({"error": str(e)})
+        headers["X-Cache"] = "hit" if hit else "miss"
+        return 200, headers, body
+
+    def __call__(self, environ, start_response):
+        method = environ.get("REQUEST_METHOD", "GET")
+        try:
+            status, headers, body = self.handle(
+                method, environ.get("PATH_INFO", "/"), environ.get("QUERY_STRING", ""),
+                environ.get("HTTP_IF_NONE_MATCH"))
+        except Exception as e:
+            status, headers, body = 500, {}, _to_json({"error": str(e)})
+
+        headers = dict(headers)
+        if status != 304:
+            headers["Content-Type"] = "application/json; charset=utf-8"
+            headers["Content-Length"] = str(len(body))
+        start_response(HTTP_STATUS[status], list(headers.items()))
+        return [b""] if method == "HEAD" else [body]
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(app: AnalyticsAPI = None, host: str = API_HOST, port: int = API_PORT,
+                  quiet: bool = True) -> ThreadingWSGIServer:
+    return make_server(host, port, app or AnalyticsAPI(), server_class=ThreadingWSGIServer,
+                       handler_class=QuietRequestHandler if quiet else WSGIRequestHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API read-only untuk analytics traffic")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--cache-entries", type=int, default=API_CACHE_ENTRIES)
+    parser.add_argument("--verbose", action="store_true", help="Log setiap request")
+    args = parser.parse_args()
+
+    app = AnalyticsAPI(cache_entries=args.cache_entries)
+    server = create_server(app, args.host, args.port, quiet=not args.verbose)
+    print(f"🌐 API analytics jalan di http://{args.host}:{server.server_port}/api/stats")
+    print(f"   Endpoint: {', '.join(sorted(app.routes) + ['/api/version'])}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 API dihentikan")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
+import io
 import sys
 import os
+import threading
+import time
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib
 import numpy as np
 
@@ -13,7 +16,11 @@ from database import TrafficDatabase
 from weather_api import WeatherAPI
 from traffic_engine import TrafficEngine
 from analytics import TrafficAnalytics
-from data_generator import DataGenerator
+from backfill import BackfillWorker
+from congestion_events import ENTER_VEHICLES, EXIT_VEHICLES
+from live_feed import LiveDashboardState
+from dashboard_loader import DashboardLoader
+from chart_cache import ChartCache, frame_digest
 
 matplotlib.use("Agg")
 
@@ -33,16 +40,164 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+LIVE_POLL_SECONDS = 2.0
+PRECIPITATION_REFRESH_SECONDS = 15 * 60
+
+TOP_WINDOWS = {
+    "Sepanjang Waktu": "all",
+    "1 Jam Terakhir": "hour",
+    "24 Jam Terakhir": "day",
+    "7 Hari Terakhir": "week",
+}
+
+
+@st.cache_resource
+def get_database() -> TrafficDatabase:
+    db = TrafficDatabase()
+    db.init_tables()
+    return db
+
+
+@st.cache_resource
+def get_weather_api() -> WeatherAPI:
+    return WeatherAPI(db=get_database())
+
+
+@st.cache_resource
+def get_engine() -> TrafficEngine:
+    return TrafficEngine(db=get_database(), weather_api=get_weather_api())
+
+
+@st.cache_resource
+def get_analytics() -> TrafficAnalytics:
+    return TrafficAnalytics(db=get_database())
+
+
+def traffic_version() -> int:
+    return get_database().get_data_version()["traffic_data"]
+
+
+def weather_version() -> int:
+    return get_database().get_data_version()["weather_data"]
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_traffic_count(version: int) -> int:
+    return get_database().get_traffic_count()
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_weather_count(version: int) -> int:
+    return get_database().get_weather_count()
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_overall_stats(version: int) -> dict:
+    return get_analytics().get_overall_stats()
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_current_status(version: int) -> pd.DataFrame:
+    return get_analytics().get_current_status()
+
+
+@st.cache_data(max_entries=24, show_spinner=False)
+def load_hourly_pattern(version: int, location: str = None) -> pd.DataFrame:
+    return get_analytics().get_hourly_pattern(location)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_percentiles(version: int, metric: str) -> pd.DataFrame:
+    return get_analytics().get_percentiles_by_location(metric)
+
+
+@st.cache_data(max_entries=24, show_spinner=False)
+def load_longest_jams(version: int, days: int, location: str = None) -> pd.DataFrame:
+    return get_analytics().get_longest_jams(days, location)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_latest_weather(version: int) -> pd.DataFrame:
+    return get_database().get_latest_weather()
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_precipitation_effect(traffic_bucket: int, weather_v: int) -> tuple:
+    # Korelasi atas seluruh histori hampir tidak berubah per record traffic,
+    # jadi cukup dihitung ulang per PRECIPITATION_REFRESH_SECONDS atau saat
+    # data cuaca berubah.
+    return get_analytics().get_precipitation_effect()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_data_page(table: str, version: int, location: str, start: str, end: str,
+                   after: tuple, limit: int) -> tuple:
+    db = get_database()
+    if table == "weather":
+        return db.get_weather_page(location, start, end, after, limit)
+    return db.get_traffic_page(location, start, end, after, limit)
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_full_csv(table: str, version: int, location: str, start: str, end: str) -> bytes:
+    buffer = io.StringIO()
+    for i, chunk in enumerate(get_database().iter_pages(f"{table}_data", location, start, end)):
+        chunk.to_csv(buffer, index=False, header=i == 0)
+    return buffer.getvalue().encode("utf-8")
+
+
+@st.cache_data(max_entries=24, show_spinner=False)
+def load_row_count(table: str, version: int, location: str = None) -> int:
+    if table == "weather":
+        return get_database().get_weather_count(location)
+    return get_database().get_traffic_count(location)
+
+
+@st.cache_resource
+def get_backfill_worker() -> BackfillWorker:
+    worker = BackfillWorker(db=get_database())
+    worker.start()
+    return worker
+
+
+@st.cache_resource
+def get_dashboard_loader() -> DashboardLoader:
+    return DashboardLoader()
+
+
+@st.cache_resource
+def get_chart_cache() -> ChartCache:
+    return ChartCache()
+
+
+def with_script_ctx(fn):
+    # Panel jalan di thread pool; context script ikut dipasang supaya
+    # st.cache_data di dalam panel tetap terikat ke sesi yang sedang jalan.
+    ctx = get_script_run_ctx()
+
+    def run(*args):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    return run
+
+
+def get_live_state(live_interval: int) -> LiveDashboardState:
+    live = st.session_state.get("live_state")
+    now = time.monotonic()
+    if live is None:
+        live = LiveDashboardState(get_database())
+        live.bootstrap()
+        st.session_state["live_state"] = live
+        st.session_state["live_due"] = now + live_interval
+    elif now >= st.session_state.get("live_due", 0.0):
+        st.session_state["live_new_rows"] = live.refresh()
+        st.session_state["live_due"] = now + live_interval
+    return live
+
+
 def initialize():
-    if "initialized" not in st.session_state:
-        db = TrafficDatabase()
-        db.init_tables()
-        total = db.get_traffic_count()
-        if total < 1000:
-            with st.spinner("⏳ Generating historical data..."):
-                gen = DataGenerator()
-                gen.generate_historical_data()
-        st.session_state["initialized"] = True
+    get_backfill_worker()
 
 
 def render_sidebar():
@@ -60,47 +215,92 @@ def render_sidebar():
     st.sidebar.markdown("### ⚙️ Kontrol")
 
     if st.sidebar.button("🔄 Refresh Simulasi", use_container_width=True):
-        engine = TrafficEngine()
-        engine.run_simulation_cycle()
+        get_engine().run_simulation_cycle()
         st.rerun()
 
     if st.sidebar.button("🌤️ Refresh Cuaca", use_container_width=True):
-        weather = WeatherAPI()
-        weather.fetch_and_save()
+        get_weather_api().fetch_and_save()
         st.rerun()
 
+    st.sidebar.markdown("### 🔴 Live Update")
+    live_interval = None
+    if st.sidebar.toggle("Live mode dashboard"):
+        live_interval = st.sidebar.slider("Interval refresh (detik):", 2, 60, 5)
+    else:
+        st.session_state.pop("live_state", None)
+        st.session_state.pop("live_due", None)
+
     st.sidebar.markdown("### 📍 Pilih Lokasi")
     locations = list(LOCATIONS.keys())
     selected_location = st.sidebar.selectbox("Lokasi:", ["Semua"] + locations)
     st.sidebar.markdown("---")
 
-    db = TrafficDatabase()
     st.sidebar.markdown("### 📊 Info Sistem")
-    st.sidebar.text(f"Total Traffic Data: {db.get_traffic_count():,}")
-    st.sidebar.text(f"Total Weather Data: {db.get_weather_count():,}")
+    st.sidebar.text(f"Total Traffic Data: {load_traffic_count(traffic_version()):,}")
+    st.sidebar.text(f"Total Weather Data: {load_weather_count(weather_version()):,}")
+
+    backfill = get_backfill_worker().status()
+    if backfill["state"] in ("running", "waiting", "filling_gaps") and backfill["total_days"]:
+        st.sidebar.progress(
+            backfill["completed_days"] / backfill["total_days"],
+            text=f"⏳ Backfill historis: {backfill['completed_days']}/{backfill['total_days']} hari",
+        )
+    elif backfill["state"] == "error":
+        st.sidebar.error(f"❌ Backfill gagal: {backfill['error']}")
 
-    return selected_page, selected_location
+    return selected_page, selected_location, live_interval
 
 
-def page_dashboard():
+def page_dashboard(selected_location, live_interval: int = None):
     st.title("📊 Dashboard Utama — Traffic Jakarta")
 
-    db = TrafficDatabase()
-    analytics = TrafficAnalytics()
-    stats = analytics.get_overall_stats()
+    version = traffic_version()
+    live = get_live_state(live_interval) if live_interval else None
+    location = None if selected_location == "Semua" else selected_location
+    window_label = st.session_state.get("top_window", list(TOP_WINDOWS)[0])
+    window = TOP_WINDOWS[window_label]
+
+    panels = {
+        "speed_percentiles": (load_percentiles, version, "speed_kmh"),
+        "volume_percentiles": (load_percentiles, version, "vehicle_count"),
+        "longest_jams": (load_longest_jams, version, 7, location),
+    }
+    if not live:
+        panels["stats"] = (load_overall_stats, version)
+        panels["status"] = (load_current_status, version)
+        panels["hourly"] = (load_hourly_pattern, version)
+    if not live or window != "all":
+        panels["top"] = (get_analytics().get_top_congestion, 10, window, location)
+
+    results, total_ms = get_dashboard_loader().load(
+        {name: (with_script_ctx(spec[0]),) + spec[1:] for name, spec in panels.items()})
+    if live:
+        results["stats"] = live_panel(live.stats())
+        results["status"] = live_panel(live.status_frame())
+        results["hourly"] = live_panel(live.hourly_frame())
+        if window == "all":
+            results["top"] = live_panel(live.top_frame(location))
+
+    stats = panel_value(results, "stats", "Statistik")
+    if stats is not None and "error" in stats:
+        st.info("⏳ Data historis sedang dimuat di background. Dashboard akan terisi bertahap.")
+        if live:
+            schedule_live_refresh(live_interval)
+        return
 
-    col1, col2, col3, col4, col5 = st.columns(5)
-    col1.metric("📊 Total Data", f"{stats['total_records']:,}")
-    col2.metric("🚗 Avg Kendaraan", f"{stats['avg_vehicles']}")
-    col3.metric("🏎️ Avg Kecepatan", f"{stats['avg_speed']} km/h")
-    col4.metric("🔴 Max Kendaraan", f"{stats['max_vehicles']}")
-    col5.metric("📍 Lokasi", f"{stats['total_locations']}")
+    if stats is not None:
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("📊 Total Data", f"{stats['total_records']:,}")
+        col2.metric("🚗 Avg Kendaraan", f"{stats['avg_vehicles']}")
+        col3.metric("🏎️ Avg Kecepatan", f"{stats['avg_speed']} km/h")
+        col4.metric("🔴 Max Kendaraan", f"{stats['max_vehicles']}")
+        col5.metric("📍 Lokasi", f"{stats['total_locations']}")
 
     st.markdown("---")
     st.subheader("🚦 Status Traffic Saat Ini")
 
-    current_status = analytics.get_current_status()
-    if not current_status.empty:
+    current_status = panel_value(results, "status", "Status traffic")
+    if current_status is not None and not current_status.empty:
         cols = st.columns(len(LOCATIONS))
         for i, row in current_status.iterrows():
             with cols[i % len(LOCATIONS)]:
@@ -127,38 +327,101 @@ def page_dashboard():
     st.markdown("---")
     st.subheader("📈 Pattern Kendaraan Per Jam (24 Jam)")
 
-    hourly = analytics.get_hourly_pattern()
-    if not hourly.empty:
-        fig, ax = plt.subplots(figsize=(14, 4))
-        ax.bar(hourly["hour"], hourly["avg_vehicles"], color="#e94560", alpha=0.8)
-        ax.set_xlabel("Jam")
-        ax.set_ylabel("Rata-rata Kendaraan")
-        ax.set_title("Jumlah Kendaraan Rata-rata Per Jam")
-        ax.set_xticks(range(0, 24))
-        ax.set_xticklabels([f"{h}:00" for h in range(0, 24)], rotation=45, fontsize=8)
-        ax.grid(axis="y", alpha=0.3)
-        ax.set_facecolor("#1a1a2e")
-        fig.patch.set_facecolor("#16213e")
-        ax.tick_params(colors="white")
-        ax.title.set_color("white")
-        ax.xaxis.label.set_color("white")
-        ax.yaxis.label.set_color("white")
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close()
+    hourly = panel_value(results, "hourly", "Pattern per jam")
+    if hourly is not None and not hourly.empty:
+        # PNG di-cache per versi data; setelah ada write baru gambar lama
+        # tampil dulu sementara render ulang jalan di background. Frame live
+        # milik sesi ini dan bisa berubah tanpa versi naik, jadi isinya ikut
+        # jadi key supaya sesi lain tidak mendapat gambar yang salah.
+        params = {"source": "live", "frame": frame_digest(hourly)} if live else {"source": "cube"}
+        png, status = get_chart_cache().request("hourly_bar", params, version, hourly)
+        st.image(png, use_column_width=True)
+        if status == "stale":
+            st.caption("🖼️ Grafik sedang diperbarui untuk data terbaru")
+
+    st.markdown("---")
+    st.subheader("📐 Persentil Kecepatan & Volume per Wilayah")
+    st.caption("Dihitung dari sketch KLL (perkiraan, rank error ±1.7%).")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**🏎️ Kecepatan (km/h)**")
+        speed_percentiles = panel_value(results, "speed_percentiles", "Persentil kecepatan")
+        if speed_percentiles is not None:
+            st.dataframe(speed_percentiles, use_container_width=True)
+    with col2:
+        st.markdown("**🚗 Jumlah Kendaraan**")
+        volume_percentiles = panel_value(results, "volume_percentiles", "Persentil volume")
+        if volume_percentiles is not None:
+            st.dataframe(volume_percentiles, use_container_width=True)
 
     st.markdown("---")
     st.subheader("🔴 Top 10 Kemacetan Terbesar")
-    top = analytics.get_top_congestion(10)
-    if not top.empty:
+    st.radio("Periode:", list(TOP_WINDOWS), horizontal=True, key="top_window")
+    top = panel_value(results, "top", "Top kemacetan")
+    if top is not None and not top.empty:
         st.dataframe(top, use_container_width=True)
+    elif top is not None:
+        st.info("Belum ada data pada periode ini.")
+
+    st.markdown("---")
+    st.subheader("⏱️ Episode Kemacetan Terlama (7 Hari Terakhir)")
+    st.caption(f"Episode dimulai saat ≥{ENTER_VEHICLES} kendaraan dan berakhir saat turun "
+               f"di bawah {EXIT_VEHICLES}.")
+    jams = panel_value(results, "longest_jams", "Episode kemacetan")
+    if jams is not None and not jams.empty:
+        st.dataframe(jams, use_container_width=True)
+    elif jams is not None:
+        st.info("Belum ada episode kemacetan pada periode ini.")
+
+    render_panel_timings(results, total_ms)
+
+    if live:
+        schedule_live_refresh(live_interval)
+
+
+def live_panel(value) -> dict:
+    return {"value": value, "status": "live", "reason": None, "elapsed_ms": 0.0, "error": None}
+
+
+def panel_value(results: dict, name: str, label: str):
+    result = results[name]
+    if result["status"] == "stale":
+        st.caption(f"⚠️ {label}: menampilkan data sebelumnya ({result['reason']})")
+    elif result["value"] is None:
+        detail = f": {result['error']}" if result["error"] else ""
+        st.warning(f"⚠️ {label} tidak tersedia ({result['reason']}{detail})")
+    return result["value"]
+
+
+def render_panel_timings(results: dict, total_ms: float):
+    timings = pd.DataFrame([
+        {"panel": name, "status": result["status"], "waktu_ms": round(result["elapsed_ms"], 1)}
+        for name, result in results.items()
+    ]).sort_values("waktu_ms", ascending=False)
+    slowest = timings["waktu_ms"].max()
+    with st.expander("⏱️ Waktu Muat Panel"):
+        st.caption(f"Total {total_ms:.0f} ms · panel paling lambat {slowest:.0f} ms · "
+                   f"jumlah semua panel {timings['waktu_ms'].sum():.0f} ms")
+        st.dataframe(timings, use_container_width=True, hide_index=True)
+
+
+def schedule_live_refresh(live_interval: int):
+    st.caption(f"🔴 Live mode: {st.session_state.get('live_new_rows', 0)} baris baru pada refresh "
+               f"terakhir · refresh tiap {live_interval} detik")
+    # Tidur dipotong per LIVE_POLL_SECONDS: interaksi widget selama menunggu
+    # tidak tertahan sampai interval penuh. Data live baru diambil saat
+    # live_due tercapai (lihat get_live_state).
+    due = min(st.session_state.get("live_due", 0.0), time.monotonic() + live_interval)
+    st.session_state["live_due"] = due
+    time.sleep(min(LIVE_POLL_SECONDS, max(0.0, due - time.monotonic())))
+    st.rerun()
 
 
 def page_weather():
     st.title("🌤️ Cuaca Real-Time Jakarta")
 
-    db = TrafficDatabase()
-    weather_df = db.get_latest_weather()
+    weather_df = load_latest_weather(weather_version())
 
     if weather_df.empty:
         st.warning("⚠️ Belum ada data cuaca. Klik 'Refresh Cuaca' di sidebar.")
@@ -192,51 +455,97 @@ def page_weather():
     st.subheader("📋 Detail Data Cuaca")
     st.dataframe(weather_df, use_container_width=True)
 
+    st.markdown("---")
+    st.subheader("📉 Curah Hujan vs Kecepatan")
+    curve, lagged = load_precipitation_effect(int(time.time() // PRECIPITATION_REFRESH_SECONDS),
+                                              weather_version())
+    if not curve.empty:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.caption("Rata-rata kecepatan per kategori curah hujan (as-of join cuaca terakhir ≤ 1 jam)")
+            st.dataframe(curve, use_container_width=True)
+        with col2:
+            st.caption("Korelasi curah hujan dengan traffic pada jeda waktu (jam)")
+            st.dataframe(lagged, use_container_width=True)
+
 
 def page_raw_data(selected_location):
     st.title("📋 Data Raw")
 
-    db = TrafficDatabase()
+    location = None if selected_location == "Semua" else selected_location
+
+    col1, col2 = st.columns([1, 3])
+    use_dates = col1.checkbox("Filter tanggal")
+    start = end = None
+    if use_dates:
+        dates = col2.date_input("Rentang tanggal:", value=[])
+        if len(dates) == 2:
+            start = f"{dates[0]} 00:00:00"
+            end = f"{dates[1]} 23:59:59"
 
     tab1, tab2 = st.tabs(["🚗 Traffic Data", "🌤️ Weather Data"])
 
     with tab1:
-        if selected_location == "Semua":
-            df = db.get_all_traffic_data()
-        else:
-            df = db.get_traffic_by_location(selected_location)
-
-        st.metric("Total Baris", f"{len(df):,}")
-        st.dataframe(df.head(100), use_container_width=True)
-
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download CSV",
-            data=csv,
-            file_name="traffic_data.csv",
-            mime="text/csv",
-        )
+        render_data_pages("traffic", traffic_version(), location, start, end, "traffic_data.csv")
 
     with tab2:
-        weather_df = db.get_all_weather_data()
-        st.metric("Total Baris", f"{len(weather_df):,}")
-        st.dataframe(weather_df.head(100), use_container_width=True)
-
-        csv = weather_df.to_csv(index=False)
+        render_data_pages("weather", weather_version(), location, start, end, "weather_data.csv")
+
+
+def render_data_pages(table: str, version: int, location: str, start: str, end: str,
+                      file_name: str, page_size: int = 100):
+    cursor_key = f"{table}_page_cursors"
+    filter_key = f"{table}_page_filter"
+    filters = (location, start, end)
+    if st.session_state.get(filter_key) != filters:
+        st.session_state[filter_key] = filters
+        st.session_state[cursor_key] = [None]
+    cursors = st.session_state[cursor_key]
+
+    df, next_cursor = load_data_page(table, version, location, start, end, cursors[-1], page_size)
+
+    label = "Total Baris" if not start else "Total Baris (semua tanggal)"
+    st.metric(label, f"{load_row_count(table, version, location):,}")
+    st.caption(f"Halaman {len(cursors)} · {len(df)} baris")
+    st.dataframe(df, use_container_width=True)
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    col1.button("⬅️ Sebelumnya", key=f"{table}_prev", disabled=len(cursors) == 1,
+                on_click=cursors.pop)
+    col2.button("Berikutnya ➡️", key=f"{table}_next", disabled=next_cursor is None,
+                on_click=cursors.append, args=(next_cursor,))
+
+    col3.download_button(
+        label="📄 Download CSV (halaman ini)",
+        data=df.to_csv(index=False),
+        file_name=file_name.replace(".csv", f"_halaman_{len(cursors)}.csv"),
+        mime="text/csv",
+        key=f"{table}_download_page",
+    )
+
+    # Ekspor penuh dibangun dari halaman keyset berurutan, hanya kalau
+    # diminta, lalu di-cache per versi data + filter.
+    export_key = f"{table}_export"
+    if st.button("📦 Siapkan CSV lengkap", key=f"{table}_prepare_export"):
+        st.session_state[export_key] = (version, filters)
+    if st.session_state.get(export_key) == (version, filters):
+        with st.spinner("Menyiapkan CSV lengkap..."):
+            csv = load_full_csv(table, version, location, start, end)
         st.download_button(
-            label="📥 Download CSV",
+            label="📥 Download CSV (semua baris)",
             data=csv,
-            file_name="weather_data.csv",
+            file_name=file_name,
             mime="text/csv",
+            key=f"{table}_download",
         )
 
 
 def main():
     initialize()
-    selected_page, selected_location = render_sidebar()
+    selected_page, selected_location, live_interval = render_sidebar()
 
     if selected_page == "📊 Dashboard Utama":
-        page_dashboard()
+        page_dashboard(selected_location, live_interval)
     elif selected_page == "🌤️ Cuaca Real-Time":
         page_weather()
     elif selected_page == "📋 Data Raw":
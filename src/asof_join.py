@@ -0,0 +1,201 @@
+import math
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+WEATHER_JOIN_COLUMNS = ["timestamp", "location", "temperature", "precipitation", "windspeed", "rain_category"]
+
+PRECIPITATION_BINS = (0.0, 0.1, 2.5, 7.6, 15.0, 30.0, math.inf)
+
+
+class WeatherAsOfJoin:
+    def __init__(self, db, tolerance: timedelta = timedelta(hours=1)):
+        self.db = db
+        self.tolerance = tolerance
+
+    def _weather_between(self, conn, start: str, end: str, location: str = None) -> pd.DataFrame:
+        query = f"SELECT {', '.join(WEATHER_JOIN_COLUMNS)} FROM weather_data WHERE timestamp BETWEEN ? AND ?"
+        params = [start, end]
+        if location:
+            query += " AND location = ?"
+            params.append(location)
+        weather = pd.read_sql_query(query, conn, params=params)
+        weather["weather_time"] = pd.to_datetime(weather["timestamp"])
+        return weather.drop(columns=["timestamp"]).sort_values("weather_time")
+
+    def _attach(self, conn, left: pd.DataFrame, time_column: str, lag: timedelta,
+                location: str = None) -> pd.DataFrame:
+        return self._attach_lags(conn, left, time_column, (lag,), location).drop(columns=["lag"])
+
+    def _attach_lags(self, conn, left: pd.DataFrame, time_column: str, lags,
+                     location: str = None) -> pd.DataFrame:
+        # Semua jeda dijoin dalam satu merge_asof: tiap baris diulang per jeda
+        # dengan join_time masing-masing, dan cuaca cukup dibaca sekali.
+        left = left.copy()
+        left["traffic_time"] = pd.to_datetime(left[time_column])
+        left = pd.concat([left.assign(lag=lag, join_time=left["traffic_time"] - lag) for lag in lags],
+                         ignore_index=True)
+        left = left.sort_values("join_time")
+
+        start = (left["join_time"].iloc[0] - self.tolerance).strftime("%Y-%m-%d %H:%M:%S")
+        end = left["join_time"].iloc[-1].strftime("%Y-%m-%d %H:%M:%S")
+        weather = self._weather_between(conn, start, end, location)
+
+        joined = pd.merge_asof(
+            left,
+            weather,
+            left_on="join_time",
+            right_on="weather_time",
+            by="location",
+            tolerance=pd.Timedelta(self.tolerance),
+            direction="backward",
+        )
+        return joined.drop(columns=["join_time"])
+
+    def iter_joined(self, start: str = None, end: str = None, location: str = None,
+                    lag: timedelta = timedelta(0), chunksize: int = 50000):
+        for chunk in self.iter_joined_lags(start, end, location, (lag,), chunksize):
+            yield chunk.drop(columns=["lag"])
+
+    def iter_joined_lags(self, start: str = None, end: str = None, location: str = None,
+                         lags=(timedelta(0),), chunksize: int = 50000):
+        query = ("SELECT id, timestamp, location, vehicle_count, speed_kmh, rain_factor "
+                 "FROM traffic_data WHERE timestamp BETWEEN ? AND ?")
+        params = [start or "0000-00-00 00:00:00", end or "9999-12-31 23:59:59"]
+        if location:
+            query += " AND location = ?"
+            params.append(location)
+        query += " ORDER BY timestamp"
+
+        traffic_conn = self.db.get_connection()
+        weather_conn = self.db.get_connection()
+        try:
+            for chunk in pd.read_sql_query(query, traffic_conn, params=params, chunksize=chunksize):
+                if not chunk.empty:
+                    yield self._attach_lags(weather_conn, chunk, "timestamp", lags, location)
+        finally:
+            traffic_conn.close()
+            weather_conn.close()
+
+    def join(self, start: str = None, end: str = None, location: str = None,
+             lag: timedelta = timedelta(0)) -> pd.DataFrame:
+        chunks = list(self.iter_joined(start, end, location, lag))
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat(chunks, ignore_index=True)
+
+    def join_buckets(self, bucket_minutes: int = 60, start: str = None, end: str = None,
+                     location: str = None, lag: timedelta = timedelta(0)) -> pd.DataFrame:
+        seconds = int(bucket_minutes) * 60
+        query = f"""
+            SELECT
+                location,
+                datetime((CAST(strftime('%s', timestamp) AS INTEGER) / {seconds}) * {seconds},
+                         'unixepoch') AS bucket,
+                COUNT(*) AS records,
+                AVG(vehicle_count) AS avg_vehicles,
+                AVG(speed_kmh) AS avg_speed
+            FROM traffic_data
+            WHERE timestamp BETWEEN ? AND ?
+        """
+        params = [start or "0000-00-00 00:00:00", end or "9999-12-31 23:59:59"]
+        if location:
+            query += " AND location = ?"
+            params.append(location)
+        query += " GROUP BY location, bucket"
+
+        conn = self.db.get_connection()
+        try:
+            buckets = pd.read_sql_query(query, conn, params=params)
+            if buckets.empty:
+                return buckets
+            return self._attach(conn, buckets, "bucket", lag, location)
+        finally:
+            conn.close()
+
+
+class _Moments:
+    def __init__(self):
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.syy = self.sxy = 0.0
+
+    def add(self, x: np.ndarray, y: np.ndarray):
+        self.n += len(x)
+        self.sx += x.sum()
+        self.sy += y.sum()
+        self.sxx += (x * x).sum()
+        self.syy += (y * y).sum()
+        self.sxy += (x * y).sum()
+
+    def correlation(self) -> float:
+        if self.n < 2:
+            return float("nan")
+        cov = self.sxy - self.sx * self.sy / self.n
+        var_x = self.sxx - self.sx ** 2 / self.n
+        var_y = self.syy - self.sy ** 2 / self.n
+        if var_x <= 0 or var_y <= 0:
+            return float("nan")
+        return cov / math.sqrt(var_x * var_y)
+
+
+def _bin_labels(bins) -> list:
+    return [f"{low:g}-{high:g} mm" if high != math.inf else f">{low:g} mm"
+            for low, high in zip(bins[:-1], bins[1:])]
+
+
+def precipitation_effect(joiner: WeatherAsOfJoin, bins=PRECIPITATION_BINS, lags_hours=(0, 1, 2, 3),
+                         start: str = None, end: str = None, location: str = None) -> tuple:
+    # Kurva curah hujan (jeda 0) dan korelasi semua jeda dari satu kali scan
+    # traffic + satu merge_asof per chunk.
+    labels = _bin_labels(bins)
+    totals = pd.DataFrame(0.0, index=labels, columns=["records", "speed_sum", "speed_count", "vehicles_sum"])
+    lags = sorted(set(lags_hours) | {0})
+    speed = {lag: _Moments() for lag in lags}
+    vehicles = {lag: _Moments() for lag in lags}
+
+    for chunk in joiner.iter_joined_lags(start, end, location, [timedelta(hours=lag) for lag in lags]):
+        chunk = chunk.dropna(subset=["precipitation"])
+        if chunk.empty:
+            continue
+        for lag, part in chunk.groupby("lag", sort=False):
+            lag = lag / timedelta(hours=1)
+            with_speed = part.dropna(subset=["speed_kmh"])
+            speed[lag].add(with_speed["precipitation"].to_numpy(float), with_speed["speed_kmh"].to_numpy(float))
+            vehicles[lag].add(part["precipitation"].to_numpy(float), part["vehicle_count"].to_numpy(float))
+            if lag != 0:
+                continue
+            part = part.assign(bin=pd.cut(part["precipitation"], bins=list(bins), labels=labels,
+                                          right=False, include_lowest=True))
+            grouped = part.groupby("bin", observed=True).agg(
+                records=("vehicle_count", "size"),
+                speed_sum=("speed_kmh", "sum"),
+                speed_count=("speed_kmh", "count"),
+                vehicles_sum=("vehicle_count", "sum"),
+            )
+            totals = totals.add(grouped, fill_value=0)
+
+    totals = totals.reindex(labels)
+    totals = totals[totals["records"] > 0]
+    curve = pd.DataFrame({
+        "precipitation_bin": totals.index,
+        "avg_speed": (totals["speed_sum"] / totals["speed_count"]).round(1).values,
+        "avg_vehicles": (totals["vehicles_sum"] / totals["records"]).round(1).values,
+        "records": totals["records"].astype(int).values,
+    })
+    lagged = pd.DataFrame([{
+        "lag_hours": lag,
+        "corr_precipitation_speed": round(speed[lag].correlation(), 3),
+        "corr_precipitation_vehicles": round(vehicles[lag].correlation(), 3),
+        "samples": vehicles[lag].n,
+    } for lag in lags_hours])
+    return curve, lagged
+
+
+def precipitation_speed_curve(joiner: WeatherAsOfJoin, bins=PRECIPITATION_BINS,
+                              start: str = None, end: str = None, location: str = None) -> pd.DataFrame:
+    return precipitation_effect(joiner, bins, (), start, end, location)[0]
+
+
+def lagged_rain_effect(joiner: WeatherAsOfJoin, lags_hours=(0, 1, 2, 3),
+                       start: str = None, end: str = None, location: str = None) -> pd.DataFrame:
+    return precipitation_effect(joiner, PRECIPITATION_BINS, lags_hours, start, end, location)[1]
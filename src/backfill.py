@@ -0,0 +1,92 @@
+import os
+import socket
+import threading
+import uuid
+from database import TrafficDatabase
+from data_generator import DataGenerator, BACKFILL_JOB
+
+LOCK_NAME = "backfill:" + BACKFILL_JOB
+RETRY_SECONDS = 30
+STALE_LOCK_SECONDS = 120
+
+
+class BackfillWorker:
+    def __init__(self, db: TrafficDatabase = None):
+        self.db = db or TrafficDatabase()
+        self.generator = DataGenerator(db=self.db)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._state = "idle"
+        self._error = None
+        self._progress = {"completed_days": 0, "total_days": 0}
+        self._gaps_filled = False
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="backfill-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _set_state(self, state: str):
+        with self._lock:
+            self._state = state
+
+    def _refresh_progress(self) -> dict:
+        progress = self.generator.backfill_progress()
+        with self._lock:
+            self._progress = progress
+        return progress
+
+    def _on_day_done(self, day) -> bool:
+        self._refresh_progress()
+        return self.db.acquire_job_lock(LOCK_NAME, self.owner, STALE_LOCK_SECONDS)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                progress = self._refresh_progress()
+                if progress["completed_days"] >= progress["total_days"] and self._gaps_filled:
+                    self._set_state("done")
+                    return
+
+                if not self.db.acquire_job_lock(LOCK_NAME, self.owner, STALE_LOCK_SECONDS):
+                    self._set_state("waiting")
+                    self._stop.wait(RETRY_SECONDS)
+                    continue
+
+                self._set_state("running")
+                print(f"🏭 Backfill dimulai oleh {self.owner}")
+                try:
+                    self.generator.backfill_history(
+                        should_stop=self._stop.is_set,
+                        on_day_done=self._on_day_done,
+                    )
+                    progress = self._refresh_progress()
+                    if progress["completed_days"] >= progress["total_days"] and not self._stop.is_set():
+                        self._set_state("filling_gaps")
+                        self.generator.fill_gaps(scan_window=True)
+                        self.db.rebuild_congestion_events()
+                        self._gaps_filled = True
+                finally:
+                    self.db.release_job_lock(LOCK_NAME, self.owner)
+        except Exception as e:
+            print(f"❌ Backfill gagal: {e}")
+            with self._lock:
+                self._state = "error"
+                self._error = str(e)
+
+    def status(self) -> dict:
+        with self._lock:
+            progress = dict(self._progress)
+            progress["state"] = self._state
+            progress["error"] = self._error
+        return progress
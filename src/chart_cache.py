@@ -0,0 +1,170 @@
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from matplotlib.figure import Figure
+
+CHART_CACHE_BYTES = 32 * 1024 * 1024
+CHART_WORKERS = 1
+CHART_DPI = 200
+CHART_FORMATS = ("png", "svg")
+
+
+def _save(fig: Figure, fmt: str) -> bytes:
+    # Opsi sama dengan default st.pyplot, jadi gambar identik dengan versi lama.
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Format chart tidak dikenal: {fmt}")
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=CHART_DPI, bbox_inches="tight", facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+
+def render_hourly_bar(hourly: pd.DataFrame, fmt: str = "png") -> bytes:
+    # Figure langsung (bukan pyplot): tidak ada state global, aman di thread lain.
+    fig = Figure(figsize=(14, 4))
+    ax = fig.subplots()
+    ax.bar(hourly["hour"], hourly["avg_vehicles"], color="#e94560", alpha=0.8)
+    ax.set_xlabel("Jam")
+    ax.set_ylabel("Rata-rata Kendaraan")
+    ax.set_title("Jumlah Kendaraan Rata-rata Per Jam")
+    ax.set_xticks(range(0, 24))
+    ax.set_xticklabels([f"{h}:00" for h in range(0, 24)], rotation=45, fontsize=8)
+    ax.grid(axis="y", alpha=0.3)
+    ax.set_facecolor("#1a1a2e")
+    fig.patch.set_facecolor("#16213e")
+    ax.tick_params(colors="white")
+    ax.title.set_color("white")
+    ax.xaxis.label.set_color("white")
+    ax.yaxis.label.set_color("white")
+    fig.tight_layout()
+    return _save(fig, fmt)
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    # Untuk data yang bisa berubah tanpa kenaikan versi (mis. feed live per
+    # sesi): isi frame yang diplot ikut jadi bagian key cache.
+    hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.blake2b(hashed.tobytes(), digest_size=8).hexdigest()
+
+
+CHART_RENDERERS = {
+    "hourly_bar": render_hourly_bar,
+}
+
+
+class ChartCache:
+    def __init__(self, max_bytes: int = CHART_CACHE_BYTES, workers: int = CHART_WORKERS):
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chart-render")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._latest = {}
+        self._inflight = {}
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.render_ms = 0.0
+
+    def _key(self, chart: str, params: dict, fmt: str) -> tuple:
+        if chart not in CHART_RENDERERS:
+            raise ValueError(f"Chart tidak dikenal: {chart}")
+        return (chart, fmt, tuple(sorted((params or {}).items())))
+
+    def _store(self, key: tuple, version: int, payload: bytes):
+        with self._lock:
+            entry = (key, version)
+            if entry in self._entries:
+                self._bytes -= len(self._entries.pop(entry))
+            self._entries[entry] = payload
+            self._bytes += len(payload)
+            if version >= self._latest.get(key, version):
+                self._latest[key] = version
+            # Evict berdasarkan ukuran (LRU), bukan jumlah entry: SVG dan PNG
+            # dpi tinggi bisa berbeda ukuran puluhan kali lipat.
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                (old_key, old_version), old_payload = self._entries.popitem(last=False)
+                self._bytes -= len(old_payload)
+                if self._latest.get(old_key) == old_version:
+                    del self._latest[old_key]
+
+    def _render(self, chart: str, key: tuple, version: int, data, fmt: str) -> bytes:
+        started = time.perf_counter()
+        try:
+            payload = CHART_RENDERERS[chart](data, fmt)
+            with self._lock:
+                self.renders += 1
+                self.render_ms += (time.perf_counter() - started) * 1000
+            self._store(key, version, payload)
+            return payload
+        finally:
+            with self._lock:
+                self._inflight.pop((key, version), None)
+
+    def get(self, chart: str, params: dict, version: int, fmt: str = "png"):
+        key = self._key(chart, params, fmt)
+        with self._lock:
+            payload = self._entries.get((key, version))
+            if payload is not None:
+                self._entries.move_to_end((key, version))
+                self.hits += 1
+            return payload
+
+    def render(self, chart: str, params: dict, version: int, data, fmt: str = "png") -> bytes:
+        payload = self.get(chart, params, version, fmt)
+        if payload is not None:
+            return payload
+        with self._lock:
+            self.misses += 1
+        return self._render(chart, self._key(chart, params, fmt), version, data, fmt)
+
+    def _schedule(self, chart: str, key: tuple, version: int, data, fmt: str):
+        with self._lock:
+            future = self._inflight.get((key, version))
+            if future is None:
+                future = self._executor.submit(self._render, chart, key, version, data, fmt)
+                self._inflight[(key, version)] = future
+            return future
+
+    def request(self, chart: str, params: dict, version: int, data, fmt: str = "png",
+                wait: float = None) -> tuple:
+        # Stale-while-revalidate: kalau versi data berubah, gambar versi
+        # sebelumnya langsung ditampilkan dan render baru jalan di background.
+        # Hanya kalau belum pernah ada gambar sama sekali request menunggu.
+        key = self._key(chart, params, fmt)
+        with self._lock:
+            payload = self._entries.get((key, version))
+            if payload is not None:
+                self._entries.move_to_end((key, version))
+                self.hits += 1
+                return payload, "fresh"
+            self.misses += 1
+            latest = self._latest.get(key)
+            stale = self._entries.get((key, latest)) if latest is not None else None
+
+        future = self._schedule(chart, key, version, data, fmt)
+        if stale is not None:
+            with self._lock:
+                self.stale_hits += 1
+            return stale, "stale"
+        return future.result(timeout=wait), "rendered"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "renders": self.renders,
+                "avg_render_ms": round(self.render_ms / self.renders, 1) if self.renders else 0.0,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
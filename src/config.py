@@ -53,4 +53,8 @@ TRAFFIC_THRESHOLDS = {
 }
 
 HISTORICAL_DAYS = 30
-DATA_INTERVAL_MINUTES = 5
\ No newline at end of file
+DATA_INTERVAL_MINUTES = 5
+
+NETWORK_NEIGHBOURS = 3
+NETWORK_SPILL_RATE = 0.3
+NETWORK_RETAIN_RATE = 0.4
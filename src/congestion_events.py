@@ -0,0 +1,419 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import TRAFFIC_THRESHOLDS
+
+# Hysteresis: episode dimulai saat kendaraan >= batas "Macet" dan baru
+# dianggap selesai saat turun di bawah batas "Sangat Padat", supaya angka
+# yang naik-turun di sekitar 500 tidak dipecah jadi banyak episode pendek.
+ENTER_VEHICLES = TRAFFIC_THRESHOLDS["Macet"][0]
+EXIT_VEHICLES = TRAFFIC_THRESHOLDS["Sangat Padat"][0]
+MAX_GAP_MINUTES = 30
+
+EVENT_COLUMNS = (
+    "location", "start_time", "end_time", "last_time", "peak_time", "peak_vehicles",
+    "min_speed", "samples", "vehicles_sum", "duration_minutes",
+)
+
+
+def _minutes_between(start: str, end: str) -> float:
+    return (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds() / 60
+
+
+def _to_seconds(timestamp: str) -> int:
+    return int(np.datetime64(timestamp, "s").astype(np.int64))
+
+
+def _format_seconds(seconds) -> np.ndarray:
+    text = np.datetime_as_string(np.asarray(seconds, dtype=np.int64).astype("datetime64[s]"))
+    return np.char.replace(text, "T", " ")
+
+
+class CongestionDetector:
+    def __init__(self, states: dict = None):
+        self.states = states or {}
+        self._touched = {}
+
+    def _touch(self, event: dict):
+        self._touched[id(event)] = event
+
+    def _close(self, event: dict, end_time: str):
+        event["end_time"] = end_time
+        event["duration_minutes"] = _minutes_between(event["start_time"], end_time)
+        self._touch(event)
+
+    def feed(self, record) -> bool:
+        location = record["location"]
+        timestamp = record["timestamp"]
+        vehicles = record["vehicle_count"]
+        speed = record["speed_kmh"]
+
+        state = self.states.setdefault(location, {"watermark": None, "event": None})
+        if state["watermark"] is not None and timestamp <= state["watermark"]:
+            return False
+
+        event = state["event"]
+        if event is not None and _minutes_between(event["last_time"], timestamp) > MAX_GAP_MINUTES:
+            self._close(event, event["last_time"])
+            state["event"] = event = None
+
+        if event is None:
+            if vehicles >= ENTER_VEHICLES:
+                event = {
+                    "id": None, "location": location, "start_time": timestamp, "end_time": None,
+                    "last_time": timestamp, "peak_time": timestamp, "peak_vehicles": vehicles,
+                    "min_speed": speed, "samples": 1, "vehicles_sum": vehicles,
+                    "duration_minutes": 0.0,
+                }
+                state["event"] = event
+                self._touch(event)
+        elif vehicles < EXIT_VEHICLES:
+            self._close(event, timestamp)
+            state["event"] = None
+        else:
+            event["last_time"] = timestamp
+            event["samples"] += 1
+            event["vehicles_sum"] += vehicles
+            event["duration_minutes"] = _minutes_between(event["start_time"], timestamp)
+            if vehicles > event["peak_vehicles"]:
+                event["peak_vehicles"] = vehicles
+                event["peak_time"] = timestamp
+            if speed is not None and (event["min_speed"] is None or speed < event["min_speed"]):
+                event["min_speed"] = speed
+            self._touch(event)
+
+        state["watermark"] = timestamp
+        return True
+
+    def feed_many(self, location: str, seconds, vehicles, speeds) -> int:
+        # Hasil sama dengan feed() baris per baris untuk satu lokasi, tapi
+        # dihitung dengan numpy. Input harus urut waktu (detik epoch).
+        state = self.states.setdefault(location, {"watermark": None, "event": None})
+        seconds = np.asarray(seconds, dtype=np.int64)
+        keep = np.ones(len(seconds), dtype=bool)
+        keep[1:] = seconds[1:] > seconds[:-1]
+        if state["watermark"] is not None:
+            keep &= seconds > _to_seconds(state["watermark"])
+        seconds = seconds[keep]
+        vehicles = np.asarray(vehicles, dtype=np.int64)[keep]
+        speeds = np.asarray(speeds, dtype=float)[keep]
+        n = len(seconds)
+        if not n:
+            return 0
+
+        event = state["event"]
+        previous = np.empty(n)
+        previous[0] = _to_seconds(event["last_time"]) if event is not None else np.nan
+        previous[1:] = seconds[:-1]
+        gap = (seconds - previous) > MAX_GAP_MINUTES * 60
+
+        # Status macet tiap baris: ditentukan oleh baris terakhir yang masuk
+        # (>= ENTER), keluar (< EXIT) atau setelah gap; di antaranya ikut
+        # status sebelumnya (hysteresis).
+        enter = vehicles >= ENTER_VEHICLES
+        decided = np.where(enter | (vehicles < EXIT_VEHICLES) | gap, np.arange(n), -1)
+        decided = np.maximum.accumulate(decided)
+        on = np.where(decided >= 0, enter[decided], event is not None)
+        was_on = np.concatenate([[event is not None], on[:-1]])
+        starts = on & (~was_on | gap)
+
+        rows = np.flatnonzero(on)
+        segment = np.cumsum(starts)[rows]
+        first = np.flatnonzero(np.diff(segment, prepend=-1))
+        counts = np.diff(np.append(first, len(rows)))
+        last = rows[first + counts - 1]
+        follow = np.minimum(last + 1, n - 1)
+        closed = last + 1 < n
+        ends = np.where(gap[follow], seconds[last], seconds[follow])
+
+        on_vehicles = vehicles[rows]
+        peaks = np.maximum.reduceat(on_vehicles, first) if len(rows) else on_vehicles
+        peak_rows = rows[np.minimum.reduceat(
+            np.where(on_vehicles == np.repeat(peaks, counts), np.arange(len(rows)), len(rows)), first
+        )] if len(rows) else rows
+        sums = np.add.reduceat(on_vehicles, first) if len(rows) else on_vehicles
+        min_speeds = np.fmin.reduceat(speeds[rows], first) if len(rows) else speeds[rows]
+
+        start_text = _format_seconds(seconds[rows[first]])
+        last_text = _format_seconds(seconds[last])
+        end_text = _format_seconds(ends)
+        peak_text = _format_seconds(seconds[peak_rows])
+
+        continues = event is not None and len(rows) and segment[0] == 0
+        if event is not None and not continues:
+            self._close(event, event["last_time"] if gap[0] else _format_seconds(seconds[:1])[0])
+            event = None
+
+        for i in range(len(first)):
+            min_speed = None if np.isnan(min_speeds[i]) else float(min_speeds[i])
+            if i == 0 and continues:
+                event["samples"] += int(counts[i])
+                event["vehicles_sum"] += int(sums[i])
+                if peaks[i] > event["peak_vehicles"]:
+                    event["peak_vehicles"] = int(peaks[i])
+                    event["peak_time"] = str(peak_text[i])
+                if min_speed is not None and (event["min_speed"] is None or min_speed < event["min_speed"]):
+                    event["min_speed"] = min_speed
+            else:
+                event = {
+                    "id": None, "location": location, "start_time": str(start_text[i]), "end_time": None,
+                    "peak_time": str(peak_text[i]), "peak_vehicles": int(peaks[i]), "min_speed": min_speed,
+                    "samples": int(counts[i]), "vehicles_sum": int(sums[i]),
+                }
+            event["last_time"] = str(last_text[i])
+            if closed[i]:
+                self._close(event, str(end_text[i]))
+                event = None
+            else:
+                event["duration_minutes"] = _minutes_between(event["start_time"], event["last_time"])
+                self._touch(event)
+
+        state["event"] = event
+        state["watermark"] = str(_format_seconds(seconds[-1:])[0])
+        return n
+
+    def take_touched(self) -> list:
+        touched = list(self._touched.values())
+        self._touched = {}
+        return touched
+
+
+def create_event_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS congestion_events (
+            id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+            location            TEXT NOT NULL,
+            start_time          TEXT NOT NULL,
+            end_time            TEXT,
+            last_time           TEXT NOT NULL,
+            peak_time           TEXT NOT NULL,
+            peak_vehicles       INTEGER NOT NULL,
+            min_speed           REAL,
+            samples             INTEGER NOT NULL,
+            vehicles_sum        INTEGER NOT NULL,
+            duration_minutes    REAL NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_events_start
+        ON congestion_events(start_time)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_events_location_start
+        ON congestion_events(location, start_time)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS congestion_state (
+            location        TEXT PRIMARY KEY,
+            watermark       TEXT NOT NULL,
+            open_event_id   INTEGER
+        )
+    """)
+
+
+def _load_detector(cursor, locations) -> CongestionDetector:
+    locations = sorted(locations)
+    event_columns = ", ".join(f"e.{column}" for column in EVENT_COLUMNS if column != "location")
+    cursor.execute(f"""
+        SELECT s.location, s.watermark, e.id, {event_columns}
+        FROM congestion_state s
+        LEFT JOIN congestion_events e ON e.id = s.open_event_id
+        WHERE s.location IN ({", ".join("?" for _ in locations)})
+    """, locations)
+
+    states = {}
+    for row in cursor.fetchall():
+        event = None
+        if row["id"] is not None:
+            event = {column: row[column] for column in ("id",) + EVENT_COLUMNS}
+        states[row["location"]] = {"watermark": row["watermark"], "event": event}
+    return CongestionDetector(states)
+
+
+def _save_detector(cursor, detector: CongestionDetector):
+    # Hanya episode yang masih terbuka perlu tahu id-nya (disimpan di
+    # congestion_state); episode baru yang sudah selesai cukup di-batch.
+    insert_sql = f"""
+        INSERT INTO congestion_events ({", ".join(EVENT_COLUMNS)})
+        VALUES ({", ".join("?" for _ in EVENT_COLUMNS)})
+    """
+    assignments = ", ".join(f"{column} = ?" for column in EVENT_COLUMNS)
+    open_events = {id(state["event"]) for state in detector.states.values() if state["event"] is not None}
+    inserts, updates = [], []
+    for event in detector.take_touched():
+        values = [event[column] for column in EVENT_COLUMNS]
+        if event["id"] is not None:
+            updates.append(values + [event["id"]])
+        elif id(event) in open_events:
+            cursor.execute(insert_sql, values)
+            event["id"] = cursor.lastrowid
+        else:
+            inserts.append(values)
+    cursor.executemany(insert_sql, inserts)
+    cursor.executemany(f"UPDATE congestion_events SET {assignments} WHERE id = ?", updates)
+
+    cursor.executemany("""
+        INSERT OR REPLACE INTO congestion_state (location, watermark, open_event_id)
+        VALUES (?, ?, ?)
+    """, [
+        (location, state["watermark"], state["event"]["id"] if state["event"] else None)
+        for location, state in detector.states.items()
+        if state["watermark"] is not None
+    ])
+
+
+def _restart_time(cursor, location: str, since: str) -> str:
+    # Episode terakhir yang mulai sebelum baris terlambat ikut dihitung ulang
+    # kalau baris itu bisa mengubahnya (masih terbuka, belum ditutup saat
+    # baris itu terjadi, atau masih dalam MAX_GAP_MINUTES). Di titik mulainya
+    # detector pasti tidak sedang dalam episode, jadi replay bisa mulai bersih.
+    cursor.execute("""
+        SELECT start_time, end_time, last_time
+        FROM congestion_events
+        WHERE location = ? AND start_time <= ?
+        ORDER BY start_time DESC
+        LIMIT 1
+    """, (location, since))
+    row = cursor.fetchone()
+    if row is None:
+        return since
+    if row["end_time"] is None or row["end_time"] >= since or \
+            _minutes_between(row["last_time"], since) <= MAX_GAP_MINUTES:
+        return row["start_time"]
+    return since
+
+
+def _replay_location(cursor, detector: CongestionDetector, location: str, since: str,
+                     chunksize: int = 50000) -> int:
+    restart = _restart_time(cursor, location, since)
+    cursor.execute("DELETE FROM congestion_events WHERE location = ? AND start_time >= ?", (location, restart))
+    detector.states[location] = {"watermark": None, "event": None}
+
+    replayed = 0
+    reader = cursor.connection.execute("""
+        SELECT location, timestamp, vehicle_count, speed_kmh
+        FROM traffic_data
+        WHERE location = ? AND timestamp >= ?
+        ORDER BY timestamp
+    """, (location, restart))
+    while True:
+        rows = reader.fetchmany(chunksize)
+        if not rows:
+            break
+        for row in rows:
+            detector.feed(row)
+        replayed += len(rows)
+        _save_detector(cursor, detector)
+    return replayed
+
+
+def apply_to_events(cursor, records: list) -> int:
+    # Record yang lebih lama dari watermark lokasi (backfill, gap fill, data
+    # terlambat) tidak bisa di-feed langsung; lokasi itu dihitung ulang dari
+    # episode yang terdampak. Dipanggil setelah record masuk ke traffic_data.
+    if not records:
+        return 0
+    detector = _load_detector(cursor, {record["location"] for record in records})
+    late = {}
+    for record in records:
+        state = detector.states.get(record["location"])
+        if state is not None and record["timestamp"] < state["watermark"]:
+            late[record["location"]] = min(record["timestamp"], late.get(record["location"], record["timestamp"]))
+
+    for record in sorted(records, key=lambda r: r["timestamp"]):
+        if record["location"] not in late:
+            detector.feed(record)
+    _save_detector(cursor, detector)
+    for location, since in late.items():
+        _replay_location(cursor, detector, location, since)
+    return sum(1 for record in records if record["location"] in late)
+
+
+def apply_frame_to_events(cursor, frame: pd.DataFrame) -> int:
+    # frame: location, seconds (epoch), vehicle_count, speed_kmh dari bulk
+    # load. Lokasi dengan baris yang lebih lama dari watermark-nya dihitung
+    # ulang seperti di apply_to_events, lokasi lain di-feed langsung.
+    if frame.empty:
+        return 0
+    firsts = frame.groupby("location", observed=True)["seconds"].min()
+    detector = _load_detector(cursor, firsts.index)
+    late = {
+        location: str(_format_seconds([firsts[location]])[0])
+        for location, state in detector.states.items()
+        if firsts[location] < _to_seconds(state["watermark"])
+    }
+
+    frame = frame[~frame["location"].isin(list(late))].sort_values(["location", "seconds"], kind="stable")
+    for location, part in frame.groupby("location", sort=False, observed=True):
+        detector.feed_many(location, part["seconds"].to_numpy(), part["vehicle_count"].to_numpy(),
+                           part["speed_kmh"].to_numpy(dtype=float))
+    _save_detector(cursor, detector)
+    for location, since in late.items():
+        _replay_location(cursor, detector, location, since)
+
+    cursor.execute("SELECT COUNT(*) AS total FROM congestion_events")
+    return cursor.fetchone()["total"]
+
+
+def rebuild_events(cursor, chunksize: int = 50000) -> int:
+    cursor.execute("DELETE FROM congestion_events")
+    cursor.execute("DELETE FROM congestion_state")
+
+    detector = CongestionDetector()
+    reader = cursor.connection.execute("""
+        SELECT location, timestamp, vehicle_count, speed_kmh
+        FROM traffic_data
+        ORDER BY location, timestamp
+    """)
+    while True:
+        rows = reader.fetchmany(chunksize)
+        if not rows:
+            break
+        for row in rows:
+            detector.feed(row)
+        _save_detector(cursor, detector)
+
+    cursor.execute("SELECT COUNT(*) AS total FROM congestion_events")
+    return cursor.fetchone()["total"]
+
+
+class CongestionEventLog:
+    def __init__(self, db):
+        self.db = db
+
+    def _query(self, query: str, params: list) -> pd.DataFrame:
+        conn = self.db.get_connection()
+        df = pd.read_sql_query(query, conn, params=params)
+        conn.close()
+        return df
+
+    def longest(self, since: str = None, location: str = None, limit: int = 10) -> pd.DataFrame:
+        query = """
+            SELECT location, start_time, end_time, duration_minutes, peak_vehicles, peak_time,
+                   min_speed, ROUND(1.0 * vehicles_sum / samples, 1) AS avg_vehicles,
+                   CASE WHEN end_time IS NULL THEN 1 ELSE 0 END AS ongoing
+            FROM congestion_events
+            WHERE start_time >= ?
+        """
+        params = [since or ""]
+        if location:
+            query += " AND location = ?"
+            params.append(location)
+        query += " ORDER BY duration_minutes DESC, peak_vehicles DESC LIMIT ?"
+        params.append(limit)
+        return self._query(query, params)
+
+    def summary(self, since: str = None) -> pd.DataFrame:
+        return self._query("""
+            SELECT
+                location,
+                COUNT(*) AS episodes,
+                ROUND(SUM(duration_minutes), 1) AS total_minutes,
+                ROUND(AVG(duration_minutes), 1) AS avg_minutes,
+                MAX(duration_minutes) AS longest_minutes,
+                MAX(peak_vehicles) AS peak_vehicles
+            FROM congestion_events
+            WHERE start_time >= ?
+            GROUP BY location
+            ORDER BY total_minutes DESC
+        """, [since or ""])
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+PANEL_WORKERS = 8
+PANEL_TIMEOUT_SECONDS = 5.0
+LAST_GOOD_ENTRIES = 256
+
+
+class DashboardLoader:
+    def __init__(self, max_workers: int = PANEL_WORKERS, timeout: float = PANEL_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard-panel")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        # Loader dipakai bersama semua sesi, jadi cadangan disimpan per
+        # (panel, argumen): sesi lain dengan lokasi/periode lain tidak tertukar.
+        self._last_good = OrderedDict()
+
+    def _run(self, name: str, fn, args: tuple):
+        started = time.perf_counter()
+        try:
+            value = fn(*args)
+        except Exception as e:
+            return None, time.perf_counter() - started, str(e)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._last_good[(name, args)] = value
+            self._last_good.move_to_end((name, args))
+            while len(self._last_good) > LAST_GOOD_ENTRIES:
+                self._last_good.popitem(last=False)
+        return value, elapsed, None
+
+    def _submit(self, name: str, fn, args: tuple):
+        # Panel yang sebelumnya timeout masih jalan di thread-nya; query yang
+        # sama tidak dikirim ulang supaya panel lambat tidak menumpuk.
+        key = (name, args)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None or future.done():
+                future = self._executor.submit(self._run, name, fn, args)
+                self._inflight[key] = future
+                for stale in [k for k, f in self._inflight.items() if f.done() and k != key]:
+                    del self._inflight[stale]
+        return future
+
+    def _degraded(self, name: str, args: tuple, status: str, waited: float, error: str = None) -> dict:
+        with self._lock:
+            value = self._last_good.get((name, args))
+        return {
+            "value": value,
+            "status": "stale" if value is not None else status,
+            "reason": status,
+            "elapsed_ms": waited * 1000,
+            "error": error,
+        }
+
+    def load(self, panels: dict, timeouts: dict = None) -> tuple:
+        started = time.perf_counter()
+        futures = {name: self._submit(name, spec[0], tuple(spec[1:])) for name, spec in panels.items()}
+
+        results = {}
+        for name, future in futures.items():
+            args = tuple(panels[name][1:])
+            timeout = (timeouts or {}).get(name, self.timeout)
+            remaining = max(0.0, started + timeout - time.perf_counter())
+            try:
+                value, elapsed, error = future.result(timeout=remaining)
+            except FutureTimeout:
+                results[name] = self._degraded(name, args, "timeout", time.perf_counter() - started)
+                continue
+
+            if error is not None:
+                results[name] = self._degraded(name, args, "error", elapsed, error)
+            else:
+                results[name] = {"value": value, "status": "ok", "reason": None,
+                                 "elapsed_ms": elapsed * 1000, "error": None}
+
+        return results, (time.perf_counter() - started) * 1000
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
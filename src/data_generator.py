@@ -1,5 +1,5 @@
 import random
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from config import (
     LOCATIONS,
     VEHICLE_PATTERN,
@@ -10,10 +10,12 @@ from config import (
 )
 from database import TrafficDatabase
 
+BACKFILL_JOB = "historical"
+
 
 class DataGenerator:
-    def __init__(self):
-        self.db = TrafficDatabase()
+    def __init__(self, db: TrafficDatabase = None):
+        self.db = db or TrafficDatabase()
 
     def simulate_historical_weather(self, hour: int, day_of_week: int) -> dict:
         rain_probability = 0.15
@@ -77,118 +79,216 @@ class DataGenerator:
         speed = max(min_speed, min(max_speed, speed))
         return round(speed, 1)
 
-    def generate_historical_data(self):
-        print("=" * 50)
-        print("🏭 GENERATING HISTORICAL DATA...")
-        print("=" * 50)
+    def generate_interval(self, current_time: datetime, weather: dict, locations=None) -> list:
+        hour = current_time.hour
+        day_of_week = current_time.weekday()
+        records = []
 
-        now = datetime.now()
-        start_date = now - timedelta(days=HISTORICAL_DAYS)
+        for location in locations or LOCATIONS:
+            base_vehicles = VEHICLE_PATTERN.get(hour, 100)
+
+            location_var = random.uniform(0.8, 1.2)
+
+            if day_of_week >= 5:
+                day_var = random.uniform(0.6, 0.85)
+            else:
+                day_var = random.uniform(0.9, 1.1)
+
+            rain_factor = RAIN_IMPACT.get(weather["rain_category"], 1.0)
+            vehicles = int(base_vehicles * location_var * day_var * rain_factor)
+
+            condition = self.get_condition(vehicles)
+            speed = self.calculate_speed(vehicles, rain_factor)
+
+            is_peak = 1 if (6 <= hour <= 8 or 16 <= hour <= 18) else 0
+
+            records.append({
+                "timestamp": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+                "location": location,
+                "vehicle_count": vehicles,
+                "condition": condition,
+                "speed_kmh": speed,
+                "hour": hour,
+                "is_peak": is_peak,
+                "rain_factor": rain_factor,
+                "data_source": "historical_generated",
+            })
+
+        return records
+
+    def weather_records(self, current_time: datetime, weather: dict, locations=None) -> list:
+        return [{
+            "timestamp": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "location": location,
+            "temperature": weather["temperature"],
+            "precipitation": weather["precipitation"],
+            "windspeed": round(random.uniform(5, 25), 1),
+            "weather_code": 61 if weather["rain_category"] != "none" else 0,
+            "weather_desc": "Hujan" if weather["rain_category"] != "none" else "Cerah",
+            "rain_category": weather["rain_category"],
+        } for location in locations or LOCATIONS]
+
+    def generate_day(self, day: date, until: datetime = None) -> tuple:
+        current_time = datetime.combine(day, datetime.min.time())
+        end_of_day = current_time.replace(hour=23, minute=59, second=59)
+        if until is not None:
+            end_of_day = min(end_of_day, until)
 
         traffic_batch = []
         weather_batch = []
+        weather_cache = {}
 
-        total_expected = HISTORICAL_DAYS * (24 * 60 // DATA_INTERVAL_MINUTES) * len(LOCATIONS)
-        count = 0
+        while current_time <= end_of_day:
+            hour = current_time.hour
 
-        print(f"📊 Target: {total_expected:,} baris data traffic")
-        print(f"📅 Dari: {start_date.strftime('%Y-%m-%d')} sampai {now.strftime('%Y-%m-%d')}")
-        print(f"📍 Lokasi: {len(LOCATIONS)} titik")
-        print("─" * 50)
+            if hour not in weather_cache:
+                weather_cache[hour] = self.simulate_historical_weather(hour, day.weekday())
 
-        current_date = start_date
-        while current_date < now:
-            day_of_week = current_date.weekday()
+            weather = weather_cache[hour]
+            traffic_batch.extend(self.generate_interval(current_time, weather))
 
-            current_time = current_date.replace(hour=0, minute=0, second=0)
-            end_of_day = current_date.replace(hour=23, minute=59, second=59)
+            if current_time.minute == 0:
+                weather_batch.extend(self.weather_records(current_time, weather))
 
-            weather_cache = {}
+            current_time += timedelta(minutes=DATA_INTERVAL_MINUTES)
 
-            while current_time <= end_of_day and current_time < now:
-                hour = current_time.hour
+        return traffic_batch, weather_batch
 
-                if hour not in weather_cache:
-                    weather_cache[hour] = self.simulate_historical_weather(hour, day_of_week)
+    def align_interval(self, moment: datetime, round_up: bool = False) -> datetime:
+        step = timedelta(minutes=DATA_INTERVAL_MINUTES)
+        aligned = datetime.min + ((moment - datetime.min) // step) * step
+        if round_up and aligned < moment:
+            aligned += step
+        return aligned
 
-                weather = weather_cache[hour]
+    def find_gaps(self, scan_window: bool = False, now: datetime = None) -> dict:
+        now = now or datetime.now()
+        step = timedelta(minutes=DATA_INTERVAL_MINUTES)
+        window_start = self.align_interval(now - timedelta(days=HISTORICAL_DAYS), round_up=True)
+        window_key = window_start.strftime("%Y-%m-%d %H:%M:%S")
+        # Baris bertanggal di masa depan (ingestion menerimanya) diabaikan,
+        # supaya gap tidak pernah diisi melewati sekarang.
+        now_key = now.strftime("%Y-%m-%d %H:%M:%S")
 
-                for location in LOCATIONS:
-                    base_vehicles = VEHICLE_PATTERN.get(hour, 100)
+        gaps = {location: [] for location in LOCATIONS}
 
-                    location_var = random.uniform(0.8, 1.2)
+        for location, last_ts in self.db.get_last_traffic_timestamps(until=now_key).items():
+            if last_ts is None:
+                start = window_start
+            else:
+                start = max(window_start, datetime.strptime(last_ts, "%Y-%m-%d %H:%M:%S") + step)
+            if start <= now:
+                gaps[location].append((start, now))
+
+        if scan_window:
+            for location, prev_ts, next_ts in self.db.get_traffic_gaps(
+                    window_key, DATA_INTERVAL_MINUTES * 1.5, until=now_key):
+                if location not in gaps:
+                    continue
+                start = datetime.strptime(prev_ts, "%Y-%m-%d %H:%M:%S") + step
+                end = min(datetime.strptime(next_ts, "%Y-%m-%d %H:%M:%S") - step, now)
+                if start <= end:
+                    gaps[location].append((max(start, window_start), end))
+
+        return {location: ranges for location, ranges in gaps.items() if ranges}
+
+    def fill_gaps(self, scan_window: bool = False, batch_size: int = 5000) -> int:
+        gaps = self.find_gaps(scan_window=scan_window)
+        if not gaps:
+            return 0
+
+        slots = {}
+        for location, ranges in gaps.items():
+            for start, end in ranges:
+                current_time = self.align_interval(start, round_up=True)
+                while current_time <= end:
+                    slots.setdefault(current_time, []).append(location)
+                    current_time += timedelta(minutes=DATA_INTERVAL_MINUTES)
+
+        print(f"🩹 Mengisi {sum(len(v) for v in slots.values()):,} interval yang hilang "
+              f"di {len(gaps)} lokasi")
 
-                    if day_of_week >= 5:
-                        day_var = random.uniform(0.6, 0.85)
-                    else:
-                        day_var = random.uniform(0.9, 1.1)
+        traffic_batch = []
+        weather_batch = []
+        weather_cache = {}
+        total = 0
+
+        for current_time in sorted(slots):
+            hour_key = current_time.replace(minute=0, second=0)
+            if hour_key not in weather_cache:
+                weather_cache[hour_key] = self.simulate_historical_weather(
+                    current_time.hour, current_time.weekday())
+            weather = weather_cache[hour_key]
+
+            locations = slots[current_time]
+            traffic_batch.extend(self.generate_interval(current_time, weather, locations))
+            if current_time.minute == 0:
+                weather_batch.extend(self.weather_records(current_time, weather, locations))
+
+            if len(traffic_batch) >= batch_size:
+                self.db.insert_generated_data(traffic_batch, weather_batch)
+                total += len(traffic_batch)
+                traffic_batch = []
+                weather_batch = []
 
-                    rain_factor = RAIN_IMPACT.get(weather["rain_category"], 1.0)
-                    vehicles = int(base_vehicles * location_var * day_var * rain_factor)
+        self.db.insert_generated_data(traffic_batch, weather_batch)
+        total += len(traffic_batch)
+        return total
 
-                    condition = self.get_condition(vehicles)
-                    speed = self.calculate_speed(vehicles, rain_factor)
+    def backfill_days(self) -> list:
+        today = datetime.now().date()
+        return [today - timedelta(days=i) for i in range(HISTORICAL_DAYS + 1)]
 
-                    is_peak = 1 if (6 <= hour <= 8 or 16 <= hour <= 18) else 0
+    def backfill_progress(self) -> dict:
+        days = self.backfill_days()
+        done = self.db.get_backfill_days(BACKFILL_JOB)
+        completed = sum(1 for day in days if day.isoformat() in done)
+        return {"completed_days": completed, "total_days": len(days)}
 
-                    traffic_batch.append({
-                        "timestamp": current_time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "location": location,
-                        "vehicle_count": vehicles,
-                        "condition": condition,
-                        "speed_kmh": speed,
-                        "hour": hour,
-                        "is_peak": is_peak,
-                        "rain_factor": rain_factor,
-                        "data_source": "historical_generated",
-                    })
+    def backfill_history(self, should_stop=None, on_day_done=None) -> int:
+        done = self.db.get_backfill_days(BACKFILL_JOB)
+        generated = 0
 
-                    count += 1
+        for day in self.backfill_days():
+            if should_stop is not None and should_stop():
+                break
 
-                if current_time.minute == 0:
-                    for location in LOCATIONS:
-                        weather_batch.append({
-                            "timestamp": current_time.strftime("%Y-%m-%d %H:%M:%S"),
-                            "location": location,
-                            "temperature": weather["temperature"],
-                            "precipitation": weather["precipitation"],
-                            "windspeed": round(random.uniform(5, 25), 1),
-                            "weather_code": 61 if weather["rain_category"] != "none" else 0,
-                            "weather_desc": "Hujan" if weather["rain_category"] != "none" else "Cerah",
-                            "rain_category": weather["rain_category"],
-                        })
+            day_key = day.isoformat()
+            if day_key in done:
+                continue
 
-                if count % 10000 == 0:
-                    print(f"  📝 Progress: {count:,} / {total_expected:,} baris "
-                          f"({count/total_expected*100:.1f}%)")
+            if self.db.has_traffic_between(f"{day_key} 00:00:00", f"{day_key} 23:59:59",
+                                           data_source="historical_generated"):
+                self.db.insert_backfill_day(BACKFILL_JOB, day_key, [], [])
+            else:
+                traffic, weather = self.generate_day(day, until=datetime.now())
+                self.db.insert_backfill_day(BACKFILL_JOB, day_key, traffic, weather)
+                generated += len(traffic)
+                print(f"  📝 Backfill {day_key}: {len(traffic):,} baris traffic, "
+                      f"{len(weather):,} baris cuaca")
 
-                current_time += timedelta(minutes=DATA_INTERVAL_MINUTES)
+            if on_day_done is not None and on_day_done(day) is False:
+                break
 
-            current_date += timedelta(days=1)
+        return generated
 
-            if len(traffic_batch) > 5000:
-                self.db.insert_traffic_data(traffic_batch)
-                traffic_batch = []
+    def generate_historical_data(self):
+        print("=" * 50)
+        print("🏭 GENERATING HISTORICAL DATA...")
+        print("=" * 50)
 
-        if traffic_batch:
-            self.db.insert_traffic_data(traffic_batch)
-
-        print(f"\n💧 Saving {len(weather_batch):,} weather records...")
-        batch_size = 1000
-        for i in range(0, len(weather_batch), batch_size):
-            batch = weather_batch[i:i + batch_size]
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            cursor.executemany("""
-                INSERT INTO weather_data 
-                (timestamp, location, temperature, precipitation, windspeed,
-                 weather_code, weather_desc, rain_category)
-                VALUES 
-                (:timestamp, :location, :temperature, :precipitation, :windspeed,
-                 :weather_code, :weather_desc, :rain_category)
-            """, batch)
-            conn.commit()
-            conn.close()
+        now = datetime.now()
+        start_date = now - timedelta(days=HISTORICAL_DAYS)
+        total_expected = HISTORICAL_DAYS * (24 * 60 // DATA_INTERVAL_MINUTES) * len(LOCATIONS)
+
+        print(f"📊 Target: {total_expected:,} baris data traffic")
+        print(f"📅 Dari: {start_date.strftime('%Y-%m-%d')} sampai {now.strftime('%Y-%m-%d')}")
+        print(f"📍 Lokasi: {len(LOCATIONS)} titik")
+        print("─" * 50)
+
+        self.backfill_history()
+        self.fill_gaps(scan_window=True)
+        self.db.rebuild_congestion_events()
 
         print("\n" + "=" * 50)
         print("✅ HISTORICAL DATA GENERATION COMPLETE!")
@@ -197,4 +297,4 @@ class DataGenerator:
         total_weather = self.db.get_weather_count()
         print(f"📊 Total traffic records: {total_traffic:,}")
         print(f"🌤️  Total weather records: {total_weather:,}")
-        print("=" * 50)
\ No newline at end of file
+        print("=" * 50)
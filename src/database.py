@@ -1,24 +1,76 @@
 import sqlite3
+import threading
+import time
+from itertools import islice
+import numpy as np
 import pandas as pd
-from config import DATABASE_PATH
+from config import DATABASE_PATH, LOCATIONS
+from aggregate_cube import apply_frame_to_cube, apply_to_cube, create_cube_table, rebuild_cube
+from congestion_events import apply_frame_to_events, apply_to_events, create_event_tables, rebuild_events
+from db_writer import after_commit, get_writer
+from sketches import apply_frame_to_sketches, apply_to_sketches, create_sketch_table, rebuild_sketches
+from topn_index import TopCongestionIndex, TOPN_COLUMNS
+
+VERSIONED_TABLES = ("traffic_data", "weather_data", "traffic_analysis")
+
+BULK_TRAFFIC_COLUMNS = (
+    "timestamp", "location", "vehicle_count", "condition", "speed_kmh",
+    "hour", "is_peak", "rain_factor", "data_source",
+)
+# Hanya pragma yang boleh diubah di dalam transaksi writer; synchronous dan
+# journal_mode tetap mengikuti koneksi writer (WAL + NORMAL).
+BULK_PRAGMAS = {"cache_size": -262144, "temp_store": 2}
+BULK_CHUNK_ROWS = 100000
+DATA_VERSION_TTL_SECONDS = 1.0
+
+TRAFFIC_LATEST_COLUMNS = (
+    "location", "id", "timestamp", "vehicle_count", "condition", "speed_kmh", "rain_factor",
+)
+WEATHER_LATEST_COLUMNS = (
+    "location", "id", "timestamp", "temperature", "precipitation", "windspeed",
+    "weather_code", "weather_desc", "rain_category",
+)
+
+_data_versions = {}
+_versions_checked = {}
+_latest_state = {}
+_topn_indexes = {}
+_versions_lock = threading.Lock()
+
+
+def _plain_list(values) -> list:
+    # numpy/pandas -> tipe Python biasa supaya bisa di-bind oleh sqlite3.
+    return values.tolist() if hasattr(values, "tolist") else list(values)
 
 
 class TrafficDatabase:
-    def __init__(self):
-        self.db_path = DATABASE_PATH
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or DATABASE_PATH
         print(f"📁 Database path: {self.db_path}")
 
+    @property
+    def topn_index(self) -> TopCongestionIndex:
+        with _versions_lock:
+            index = _topn_indexes.get(self.db_path)
+            if index is None:
+                index = TopCongestionIndex()
+                _topn_indexes[self.db_path] = index
+            return index
+
     def get_connection(self):
         conn = sqlite3.connect(self.db_path, check_same_thread=False)
         conn.row_factory = sqlite3.Row
         return conn
 
+    def _write(self, fn):
+        return get_writer(self.db_path, on_commit=self._publish_state).execute(fn)
+
     def init_tables(self):
         print("🗄️  Initializing database tables...")
-        
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        self._write(self._create_tables)
+        print("✅ Tables created successfully!")
 
+    def _create_tables(self, cursor):
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS traffic_data (
                 id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -63,17 +115,365 @@ class TrafficDatabase:
             )
         """)
 
-        conn.commit()
-        conn.close()
-        print("✅ Tables created successfully!")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS data_version (
+                table_name  TEXT PRIMARY KEY,
+                version     INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.executemany(
+            "INSERT OR IGNORE INTO data_version (table_name, version) VALUES (?, 0)",
+            [(name,) for name in VERSIONED_TABLES],
+        )
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS backfill_progress (
+                job             TEXT NOT NULL,
+                day             TEXT NOT NULL,
+                traffic_rows    INTEGER DEFAULT 0,
+                weather_rows    INTEGER DEFAULT 0,
+                completed_at    TEXT NOT NULL,
+                PRIMARY KEY (job, day)
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS job_locks (
+                name        TEXT PRIMARY KEY,
+                owner       TEXT NOT NULL,
+                heartbeat   REAL NOT NULL
+            )
+        """)
+
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_traffic_timestamp ON traffic_data (timestamp)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_traffic_location_timestamp "
+            "ON traffic_data (location, timestamp)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_traffic_vehicle_count ON traffic_data (vehicle_count)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_weather_timestamp ON weather_data (timestamp)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_weather_location_timestamp "
+            "ON weather_data (location, timestamp)"
+        )
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS traffic_latest (
+                location        TEXT PRIMARY KEY,
+                id              INTEGER NOT NULL,
+                timestamp       TEXT NOT NULL,
+                vehicle_count   INTEGER NOT NULL,
+                condition       TEXT NOT NULL,
+                speed_kmh       REAL,
+                rain_factor     REAL
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS weather_latest (
+                location        TEXT PRIMARY KEY,
+                id              INTEGER NOT NULL,
+                timestamp       TEXT NOT NULL,
+                temperature     REAL,
+                precipitation   REAL,
+                windspeed       REAL,
+                weather_code    INTEGER,
+                weather_desc    TEXT,
+                rain_category   TEXT
+            )
+        """)
+
+        create_cube_table(cursor)
+        cursor.execute("SELECT COUNT(*) AS total FROM traffic_cube")
+        if cursor.fetchone()["total"] == 0:
+            rebuild_cube(cursor)
+
+        create_sketch_table(cursor)
+        cursor.execute("SELECT COUNT(*) AS total FROM traffic_sketches")
+        if cursor.fetchone()["total"] == 0:
+            rebuild_sketches(cursor)
+
+        create_event_tables(cursor)
+        cursor.execute("SELECT COUNT(*) AS total FROM congestion_state")
+        if cursor.fetchone()["total"] == 0:
+            rebuild_events(cursor)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS row_counts (
+                table_name  TEXT NOT NULL,
+                location    TEXT NOT NULL,
+                row_count   INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (table_name, location)
+            )
+        """)
+        cursor.execute("SELECT COUNT(*) AS total FROM row_counts")
+        if cursor.fetchone()["total"] == 0:
+            self._rebuild_row_counts(cursor)
+
+        cursor.execute("SELECT COUNT(*) AS total FROM traffic_latest")
+        if cursor.fetchone()["total"] == 0:
+            self._rebuild_latest(cursor, "traffic_data", "traffic_latest", TRAFFIC_LATEST_COLUMNS)
+        cursor.execute("SELECT COUNT(*) AS total FROM weather_latest")
+        if cursor.fetchone()["total"] == 0:
+            self._rebuild_latest(cursor, "weather_data", "weather_latest", WEATHER_LATEST_COLUMNS)
 
     def insert_traffic_data(self, records: list):
         if not records:
             return
 
+        self._write(lambda cursor: self._insert_traffic_rows(cursor, records))
+        print(f"✅ Inserted {len(records)} traffic records")
+
+    def bulk_load_traffic(self, rows, drop_indexes: bool = None, chunksize: int = BULK_CHUNK_ROWS) -> dict:
+        # rows: iterator tuple (urutan BULK_TRAFFIC_COLUMNS), dict kolom -> array,
+        # atau DataFrame. Seluruh load satu job writer = satu transaksi.
+        incoming = None
+        if isinstance(rows, (dict, pd.DataFrame)):
+            missing = [column for column in BULK_TRAFFIC_COLUMNS if column not in rows]
+            if missing:
+                raise ValueError(f"Kolom wajib tidak ada: {', '.join(missing)}")
+            incoming = len(rows[BULK_TRAFFIC_COLUMNS[0]])
+            rows = zip(*(_plain_list(rows[column]) for column in BULK_TRAFFIC_COLUMNS))
+        elif hasattr(rows, "__len__"):
+            incoming = len(rows)
+        rows = iter(rows)
+
+        # Index dibangun ulang dari nol hanya kalau data baru minimal sebanyak
+        # data lama; iterator tanpa panjang dianggap besar.
+        if drop_indexes is None:
+            drop_indexes = incoming is None or incoming >= self.get_traffic_count()
+
+        stats = {"rows": 0, "load_seconds": 0.0, "derived_seconds": 0.0}
+
+        def write(cursor):
+            previous = {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_PRAGMAS}
+            for name, value in BULK_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            try:
+                indexes = []
+                if drop_indexes:
+                    cursor.execute("""
+                        SELECT name, sql FROM sqlite_master
+                        WHERE type = 'index' AND tbl_name = 'traffic_data' AND sql IS NOT NULL
+                    """)
+                    indexes = cursor.fetchall()
+                    for index in indexes:
+                        cursor.execute(f"DROP INDEX {index['name']}")
+
+                events = []
+                latest = {}
+                counts = {}
+                while True:
+                    started = time.perf_counter()
+                    chunk = list(islice(rows, chunksize))
+                    if not chunk:
+                        break
+                    cursor.executemany(f"""
+                        INSERT INTO traffic_data ({", ".join(BULK_TRAFFIC_COLUMNS)})
+                        VALUES ({", ".join("?" for _ in BULK_TRAFFIC_COLUMNS)})
+                    """, chunk)
+                    first_id = self._first_inserted_id(cursor, len(chunk))
+                    stats["load_seconds"] += time.perf_counter() - started
+
+                    started = time.perf_counter()
+                    frame = pd.DataFrame.from_records(chunk, columns=BULK_TRAFFIC_COLUMNS)
+                    frame["id"] = np.arange(first_id, first_id + len(frame))
+                    frame["datetime"] = pd.to_datetime(frame["timestamp"], format="%Y-%m-%d %H:%M:%S")
+                    self._collect_bulk_state(frame, latest, counts, events)
+                    apply_frame_to_cube(cursor, frame)
+                    apply_frame_to_sketches(cursor, frame)
+                    stats["rows"] += len(frame)
+                    stats["derived_seconds"] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                for index in indexes:
+                    cursor.execute(index["sql"])
+                stats["index_seconds"] = time.perf_counter() - started
+
+                started = time.perf_counter()
+                if stats["rows"]:
+                    self._write_latest(cursor, "traffic_latest", TRAFFIC_LATEST_COLUMNS, list(latest.values()))
+                    self._write_row_counts(cursor, "traffic_data", counts)
+                    apply_frame_to_events(cursor, pd.concat(events, ignore_index=True))
+                    self._bump_version(cursor, "traffic_data")
+                stats["derived_seconds"] += time.perf_counter() - started
+            finally:
+                for name, value in previous.items():
+                    cursor.execute(f"PRAGMA {name} = {value}")
+
+            conn = cursor.connection
+            after_commit(self.topn_index.reset)
+            after_commit(lambda: conn.execute("PRAGMA wal_checkpoint(TRUNCATE)"))
+
+        self._write(write)
+
+        total = stats["load_seconds"] + stats["index_seconds"] + stats["derived_seconds"]
+        stats["rows_per_sec"] = stats["rows"] / total if total > 0 else 0.0
+        print(f"📦 Bulk load {stats['rows']:,} traffic records dalam {total:.1f} s "
+              f"({stats['rows_per_sec']:,.0f} rows/sec; insert {stats['load_seconds']:.1f} s, "
+              f"index {stats['index_seconds']:.1f} s, agregat {stats['derived_seconds']:.1f} s)")
+        return stats
+
+    def _collect_bulk_state(self, frame: pd.DataFrame, latest: dict, counts: dict, events: list):
+        # traffic_latest & row_counts cukup diringkas per lokasi; kolom untuk
+        # detektor episode disimpan ringkas (tanpa string) sampai load selesai.
+        newest = frame.sort_values(["timestamp", "id"]).groupby("location").tail(1)
+        for record in newest.to_dict("records"):
+            current = latest.get(record["location"])
+            if current is None or (record["timestamp"], record["id"]) >= (current["timestamp"], current["id"]):
+                latest[record["location"]] = record
+        for location, count in frame["location"].value_counts().items():
+            counts[location] = counts.get(location, 0) + int(count)
+        events.append(pd.DataFrame({
+            "location": frame["location"].astype("category"),
+            "seconds": frame["datetime"].to_numpy().astype("datetime64[s]").astype(np.int64),
+            "vehicle_count": frame["vehicle_count"].to_numpy(dtype=np.int64),
+            "speed_kmh": frame["speed_kmh"].to_numpy(dtype=float),
+        }))
+
+    def insert_weather_data(self, record: dict):
+        self.insert_weather_batch([record])
+
+    def insert_weather_batch(self, records: list):
+        if not records:
+            return
+
+        self._write(lambda cursor: self._insert_weather_rows(cursor, records))
+
+    def insert_weather_hourly(self, records: list) -> int:
+        if not records:
+            return 0
+
+        def write(cursor):
+            # Response yang tumpang tindih: yang terakhir di list menang, dan
+            # timestamp yang sudah ada di weather_data tidak ditulis ulang.
+            batch = {(r["location"], r["timestamp"]): r for r in records}
+            locations = sorted({location for location, _ in batch})
+            cursor.execute(f"""
+                SELECT location, timestamp FROM weather_data
+                WHERE location IN ({", ".join("?" for _ in locations)})
+                AND timestamp BETWEEN ? AND ?
+            """, locations + [min(t for _, t in batch), max(t for _, t in batch)])
+            existing = {(row["location"], row["timestamp"]) for row in cursor.fetchall()}
+
+            fresh = [record for key, record in sorted(batch.items(), key=lambda item: item[0][::-1])
+                     if key not in existing]
+            if fresh:
+                self._insert_weather_rows(cursor, fresh)
+            return len(fresh)
+
+        return self._write(write)
+
+    def insert_generated_data(self, traffic: list, weather: list):
+        if not traffic and not weather:
+            return
+
+        def write(cursor):
+            if traffic:
+                self._insert_traffic_rows(cursor, traffic)
+            if weather:
+                self._insert_weather_rows(cursor, weather)
+
+        self._write(write)
+
+    def insert_backfill_day(self, job: str, day: str, traffic: list, weather: list):
+        def write(cursor):
+            if traffic:
+                self._insert_traffic_rows(cursor, traffic)
+            if weather:
+                self._insert_weather_rows(cursor, weather)
+
+            cursor.execute("""
+                INSERT OR REPLACE INTO backfill_progress
+                (job, day, traffic_rows, weather_rows, completed_at)
+                VALUES (?, ?, ?, ?, datetime('now', 'localtime'))
+            """, (job, day, len(traffic), len(weather)))
+
+        self._write(write)
+
+    def get_backfill_days(self, job: str) -> set:
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute("SELECT day FROM backfill_progress WHERE job = ?", (job,))
+        days = {row["day"] for row in cursor.fetchall()}
+        conn.close()
+        return days
+
+    def has_traffic_between(self, start: str, end: str, data_source: str = None) -> bool:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        query = "SELECT 1 FROM traffic_data WHERE timestamp BETWEEN ? AND ?"
+        params = [start, end]
+        if data_source:
+            query += " AND data_source = ?"
+            params.append(data_source)
+        cursor.execute(query + " LIMIT 1", params)
+        found = cursor.fetchone() is not None
+        conn.close()
+        return found
+
+    def get_last_traffic_timestamps(self, until: str = None) -> dict:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        result = {}
+        for location in LOCATIONS:
+            cursor.execute(
+                "SELECT MAX(timestamp) AS last_ts FROM traffic_data WHERE location = ? AND timestamp <= ?",
+                (location, until or "9999-12-31 23:59:59")
+            )
+            result[location] = cursor.fetchone()["last_ts"]
+        conn.close()
+        return result
+
+    def get_traffic_gaps(self, since: str, min_gap_minutes: float, until: str = None) -> list:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT location, prev_ts, timestamp FROM (
+                SELECT
+                    location,
+                    timestamp,
+                    LAG(timestamp) OVER (PARTITION BY location ORDER BY timestamp) AS prev_ts
+                FROM traffic_data
+                WHERE timestamp >= ? AND timestamp <= ?
+            )
+            WHERE prev_ts IS NOT NULL
+              AND (julianday(timestamp) - julianday(prev_ts)) * 1440 > ?
+            ORDER BY location, prev_ts
+        """, (since, until or "9999-12-31 23:59:59", min_gap_minutes))
+        gaps = [(row["location"], row["prev_ts"], row["timestamp"]) for row in cursor.fetchall()]
+        conn.close()
+        return gaps
 
+    def acquire_job_lock(self, name: str, owner: str, stale_after: float = 120.0) -> bool:
+        def write(cursor):
+            now = time.time()
+            cursor.execute("SELECT owner, heartbeat FROM job_locks WHERE name = ?", (name,))
+            row = cursor.fetchone()
+            if row is not None and row["owner"] != owner and now - row["heartbeat"] < stale_after:
+                return False
+            cursor.execute(
+                "INSERT OR REPLACE INTO job_locks (name, owner, heartbeat) VALUES (?, ?, ?)",
+                (name, owner, now)
+            )
+            return True
+
+        try:
+            return self._write(write)
+        except sqlite3.OperationalError:
+            return False
+
+    def release_job_lock(self, name: str, owner: str):
+        self._write(lambda cursor: cursor.execute(
+            "DELETE FROM job_locks WHERE name = ? AND owner = ?", (name, owner)))
+
+    def _insert_traffic_rows(self, cursor, records: list):
         cursor.executemany("""
             INSERT INTO traffic_data 
             (timestamp, location, vehicle_count, condition, speed_kmh, 
@@ -82,43 +482,190 @@ class TrafficDatabase:
             (:timestamp, :location, :vehicle_count, :condition, :speed_kmh,
              :hour, :is_peak, :rain_factor, :data_source)
         """, records)
+        first_id = self._first_inserted_id(cursor, len(records))
+        self._upsert_latest(cursor, "traffic_latest", TRAFFIC_LATEST_COLUMNS, records, first_id)
+        apply_to_cube(cursor, records)
+        apply_to_sketches(cursor, records)
+        apply_to_events(cursor, records)
+        self._add_row_counts(cursor, "traffic_data", records)
+        self._bump_version(cursor, "traffic_data")
 
-        conn.commit()
-        conn.close()
-        print(f"✅ Inserted {len(records)} traffic records")
-
-    def insert_weather_data(self, record: dict):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        rows = [dict(record, id=first_id + offset) for offset, record in enumerate(records)]
+        after_commit(lambda: self.topn_index.observe(rows))
+        return first_id
 
-        cursor.execute("""
+    def _insert_weather_rows(self, cursor, records: list):
+        cursor.executemany("""
             INSERT INTO weather_data 
             (timestamp, location, temperature, precipitation, windspeed,
              weather_code, weather_desc, rain_category)
             VALUES 
             (:timestamp, :location, :temperature, :precipitation, :windspeed,
              :weather_code, :weather_desc, :rain_category)
-        """, record)
+        """, records)
+        first_id = self._first_inserted_id(cursor, len(records))
+        self._upsert_latest(cursor, "weather_latest", WEATHER_LATEST_COLUMNS, records, first_id)
+        self._add_row_counts(cursor, "weather_data", records)
+        self._bump_version(cursor, "weather_data")
+        return first_id
 
-        conn.commit()
-        conn.close()
+    def _add_row_counts(self, cursor, table: str, records: list):
+        counts = {}
+        for record in records:
+            counts[record["location"]] = counts.get(record["location"], 0) + 1
+        self._write_row_counts(cursor, table, counts)
+
+    def _write_row_counts(self, cursor, table: str, counts: dict):
+        cursor.executemany("""
+            INSERT INTO row_counts (table_name, location, row_count) VALUES (?, ?, ?)
+            ON CONFLICT(table_name, location) DO UPDATE SET row_count = row_count + excluded.row_count
+        """, [(table, location, count) for location, count in counts.items()])
+
+    def _rebuild_row_counts(self, cursor):
+        cursor.execute("DELETE FROM row_counts")
+        for table in ("traffic_data", "weather_data"):
+            cursor.execute(f"""
+                INSERT INTO row_counts (table_name, location, row_count)
+                SELECT '{table}', location, COUNT(*) FROM {table} GROUP BY location
+            """)
+
+    def _first_inserted_id(self, cursor, count: int) -> int:
+        # Hanya ada satu writer, jadi id dari satu executemany selalu berurutan.
+        cursor.execute("SELECT last_insert_rowid() AS last_id")
+        return cursor.fetchone()["last_id"] - count + 1
+
+    def _upsert_latest(self, cursor, table: str, columns: tuple, records: list, first_id: int):
+        latest = {}
+        for offset, record in enumerate(records):
+            current = latest.get(record["location"])
+            if current is None or record["timestamp"] >= current[1]["timestamp"]:
+                latest[record["location"]] = (first_id + offset, record)
+
+        self._write_latest(cursor, table, columns, [
+            dict(record, id=row_id) for row_id, record in latest.values()
+        ])
+
+    def _write_latest(self, cursor, table: str, columns: tuple, records: list):
+        rows = [tuple(record.get(col) for col in columns) for record in records]
+        updates = ", ".join(f"{col} = excluded.{col}" for col in columns if col != "location")
+        cursor.executemany(f"""
+            INSERT INTO {table} ({", ".join(columns)})
+            VALUES ({", ".join("?" for _ in columns)})
+            ON CONFLICT(location) DO UPDATE SET {updates}
+            WHERE excluded.timestamp >= {table}.timestamp
+        """, rows)
+
+    def _rebuild_latest(self, cursor, source: str, table: str, columns: tuple):
+        column_list = ", ".join(columns)
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"""
+            INSERT INTO {table} ({column_list})
+            SELECT {column_list} FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY location ORDER BY timestamp DESC, id DESC
+                ) AS rn
+                FROM {source}
+            )
+            WHERE rn = 1
+        """)
+
+    def rebuild_congestion_events(self) -> int:
+        def write(cursor):
+            total = rebuild_events(cursor)
+            self._bump_version(cursor, "traffic_data")
+            return total
+
+        total = self._write(write)
+        print(f"🔴 {total:,} episode kemacetan terdeteksi")
+        return total
 
     def insert_analysis(self, record: dict):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        def write(cursor):
+            cursor.execute("""
+                INSERT INTO traffic_analysis 
+                (analysis_date, location, avg_vehicles, max_vehicles, min_vehicles,
+                 avg_speed, peak_hour, rain_correlation, total_records)
+                VALUES 
+                (:analysis_date, :location, :avg_vehicles, :max_vehicles, :min_vehicles,
+                 :avg_speed, :peak_hour, :rain_correlation, :total_records)
+            """, record)
+            self._bump_version(cursor, "traffic_analysis")
 
-        cursor.execute("""
-            INSERT INTO traffic_analysis 
-            (analysis_date, location, avg_vehicles, max_vehicles, min_vehicles,
-             avg_speed, peak_hour, rain_correlation, total_records)
-            VALUES 
-            (:analysis_date, :location, :avg_vehicles, :max_vehicles, :min_vehicles,
-             :avg_speed, :peak_hour, :rain_correlation, :total_records)
-        """, record)
+        self._write(write)
+
+    def _bump_version(self, cursor, table_name: str):
+        cursor.execute(
+            "UPDATE data_version SET version = version + 1 WHERE table_name = ?",
+            (table_name,)
+        )
+
+    def _publish_state(self, cursor):
+        cursor.execute("SELECT table_name, version FROM data_version")
+        versions = {row["table_name"]: row["version"] for row in cursor.fetchall()}
+
+        latest = {}
+        for table in ("traffic_latest", "weather_latest"):
+            try:
+                cursor.execute(f"SELECT * FROM {table} ORDER BY location")
+                latest[table] = [dict(row) for row in cursor.fetchall()]
+            except sqlite3.OperationalError:
+                latest[table] = []
+
+        with _versions_lock:
+            _data_versions[self.db_path] = versions
+            _versions_checked[self.db_path] = time.monotonic()
+            _latest_state[self.db_path] = latest
+
+    def _get_latest_state(self, table: str) -> list:
+        # Cek versi yang sama (dengan TTL) memuat ulang mirror kalau ada
+        # write dari proses lain.
+        with _versions_lock:
+            loaded = self.db_path in _latest_state
+        self.get_data_version(refresh=not loaded)
+        with _versions_lock:
+            state = _latest_state.get(self.db_path, {})
+        return state.get(table, [])
+
+    def get_current_traffic(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            self._get_latest_state("traffic_latest"),
+            columns=list(TRAFFIC_LATEST_COLUMNS),
+        )
+
+    def get_data_version(self, refresh: bool = False) -> dict:
+        # Versi disimpan di memori proses setelah setiap write, jadi pembacaan
+        # berulang (mis. tiap rerun Streamlit) tidak menyentuh database. Write
+        # dari proses lain (ingestion CLI, backfill cuaca, worker Streamlit
+        # lain) terlihat lewat cek ulang tabel data_version tiap TTL.
+        with _versions_lock:
+            versions = _data_versions.get(self.db_path)
+            checked = _versions_checked.get(self.db_path, 0.0)
+        if versions is not None and not refresh and time.monotonic() - checked < DATA_VERSION_TTL_SECONDS:
+            return dict(versions)
 
-        conn.commit()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT table_name, version FROM data_version")
+            current = {row["table_name"]: row["version"] for row in cursor.fetchall()}
+            if current == versions and not refresh:
+                with _versions_lock:
+                    _versions_checked[self.db_path] = time.monotonic()
+                conn.close()
+                return dict(versions)
+            self._publish_state(cursor)
+        except sqlite3.OperationalError:
+            conn.close()
+            return {name: 0 for name in VERSIONED_TABLES}
         conn.close()
 
+        # Index top-N hanya diisi oleh commit proses ini; kalau traffic_data
+        # berubah dari luar, index dimuat ulang dari database.
+        if versions is not None and current.get("traffic_data") != versions.get("traffic_data"):
+            self.topn_index.reset()
+        with _versions_lock:
+            return dict(_data_versions[self.db_path])
+
     def get_all_traffic_data(self) -> pd.DataFrame:
         conn = self.get_connection()
         df = pd.read_sql_query("SELECT * FROM traffic_data ORDER BY timestamp DESC", conn)
@@ -162,32 +709,112 @@ class TrafficDatabase:
         return df
 
     def get_latest_weather(self) -> pd.DataFrame:
+        df = pd.DataFrame(
+            self._get_latest_state("weather_latest"),
+            columns=list(WEATHER_LATEST_COLUMNS),
+        )
+        return df[["id", "timestamp", "location", "temperature", "precipitation", "windspeed",
+                   "weather_code", "weather_desc", "rain_category"]]
+
+    def get_top_traffic_rows(self, since: str, location: str = None, limit: int = 50) -> list:
         conn = self.get_connection()
-        df = pd.read_sql_query("""
-            SELECT * FROM weather_data 
-            WHERE id IN (
-                SELECT MAX(id) FROM weather_data GROUP BY location
-            )
-            ORDER BY location
-        """, conn)
+        cursor = conn.cursor()
+        query = f"SELECT {', '.join(TOPN_COLUMNS)} FROM traffic_data WHERE timestamp >= ?"
+        params = [since]
+        if location:
+            query += " AND location = ?"
+            params.append(location)
+        cursor.execute(query + " ORDER BY vehicle_count DESC, id DESC LIMIT ?", params + [limit])
+        rows = [dict(row) for row in cursor.fetchall()]
         conn.close()
-        return df
+        return rows
 
-    def get_traffic_count(self) -> int:
+    def get_top_congestion(self, window: str = "all", location: str = None, top_n: int = 10) -> list:
+        return self.topn_index.top(window, location, top_n, loader=self.get_top_traffic_rows)
+
+    def _get_row_count(self, table: str, location: str = None) -> int:
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) as total FROM traffic_data")
+        query = "SELECT COALESCE(SUM(row_count), 0) AS total FROM row_counts WHERE table_name = ?"
+        params = [table]
+        if location:
+            query += " AND location = ?"
+            params.append(location)
+        cursor.execute(query, params)
         result = cursor.fetchone()
         conn.close()
         return result["total"]
 
-    def get_weather_count(self) -> int:
+    def get_traffic_count(self, location: str = None) -> int:
+        return self._get_row_count("traffic_data", location)
+
+    def get_weather_count(self, location: str = None) -> int:
+        return self._get_row_count("weather_data", location)
+
+    def _get_page(self, table: str, location: str = None, start: str = None, end: str = None,
+                  after: tuple = None, limit: int = 100) -> tuple:
+        # Keyset pagination: halaman berikutnya dimulai tepat setelah
+        # (timestamp, id) baris terakhir, jadi biayanya tidak bergantung
+        # pada seberapa jauh user menggulir ke belakang.
+        query = f"SELECT * FROM {table} WHERE 1 = 1"
+        params = []
+        if location:
+            query += " AND location = ?"
+            params.append(location)
+        if start:
+            query += " AND timestamp >= ?"
+            params.append(start)
+        if end:
+            query += " AND timestamp <= ?"
+            params.append(end)
+        if after is not None:
+            query += " AND timestamp <= ? AND (timestamp < ? OR id < ?)"
+            params.extend([after[0], after[0], after[1]])
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
         conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) as total FROM weather_data")
-        result = cursor.fetchone()
+        df = pd.read_sql_query(query, conn, params=params)
         conn.close()
-        return result["total"]
+
+        next_cursor = None
+        if len(df) > limit:
+            df = df.iloc[:limit]
+            last = df.iloc[-1]
+            next_cursor = (last["timestamp"], int(last["id"]))
+        return df, next_cursor
+
+    def get_traffic_page(self, location: str = None, start: str = None, end: str = None,
+                         after: tuple = None, limit: int = 100) -> tuple:
+        return self._get_page("traffic_data", location, start, end, after, limit)
+
+    def get_weather_page(self, location: str = None, start: str = None, end: str = None,
+                         after: tuple = None, limit: int = 100) -> tuple:
+        return self._get_page("weather_data", location, start, end, after, limit)
+
+    def iter_pages(self, table: str, location: str = None, start: str = None, end: str = None,
+                   chunksize: int = 10000):
+        # Ekspor penuh tanpa memuat seluruh tabel sekaligus: halaman keyset
+        # berurutan, halaman pertama selalu dikirim (walau kosong) untuk header.
+        if table not in ("traffic_data", "weather_data"):
+            raise ValueError(f"Tabel tidak dikenal: {table}")
+        after = None
+        while True:
+            df, after = self._get_page(table, location, start, end, after, chunksize)
+            yield df
+            if after is None:
+                break
+
+    def get_changes_since(self, last_id: int = 0, limit: int = 5000) -> pd.DataFrame:
+        # Change feed: id traffic_data selalu naik (AUTOINCREMENT, satu writer),
+        # jadi "baris baru sejak id X" cukup range scan di primary key.
+        conn = self.get_connection()
+        df = pd.read_sql_query(
+            "SELECT * FROM traffic_data WHERE id > ? ORDER BY id LIMIT ?",
+            conn, params=(int(last_id), limit)
+        )
+        conn.close()
+        return df
 
     def get_hourly_avg(self, location: str = None) -> pd.DataFrame:
         conn = self.get_connection()
@@ -209,11 +836,20 @@ class TrafficDatabase:
         return df
 
     def clear_all_data(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM traffic_data")
-        cursor.execute("DELETE FROM weather_data")
-        cursor.execute("DELETE FROM traffic_analysis")
-        conn.commit()
-        conn.close()
+        def write(cursor):
+            cursor.execute("DELETE FROM traffic_data")
+            cursor.execute("DELETE FROM weather_data")
+            cursor.execute("DELETE FROM traffic_analysis")
+            cursor.execute("DELETE FROM traffic_latest")
+            cursor.execute("DELETE FROM traffic_cube")
+            cursor.execute("DELETE FROM traffic_sketches")
+            cursor.execute("DELETE FROM congestion_events")
+            cursor.execute("DELETE FROM congestion_state")
+            cursor.execute("DELETE FROM weather_latest")
+            cursor.execute("DELETE FROM row_counts")
+            after_commit(self.topn_index.reset)
+            for name in VERSIONED_TABLES:
+                self._bump_version(cursor, name)
+
+        self._write(write)
         print("🗑️  All data cleared!")
\ No newline at end of file
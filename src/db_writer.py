@@ -0,0 +1,126 @@
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+_writers = {}
+_writers_lock = threading.Lock()
+_job_context = threading.local()
+
+
+def after_commit(callback):
+    callbacks = getattr(_job_context, "callbacks", None)
+    if callbacks is None:
+        raise RuntimeError("after_commit hanya bisa dipanggil dari dalam write job")
+    callbacks.append(callback)
+
+
+class SQLiteWriter:
+    def __init__(self, db_path: str, on_commit=None, max_group: int = 256):
+        self.db_path = db_path
+        self.on_commit = on_commit
+        self.max_group = max_group
+        self._queue = queue.Queue()
+        self.stats = {"jobs": 0, "commits": 0, "failed_jobs": 0}
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn) -> Future:
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def execute(self, fn):
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Write job tidak boleh menunggu write job lain di thread writer")
+        return self.submit(fn).result()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run(self):
+        conn = None
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < self.max_group:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            jobs = [(fn, future) for fn, future in jobs if future.set_running_or_notify_cancel()]
+            if not jobs:
+                continue
+
+            try:
+                if conn is None:
+                    conn = self._connect()
+                self._commit_group(conn, jobs)
+            except Exception as e:
+                if conn is not None:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    conn.close()
+                    conn = None
+                for _, future in jobs:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit_group(self, conn, jobs: list):
+        # Semua job yang sedang antre digabung ke satu transaksi (group commit).
+        # Tiap job dibungkus SAVEPOINT supaya job yang gagal tidak ikut
+        # membatalkan job lain dalam grup yang sama.
+        cursor = conn.cursor()
+        results = []
+        callbacks = []
+
+        cursor.execute("BEGIN IMMEDIATE")
+        for fn, _ in jobs:
+            cursor.execute("SAVEPOINT write_job")
+            _job_context.callbacks = []
+            try:
+                results.append((True, fn(cursor)))
+                cursor.execute("RELEASE write_job")
+                callbacks.extend(_job_context.callbacks)
+            except Exception as e:
+                cursor.execute("ROLLBACK TO write_job")
+                cursor.execute("RELEASE write_job")
+                results.append((False, e))
+            finally:
+                _job_context.callbacks = None
+        cursor.execute("COMMIT")
+
+        self.stats["commits"] += 1
+        self.stats["jobs"] += len(jobs)
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️  Callback setelah commit gagal: {e}")
+
+        if self.on_commit is not None:
+            try:
+                self.on_commit(cursor)
+            except Exception as e:
+                print(f"⚠️  Hook setelah commit gagal: {e}")
+
+        for (ok, value), (_, future) in zip(results, jobs):
+            if ok:
+                future.set_result(value)
+            else:
+                self.stats["failed_jobs"] += 1
+                future.set_exception(value)
+
+
+def get_writer(db_path: str, on_commit=None) -> SQLiteWriter:
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = SQLiteWriter(db_path, on_commit=on_commit)
+            _writers[db_path] = writer
+        return writer
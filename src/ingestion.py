@@ -0,0 +1,285 @@
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from config import LOCATIONS
+from database import TrafficDatabase
+from traffic_rules import get_traffic_condition, is_peak_hour
+
+_STOP = object()
+
+# Timestamp tersimpan sebagai waktu lokal Jakarta (WIB, tanpa DST).
+LOCAL_TIMEZONE = timezone(timedelta(hours=7), "WIB")
+MAX_FUTURE_SKEW = timedelta(minutes=10)
+
+
+class _IngestionServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class TrafficIngestor:
+    def __init__(self, db: TrafficDatabase = None, batch_size: int = 2000,
+                 flush_interval: float = 1.0, max_pending: int = 20000,
+                 data_source: str = "sensor_feed", allowed_locations=tuple(LOCATIONS)):
+        self.db = db or TrafficDatabase()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.data_source = data_source
+        self.allowed_locations = set(allowed_locations) if allowed_locations else None
+
+        # Queue dibatasi: kalau writer tertinggal, put() akan menunggu
+        # sehingga producer ikut melambat (backpressure).
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self.stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "written": 0,
+            "batches": 0,
+            "write_errors": 0,
+            "backpressure_waits": 0,
+        }
+        self._started_at = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._writer_loop, name="ingestion-writer", daemon=True)
+        self._thread.start()
+
+    def close(self) -> dict:
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        return self.summary()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def validate(self, raw: dict) -> dict:
+        try:
+            location = str(raw["location"]).strip()
+            if not location:
+                return None
+            if self.allowed_locations is not None and location not in self.allowed_locations:
+                return None
+
+            moment = raw["timestamp"]
+            if not isinstance(moment, datetime):
+                moment = datetime.fromisoformat(str(moment).strip().replace("Z", "+00:00"))
+            if moment.tzinfo is not None:
+                moment = moment.astimezone(LOCAL_TIMEZONE)
+            moment = moment.replace(tzinfo=None, microsecond=0)
+            if moment > datetime.now() + MAX_FUTURE_SKEW:
+                return None
+
+            vehicles = float(raw["vehicle_count"])
+            if not math.isfinite(vehicles) or vehicles < 0:
+                return None
+            vehicles = int(vehicles)
+
+            speed = raw.get("speed_kmh")
+            speed = round(float(speed), 1) if speed not in (None, "") else None
+            if speed is not None and (not math.isfinite(speed) or speed < 0):
+                return None
+
+            rain_factor = raw.get("rain_factor")
+            rain_factor = float(rain_factor) if rain_factor not in (None, "") else 1.0
+            if not math.isfinite(rain_factor) or rain_factor <= 0:
+                return None
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return None
+
+        hour = moment.hour
+        return {
+            "timestamp": moment.strftime("%Y-%m-%d %H:%M:%S"),
+            "location": location,
+            "vehicle_count": vehicles,
+            "condition": get_traffic_condition(vehicles),
+            "speed_kmh": speed,
+            "hour": hour,
+            "is_peak": 1 if is_peak_hour(hour) else 0,
+            "rain_factor": rain_factor,
+            "data_source": raw.get("data_source") or self.data_source,
+        }
+
+    def submit(self, raw: dict) -> bool:
+        record = self.validate(raw)
+        if record is None:
+            self._count("rejected")
+            return False
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("backpressure_waits")
+            self._queue.put(record)
+        self._count("accepted")
+        return True
+
+    def submit_many(self, records) -> int:
+        accepted = 0
+        for raw in records:
+            if raw is None:
+                self._count("rejected")
+            elif self.submit(raw):
+                accepted += 1
+        return accepted
+
+    def _write(self, batch: list):
+        try:
+            self.db.insert_traffic_data(batch)
+            self._count("written", len(batch))
+            self._count("batches")
+        except Exception as e:
+            print(f"❌ Gagal menulis batch ingestion ({len(batch)} baris): {e}")
+            self._count("write_errors", len(batch))
+
+    def _writer_loop(self):
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                if batch:
+                    self._write(batch)
+                return
+
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+    def summary(self) -> dict:
+        with self._stats_lock:
+            result = dict(self.stats)
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        result["elapsed_sec"] = round(elapsed, 3)
+        result["records_per_sec"] = round(result["written"] / elapsed, 1) if elapsed > 0 else 0.0
+        result["pending"] = self._queue.qsize()
+        return result
+
+    def ingest_stream(self, stream, fmt: str = "jsonl") -> int:
+        if fmt == "csv":
+            return self.submit_many(iter_csv(stream))
+        return self.submit_many(iter_jsonl(stream))
+
+    def ingest_file(self, path: str, fmt: str = None) -> int:
+        fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return self.ingest_stream(f, fmt)
+
+    def serve_socket(self, host: str = "127.0.0.1", port: int = 9009):
+        ingestor = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                reader = io.TextIOWrapper(self.rfile, encoding="utf-8")
+                accepted = ingestor.ingest_stream(reader, "jsonl")
+                self.wfile.write(f"{accepted}\n".encode())
+
+        server = _IngestionServer((host, port), _Handler)
+        print(f"🔌 Ingestion socket aktif di {host}:{port} (JSON Lines)")
+        return server
+
+
+def iter_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+            continue
+        yield item if isinstance(item, dict) else None
+
+
+def iter_csv(stream):
+    for row in csv.DictReader(stream):
+        yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion data traffic dari sensor eksternal")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", nargs="+", help="File JSON Lines (.jsonl) atau CSV (.csv)")
+    source.add_argument("--stdin", action="store_true", help="Baca dari stdin")
+    source.add_argument("--listen", type=int, metavar="PORT", help="Terima JSON Lines via socket TCP lokal")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    parser.add_argument("--max-pending", type=int, default=20000)
+    parser.add_argument("--any-location", action="store_true",
+                        help="Terima lokasi di luar daftar LOCATIONS")
+    args = parser.parse_args()
+
+    db = TrafficDatabase()
+    db.init_tables()
+    ingestor = TrafficIngestor(
+        db=db,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        max_pending=args.max_pending,
+        allowed_locations=None if args.any_location else tuple(LOCATIONS),
+    )
+    ingestor.start()
+
+    try:
+        if args.file:
+            for path in args.file:
+                if not os.path.exists(path):
+                    print(f"❌ File tidak ditemukan: {path}")
+                    continue
+                ingestor.ingest_file(path, args.format)
+        elif args.stdin:
+            ingestor.ingest_stream(sys.stdin, args.format or "jsonl")
+        else:
+            server = ingestor.serve_socket(port=args.listen)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                server.server_close()
+    finally:
+        summary = ingestor.close()
+
+    print("─" * 40)
+    print(f"✅ Diterima: {summary['accepted']:,} | Ditolak: {summary['rejected']:,} | "
+          f"Ditulis: {summary['written']:,} dalam {summary['batches']} batch")
+    print(f"⚡ Throughput: {summary['records_per_sec']:,} records/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import pandas as pd
+from topn_index import TOPN_COLUMNS
+
+STATUS_COLUMNS = ["location", "vehicle_count", "condition", "speed_kmh", "rain_factor", "timestamp"]
+TOP_COLUMNS = ["timestamp", "location", "vehicle_count", "condition", "speed_kmh", "rain_factor"]
+
+
+class LiveDashboardState:
+    def __init__(self, db, top_n: int = 10, feed_limit: int = 5000):
+        self.db = db
+        self.top_n = top_n
+        self.feed_limit = feed_limit
+        self.last_id = 0
+        self.status = {}
+        self.hourly = {hour: [0, 0.0] for hour in range(24)}
+        self.totals = {"records": 0, "vehicles_sum": 0.0, "vehicles_max": None,
+                       "speed_count": 0, "speed_sum": 0.0}
+        self.locations = set()
+        self.top = {}
+
+    def bootstrap(self):
+        # Semua state awal dibaca dalam satu transaksi baca, jadi snapshot
+        # cube/latest/top-N konsisten dengan last_id dan change feed
+        # berikutnya tidak menghitung baris yang sama dua kali.
+        conn = self.db.get_connection()
+        try:
+            conn.execute("BEGIN")
+            self.last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM traffic_data").fetchone()[0]
+
+            for row in conn.execute("""
+                SELECT hour, SUM(record_count) AS records, SUM(vehicles_sum) AS vehicles_sum
+                FROM traffic_cube GROUP BY hour
+            """):
+                self.hourly[row["hour"]] = [row["records"], row["vehicles_sum"]]
+
+            row = conn.execute("""
+                SELECT
+                    COALESCE(SUM(record_count), 0) AS records,
+                    COALESCE(SUM(vehicles_sum), 0) AS vehicles_sum,
+                    MAX(vehicles_max) AS vehicles_max,
+                    COALESCE(SUM(speed_count), 0) AS speed_count,
+                    COALESCE(SUM(speed_sum), 0) AS speed_sum
+                FROM traffic_cube
+            """).fetchone()
+            self.totals = dict(row)
+            self.locations = {row["location"] for row in
+                              conn.execute("SELECT DISTINCT location FROM traffic_cube")}
+
+            self.status = {row["location"]: dict(row) for row in
+                           conn.execute("SELECT * FROM traffic_latest")}
+
+            columns = ", ".join(TOPN_COLUMNS)
+            self.top = {None: [dict(row) for row in conn.execute(
+                f"SELECT {columns} FROM traffic_data ORDER BY vehicle_count DESC, id DESC LIMIT ?",
+                (self.top_n,))]}
+            for location in self.locations:
+                self.top[location] = [dict(row) for row in conn.execute(
+                    f"SELECT {columns} FROM traffic_data WHERE location = ? "
+                    f"ORDER BY vehicle_count DESC, id DESC LIMIT ?",
+                    (location, self.top_n))]
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def apply(self, rows: list):
+        touched = set()
+        for row in rows:
+            self.last_id = max(self.last_id, row["id"])
+            location = row["location"]
+            vehicles = row["vehicle_count"]
+
+            current = self.status.get(location)
+            if current is None or (row["timestamp"], row["id"]) >= (current["timestamp"], current["id"]):
+                self.status[location] = row
+
+            hourly = self.hourly[int(row["hour"])]
+            hourly[0] += 1
+            hourly[1] += vehicles
+
+            self.totals["records"] += 1
+            self.totals["vehicles_sum"] += vehicles
+            if self.totals["vehicles_max"] is None or vehicles > self.totals["vehicles_max"]:
+                self.totals["vehicles_max"] = vehicles
+            if row["speed_kmh"] is not None and not pd.isna(row["speed_kmh"]):
+                self.totals["speed_count"] += 1
+                self.totals["speed_sum"] += row["speed_kmh"]
+            self.locations.add(location)
+
+            for key in (None, location):
+                self.top.setdefault(key, []).append(row)
+                touched.add(key)
+
+        for key in touched:
+            ranked = sorted(self.top[key], key=lambda r: (r["vehicle_count"], r["id"]), reverse=True)
+            self.top[key] = ranked[:self.top_n]
+
+    def refresh(self) -> int:
+        applied = 0
+        while True:
+            changes = self.db.get_changes_since(self.last_id, self.feed_limit)
+            if changes.empty:
+                break
+            self.apply(changes.to_dict("records"))
+            applied += len(changes)
+            if len(changes) < self.feed_limit:
+                break
+        return applied
+
+    def stats(self) -> dict:
+        totals = self.totals
+        if not totals["records"]:
+            return {"error": "Tidak ada data"}
+        return {
+            "total_records": int(totals["records"]),
+            "total_locations": len(self.locations),
+            "avg_vehicles": round(totals["vehicles_sum"] / totals["records"], 1),
+            "max_vehicles": int(totals["vehicles_max"]),
+            "avg_speed": round(totals["speed_sum"] / totals["speed_count"], 1) if totals["speed_count"] else 0.0,
+        }
+
+    def status_frame(self) -> pd.DataFrame:
+        if not self.status:
+            return pd.DataFrame()
+        rows = [self.status[location] for location in sorted(self.status)]
+        return pd.DataFrame(rows)[STATUS_COLUMNS]
+
+    def hourly_frame(self) -> pd.DataFrame:
+        rows = [
+            {"hour": hour, "avg_vehicles": round(total / count, 1), "count": count}
+            for hour, (count, total) in sorted(self.hourly.items()) if count
+        ]
+        return pd.DataFrame(rows)
+
+    def top_frame(self, location: str = None) -> pd.DataFrame:
+        rows = self.top.get(location) or []
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows)[TOP_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,182 @@
+import math
+from datetime import datetime
+import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
+from config import (
+    LOCATIONS,
+    VEHICLE_PATTERN,
+    RAIN_IMPACT,
+    TRAFFIC_THRESHOLDS,
+    PEAK_MORNING,
+    PEAK_EVENING,
+    NETWORK_NEIGHBOURS,
+    NETWORK_SPILL_RATE,
+    NETWORK_RETAIN_RATE,
+)
+
+KM_PER_DEG_LAT = 110.57
+KM_PER_DEG_LON = 111.32
+
+CONDITION_LABELS = list(TRAFFIC_THRESHOLDS)
+CONDITION_LOWER = np.array([low for low, _ in TRAFFIC_THRESHOLDS.values()])
+CAPACITY_VEHICLES = TRAFFIC_THRESHOLDS["Macet"][0]
+
+
+def _project(coords: np.ndarray) -> np.ndarray:
+    lat0 = math.radians(float(np.mean(coords[:, 0])))
+    return np.column_stack([
+        coords[:, 0] * KM_PER_DEG_LAT,
+        coords[:, 1] * KM_PER_DEG_LON * math.cos(lat0),
+    ])
+
+
+class RoadNetwork:
+    def __init__(self, names: list, coords: np.ndarray, adjacency):
+        self.names = list(names)
+        self.coords = np.asarray(coords, dtype=float)
+        self.adjacency = sparse.csr_matrix(adjacency, dtype=float)
+
+        # Bobot keluar tiap node dinormalisasi (baris = 1), jadi limpahan
+        # dari satu node dibagi ke tetangganya tanpa menambah kendaraan.
+        out_weight = np.asarray(self.adjacency.sum(axis=1)).ravel()
+        scale = np.divide(1.0, out_weight, out=np.zeros_like(out_weight), where=out_weight > 0)
+        self.transition = (sparse.diags(scale) @ self.adjacency).T.tocsr()
+        self.regions = self._nearest_regions()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _nearest_regions(self) -> list:
+        # Node di luar LOCATIONS (segmen jalan) ikut cuaca wilayah terdekat.
+        regions = list(LOCATIONS)
+        region_coords = np.array([(LOCATIONS[r]["lat"], LOCATIONS[r]["lon"]) for r in regions])
+        _, nearest = cKDTree(region_coords).query(self.coords)
+        return [name if name in LOCATIONS else regions[i] for name, i in zip(self.names, nearest)]
+
+    @classmethod
+    def from_coordinates(cls, names: list, coords, k: int = NETWORK_NEIGHBOURS,
+                         scale_km: float = 5.0) -> "RoadNetwork":
+        coords = np.asarray(coords, dtype=float)
+        n = len(coords)
+        k = min(k, n - 1)
+        if k < 1:
+            return cls(names, coords, sparse.csr_matrix((n, n)))
+
+        distances, neighbours = cKDTree(_project(coords)).query(_project(coords), k=k + 1)
+        rows = np.repeat(np.arange(n), k)
+        cols = neighbours[:, 1:].ravel()
+        weights = np.exp(-distances[:, 1:].ravel() / scale_km)
+
+        adjacency = sparse.coo_matrix((weights, (rows, cols)), shape=(n, n)).tocsr()
+        return cls(names, coords, adjacency.maximum(adjacency.T))
+
+    @classmethod
+    def from_locations(cls, locations: dict = None, k: int = NETWORK_NEIGHBOURS,
+                       scale_km: float = 5.0) -> "RoadNetwork":
+        locations = locations or LOCATIONS
+        names = list(locations)
+        coords = [(locations[name]["lat"], locations[name]["lon"]) for name in names]
+        return cls.from_coordinates(names, coords, k, scale_km)
+
+    @classmethod
+    def from_edges(cls, names: list, edges: list, coords=None, directed: bool = False) -> "RoadNetwork":
+        index = {name: i for i, name in enumerate(names)}
+        rows, cols, weights = [], [], []
+        for edge in edges:
+            a, b = index[edge[0]], index[edge[1]]
+            weight = float(edge[2]) if len(edge) > 2 else 1.0
+            rows.append(a)
+            cols.append(b)
+            weights.append(weight)
+            if not directed:
+                rows.append(b)
+                cols.append(a)
+                weights.append(weight)
+
+        n = len(names)
+        adjacency = sparse.coo_matrix((weights, (rows, cols)), shape=(n, n)).tocsr()
+        if coords is None:
+            # Tanpa koordinat: node LOCATIONS pakai posisinya, sisanya titik
+            # tengah kota (cuaca ikut wilayah terdekat dari titik itu).
+            centre = np.mean([(loc["lat"], loc["lon"]) for loc in LOCATIONS.values()], axis=0)
+            coords = [(LOCATIONS[name]["lat"], LOCATIONS[name]["lon"]) if name in LOCATIONS else centre
+                      for name in names]
+        return cls(names, coords, adjacency)
+
+    @classmethod
+    def synthetic(cls, nodes: int, k: int = 4, seed: int = 0) -> "RoadNetwork":
+        rng = np.random.default_rng(seed)
+        lats = [loc["lat"] for loc in LOCATIONS.values()]
+        lons = [loc["lon"] for loc in LOCATIONS.values()]
+        coords = np.column_stack([
+            rng.uniform(min(lats) - 0.05, max(lats) + 0.05, nodes),
+            rng.uniform(min(lons) - 0.05, max(lons) + 0.05, nodes),
+        ])
+        names = [f"segmen-{i}" for i in range(nodes)]
+        return cls.from_coordinates(names, coords, k, scale_km=1.0)
+
+
+class NetworkSimulator:
+    def __init__(self, network: RoadNetwork, spill_rate: float = NETWORK_SPILL_RATE,
+                 retain_rate: float = NETWORK_RETAIN_RATE,
+                 capacity: float = CAPACITY_VEHICLES, seed: int = None):
+        if spill_rate + retain_rate >= 1:
+            raise ValueError("spill_rate + retain_rate harus < 1 supaya antrian tidak tumbuh tanpa batas")
+        self.network = network
+        self.spill_rate = spill_rate
+        self.retain_rate = retain_rate
+        self.capacity = np.broadcast_to(np.asarray(capacity, dtype=float), (len(network),))
+        self.rng = np.random.default_rng(seed)
+        self.excess = np.zeros(len(network))
+
+    def rain_factors(self, rain_categories: dict = None) -> np.ndarray:
+        rain_categories = rain_categories or {}
+        by_region = {region: RAIN_IMPACT.get(rain_categories.get(region) or "none", 1.0)
+                     for region in LOCATIONS}
+        return np.array([by_region[region] for region in self.network.regions])
+
+    def tick(self, hour: int, rain_factor=1.0) -> dict:
+        n = len(self.network)
+        rain_factor = np.broadcast_to(np.asarray(rain_factor, dtype=float), (n,))
+
+        # Faktor dasar sama dengan TrafficEngine.simulate_location: pola jam,
+        # variasi lokasi 0.8-1.2, lalu dikali faktor hujan.
+        demand = VEHICLE_PATTERN.get(hour, 100) * self.rng.uniform(0.8, 1.2, n) * rain_factor
+
+        spillover = self.network.transition @ (self.spill_rate * self.excess)
+        load = demand + self.retain_rate * self.excess + spillover
+        self.excess = np.maximum(0.0, load - self.capacity)
+
+        vehicles = load.astype(int)
+        speed = (60.0 - vehicles / 10.0) / rain_factor + self.rng.uniform(-3, 3, n)
+        speed = np.round(np.clip(speed, 5.0, 60.0), 1)
+        condition = np.searchsorted(CONDITION_LOWER, vehicles, side="right") - 1
+
+        return {
+            "vehicles": vehicles,
+            "speed": speed,
+            "condition": condition,
+            "spillover": spillover,
+            "rain_factor": rain_factor,
+        }
+
+    def records(self, result: dict, now: datetime = None, data_source: str = "network_simulated") -> list:
+        now = now or datetime.now()
+        hour = now.hour
+        is_peak = int(PEAK_MORNING["start"] <= hour < PEAK_MORNING["end"]
+                      or PEAK_EVENING["start"] <= hour < PEAK_EVENING["end"])
+        return [
+            {
+                "timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
+                "location": name,
+                "vehicle_count": int(result["vehicles"][i]),
+                "condition": CONDITION_LABELS[result["condition"][i]],
+                "speed_kmh": float(result["speed"][i]),
+                "hour": hour,
+                "is_peak": is_peak,
+                "rain_factor": float(result["rain_factor"][i]),
+                "data_source": data_source,
+            }
+            for i, name in enumerate(self.network.names)
+        ]
@@ -0,0 +1,259 @@
+import math
+import multiprocessing
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+import pandas as pd
+from aggregate_cube import rain_vehicle_correlation, sample_std
+
+PARTITION_GROUPS = {
+    None: "''",
+    "location": "location",
+    "hour": "hour",
+    "day": "substr(timestamp, 1, 10)",
+}
+
+# (nama, cara merge) — urutan sama dengan kolom hasil query partisi.
+PARTIAL_MEASURES = (
+    ("record_count", "sum"),
+    ("vehicles_sum", "sum"),
+    ("vehicles_sumsq", "sum"),
+    ("vehicles_min", "min"),
+    ("vehicles_max", "max"),
+    ("speed_count", "sum"),
+    ("speed_sum", "sum"),
+    ("speed_sumsq", "sum"),
+    ("speed_min", "min"),
+    ("speed_max", "max"),
+    ("rain_sum", "sum"),
+    ("rain_sumsq", "sum"),
+    ("rain_vehicles_sum", "sum"),
+    ("peak_records", "sum"),
+    ("rainy_records", "sum"),
+)
+
+TOP_COLUMNS = ("id", "timestamp", "location", "vehicle_count", "condition", "speed_kmh", "rain_factor")
+
+
+def _connect_read_only(db_path: str):
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    conn.execute("PRAGMA query_only = 1")
+    return conn
+
+
+def _scan_partition(task: dict) -> dict:
+    where = "location = ? AND timestamp >= ? AND timestamp < ?"
+    params = (task["location"], task["start"], task["end"])
+    group = PARTITION_GROUPS[task["group_by"]]
+
+    conn = _connect_read_only(task["db_path"])
+    try:
+        groups = {}
+        for row in conn.execute(f"""
+            SELECT
+                {group} AS grp,
+                COUNT(*),
+                SUM(vehicle_count),
+                SUM(vehicle_count * vehicle_count),
+                MIN(vehicle_count),
+                MAX(vehicle_count),
+                COUNT(speed_kmh),
+                COALESCE(SUM(speed_kmh), 0),
+                COALESCE(SUM(speed_kmh * speed_kmh), 0),
+                MIN(speed_kmh),
+                MAX(speed_kmh),
+                SUM(COALESCE(rain_factor, 1.0)),
+                SUM(COALESCE(rain_factor, 1.0) * COALESCE(rain_factor, 1.0)),
+                SUM(COALESCE(rain_factor, 1.0) * vehicle_count),
+                SUM(COALESCE(is_peak, 0)),
+                SUM(CASE WHEN rain_factor > 1.0 THEN 1 ELSE 0 END)
+            FROM traffic_data
+            WHERE {where}
+            GROUP BY grp
+        """, params):
+            groups[row[0]] = list(row[1:])
+
+        conditions = dict(conn.execute(
+            f"SELECT condition, COUNT(*) FROM traffic_data WHERE {where} GROUP BY condition", params
+        ).fetchall())
+
+        top = []
+        if task["top_n"]:
+            top = conn.execute(f"""
+                SELECT {", ".join(TOP_COLUMNS)} FROM traffic_data
+                WHERE {where}
+                ORDER BY vehicle_count DESC, id DESC
+                LIMIT ?
+            """, params + (task["top_n"],)).fetchall()
+    finally:
+        conn.close()
+
+    return {"groups": groups, "conditions": conditions, "top": top}
+
+
+def _merge_measures(target: list, values: list):
+    for i, (_, how) in enumerate(PARTIAL_MEASURES):
+        value = values[i]
+        if value is None:
+            continue
+        if target[i] is None:
+            target[i] = value
+        elif how == "sum":
+            target[i] += value
+        elif how == "min":
+            target[i] = min(target[i], value)
+        else:
+            target[i] = max(target[i], value)
+
+
+class PartialResult:
+    def __init__(self, top_n: int = 0):
+        self.top_n = top_n
+        self.groups = {}
+        self.conditions = {}
+        self.top = []
+
+    def merge(self, partial: dict):
+        for key, values in partial["groups"].items():
+            if key in self.groups:
+                _merge_measures(self.groups[key], values)
+            else:
+                self.groups[key] = list(values)
+
+        for condition, count in partial["conditions"].items():
+            self.conditions[condition] = self.conditions.get(condition, 0) + count
+
+        if self.top_n:
+            # Top-N global pasti ada di gabungan top-N tiap partisi.
+            ranked = sorted(self.top + list(partial["top"]), key=lambda r: (r[3], r[0]), reverse=True)
+            self.top = ranked[:self.top_n]
+
+    def frame(self, group_by: str = None) -> pd.DataFrame:
+        columns = [name for name, _ in PARTIAL_MEASURES]
+        rows = [[key] + values for key, values in sorted(self.groups.items())]
+        df = pd.DataFrame(rows, columns=[group_by or "group"] + columns)
+        if df.empty:
+            return df
+
+        n = df["record_count"]
+        df["avg_vehicles"] = df["vehicles_sum"] / n
+        df["std_vehicles"] = sample_std(n, df["vehicles_sum"], df["vehicles_sumsq"])
+        df["avg_speed"] = df["speed_sum"] / df["speed_count"].where(df["speed_count"] > 0)
+        df["std_speed"] = sample_std(df["speed_count"], df["speed_sum"], df["speed_sumsq"])
+        return df
+
+
+class ParallelAnalytics:
+    def __init__(self, db, workers: int = 1, slices_per_worker: int = 4):
+        self.db = db
+        self.workers = max(1, int(workers))
+        self.slices_per_worker = slices_per_worker
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # "spawn" dan bukan fork: proses utama (Streamlit, writer, backfill)
+        # punya thread yang sedang memegang lock, dan fork menyalin lock itu.
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def warm_up(self):
+        if self.workers > 1:
+            list(self._executor().map(abs, range(self.workers)))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def partitions(self, start: str = None, end: str = None, location: str = None) -> list:
+        conn = self.db.get_connection()
+        query = "SELECT MIN(timestamp) AS first, MAX(timestamp) AS last FROM traffic_data"
+        params = []
+        if location:
+            query += " WHERE location = ?"
+            params.append(location)
+        bounds = conn.execute(query, params).fetchone()
+        locations = [location] if location else [
+            row["location"] for row in conn.execute("SELECT DISTINCT location FROM row_counts "
+                                                    "WHERE table_name = 'traffic_data' AND row_count > 0")
+        ]
+        conn.close()
+
+        if bounds["first"] is None:
+            return []
+
+        first = datetime.fromisoformat(max(bounds["first"], start or ""))
+        last = datetime.fromisoformat(min(bounds["last"], end or "9999-12-31 23:59:59"))
+        if last < first:
+            return []
+
+        # Tiap partisi [awal, akhir) — batas akhir eksklusif, partisi terakhir
+        # ditutup satu detik setelah timestamp terakhir.
+        slices = max(1, math.ceil(self.workers * self.slices_per_worker / len(locations)))
+        step = (last + timedelta(seconds=1) - first) / slices
+        edges = [(first + step * i).strftime("%Y-%m-%d %H:%M:%S") for i in range(slices)]
+        edges.append((last + timedelta(seconds=1)).strftime("%Y-%m-%d %H:%M:%S"))
+        ranges = [(edges[i], edges[i + 1]) for i in range(slices) if edges[i] < edges[i + 1]]
+
+        return [(loc, range_start, range_end) for loc in locations for range_start, range_end in ranges]
+
+    def run(self, group_by: str = None, start: str = None, end: str = None,
+            location: str = None, top_n: int = 0) -> PartialResult:
+        if group_by not in PARTITION_GROUPS:
+            raise ValueError(f"Pengelompokan tidak dikenal: {group_by}")
+
+        tasks = [
+            {"db_path": self.db.db_path, "location": loc, "start": range_start, "end": range_end,
+             "group_by": group_by, "top_n": top_n}
+            for loc, range_start, range_end in self.partitions(start, end, location)
+        ]
+
+        result = PartialResult(top_n)
+        if self.workers == 1:
+            partials = map(_scan_partition, tasks)
+        else:
+            partials = self._executor().map(_scan_partition, tasks)
+        for partial in partials:
+            result.merge(partial)
+        return result
+
+    def aggregate(self, group_by: str = "location", start: str = None, end: str = None,
+                  location: str = None) -> pd.DataFrame:
+        return self.run(group_by, start, end, location).frame(group_by)
+
+    def overall_stats(self, start: str = None, end: str = None) -> dict:
+        result = self.run("location", start, end)
+        if not result.groups:
+            return {"error": "Tidak ada data"}
+
+        totals = [None] * len(PARTIAL_MEASURES)
+        for values in result.groups.values():
+            _merge_measures(totals, values)
+        totals = dict(zip([name for name, _ in PARTIAL_MEASURES], totals))
+
+        return {
+            "total_records": int(totals["record_count"]),
+            "total_locations": len(result.groups),
+            "avg_vehicles": round(totals["vehicles_sum"] / totals["record_count"], 1),
+            "max_vehicles": int(totals["vehicles_max"]),
+            "min_vehicles": int(totals["vehicles_min"]),
+            "avg_speed": round(totals["speed_sum"] / totals["speed_count"], 1) if totals["speed_count"] else 0.0,
+            "most_common_condition": min(result.conditions, key=lambda c: (-result.conditions[c], c)),
+            "peak_records": int(totals["peak_records"]),
+            "rainy_records": int(totals["rainy_records"]),
+        }
+
+    def top_congestion(self, top_n: int = 10, start: str = None, end: str = None,
+                       location: str = None) -> pd.DataFrame:
+        result = self.run(None, start, end, location, top_n=top_n)
+        return pd.DataFrame(result.top, columns=list(TOP_COLUMNS))
+
+    def rain_correlation(self, start: str = None, end: str = None, location: str = None) -> float:
+        result = self.run(None, start, end, location)
+        if not result.groups:
+            return float("nan")
+        return rain_vehicle_correlation(dict(zip([name for name, _ in PARTIAL_MEASURES], result.groups[""])))
@@ -0,0 +1,242 @@
+import argparse
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config import (
+    LOCATIONS,
+    VEHICLE_PATTERN,
+    RAIN_IMPACT,
+    DATA_INTERVAL_MINUTES,
+    NETWORK_SPILL_RATE,
+    NETWORK_RETAIN_RATE,
+)
+from network_sim import CAPACITY_VEHICLES, RoadNetwork
+
+RUNS_PER_CHUNK = 100
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+STEPS_PER_HOUR = 60 // DATA_INTERVAL_MINUTES
+
+RAIN_CATEGORIES = list(RAIN_IMPACT)
+RAIN_FACTORS = np.array([RAIN_IMPACT[category] for category in RAIN_CATEGORIES])
+HOURLY_VEHICLES = np.array([VEHICLE_PATTERN.get(hour, 100) for hour in range(24)], dtype=float)
+
+# Model cuaca sama dengan DataGenerator.simulate_historical_weather:
+# peluang hujan per jam (x1.2), lalu intensitas light/moderate/heavy/extreme.
+RAIN_PROBABILITY = np.array([
+    0.10 if hour <= 5 else 0.45 if hour <= 10 else 0.40 if 15 <= hour <= 18 else 0.15
+    for hour in range(24)
+]) * 1.2
+RAIN_INTENSITY_EDGES = np.array([0.5, 0.8, 0.95])
+
+WEEKDAY_VARIANCE = (0.9, 1.1)
+WEEKEND_VARIANCE = (0.6, 0.85)
+
+
+class Scenario:
+    def __init__(self, name: str = "baseline", weekend: bool = False, network: bool = False):
+        self.name = name
+        self.weekend = weekend
+        self.network = network
+        self.locations = list(LOCATIONS)
+        self.rain = []
+        self.demand = []
+
+    def _location_mask(self, locations) -> np.ndarray:
+        if not locations:
+            return np.ones(len(self.locations), dtype=bool)
+        unknown = set(locations) - set(self.locations)
+        if unknown:
+            raise ValueError(f"Lokasi tidak dikenal: {', '.join(sorted(unknown))}")
+        return np.array([location in locations for location in self.locations])
+
+    def with_rain(self, category: str, start_hour: int, end_hour: int = 24, locations: list = None) -> "Scenario":
+        if category not in RAIN_IMPACT:
+            raise ValueError(f"Kategori hujan tidak dikenal: {category}")
+        self.rain.append((category, start_hour, end_hour, self._location_mask(locations)))
+        return self
+
+    def with_demand(self, factor: float, start_hour: int = 0, end_hour: int = 24,
+                    locations: list = None) -> "Scenario":
+        self.demand.append((factor, start_hour, end_hour, self._location_mask(locations)))
+        return self
+
+    def rain_override(self) -> np.ndarray:
+        override = np.full((24, len(self.locations)), -1)
+        for category, start_hour, end_hour, mask in self.rain:
+            override[start_hour:end_hour, mask] = RAIN_CATEGORIES.index(category)
+        return override
+
+    def demand_factors(self) -> np.ndarray:
+        factors = np.ones((24, len(self.locations)))
+        for factor, start_hour, end_hour, mask in self.demand:
+            factors[start_hour:end_hour, mask] *= factor
+        return factors
+
+    def task(self, runs: int, seed) -> dict:
+        task = {
+            "runs": runs,
+            "seed": seed,
+            "rain_override": self.rain_override(),
+            "demand": self.demand_factors(),
+            "day_variance": WEEKEND_VARIANCE if self.weekend else WEEKDAY_VARIANCE,
+            "transition": None,
+        }
+        if self.network:
+            task["transition"] = RoadNetwork.from_locations().transition
+        return task
+
+
+def _simulate_chunk(task: dict) -> dict:
+    rng = np.random.default_rng(task["seed"])
+    runs = task["runs"]
+    steps = 24 * STEPS_PER_HOUR
+    locations = task["demand"].shape[1]
+    hours = np.arange(steps) // STEPS_PER_HOUR
+
+    # Cuaca satu nilai per jam untuk semua lokasi (seperti weather_cache di
+    # DataGenerator), kecuali jam/lokasi yang dipaksa skenario.
+    is_rain = rng.random((runs, 24)) < RAIN_PROBABILITY
+    intensity = 1 + np.searchsorted(RAIN_INTENSITY_EDGES, rng.random((runs, 24)), side="right")
+    category = np.where(is_rain, intensity, 0)[:, hours]
+    category = np.repeat(category[:, :, None], locations, axis=2)
+    override = task["rain_override"][hours]
+    category = np.where(override >= 0, override, category)
+    rain_factor = RAIN_FACTORS[category]
+
+    low, high = task["day_variance"]
+    demand = (HOURLY_VEHICLES[hours][None, :, None]
+              * rng.uniform(0.8, 1.2, (runs, steps, locations))
+              * rng.uniform(low, high, (runs, steps, locations))
+              * rain_factor
+              * task["demand"][hours][None, :, :])
+
+    if task["transition"] is not None:
+        # Antrian di atas kapasitas meluap ke wilayah tetangga seperti
+        # NetworkSimulator.tick, dihitung sekaligus untuk semua run.
+        transition = task["transition"]
+        excess = np.zeros((runs, locations))
+        for step in range(steps):
+            spillover = (transition @ (NETWORK_SPILL_RATE * excess).T).T
+            demand[:, step] += NETWORK_RETAIN_RATE * excess + spillover
+            excess = np.maximum(0.0, demand[:, step] - CAPACITY_VEHICLES)
+
+    vehicles = np.floor(demand)
+    speed = (60.0 - vehicles / 10.0) / rain_factor + rng.uniform(-3, 3, (runs, steps, locations))
+    speed = np.clip(speed, 5.0, 60.0)
+
+    shape = (runs, 24, STEPS_PER_HOUR, locations)
+    return {
+        "vehicles": vehicles.reshape(shape).mean(axis=2).astype(np.float32),
+        "speed": speed.reshape(shape).mean(axis=2).astype(np.float32),
+        "jam": (vehicles >= CAPACITY_VEHICLES).reshape(shape).mean(axis=2).astype(np.float32),
+    }
+
+
+class ScenarioRunner:
+    def __init__(self, workers: int = 1, chunk_runs: int = RUNS_PER_CHUNK):
+        self.workers = max(1, int(workers))
+        self.chunk_runs = chunk_runs
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def warm_up(self):
+        if self.workers > 1:
+            list(self._executor().map(abs, range(self.workers)))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def simulate(self, scenario: Scenario, runs: int = 1000, seed: int = 0) -> dict:
+        # Pembagian chunk dan seed tidak bergantung jumlah worker, jadi hasil
+        # identik untuk 1 atau 8 worker.
+        chunks = math.ceil(runs / self.chunk_runs)
+        seeds = np.random.SeedSequence(seed).spawn(chunks)
+        tasks = [
+            scenario.task(min(self.chunk_runs, runs - i * self.chunk_runs), seeds[i])
+            for i in range(chunks)
+        ]
+
+        if self.workers == 1:
+            partials = list(map(_simulate_chunk, tasks))
+        else:
+            partials = list(self._executor().map(_simulate_chunk, tasks))
+        return {key: np.concatenate([p[key] for p in partials]) for key in ("vehicles", "speed", "jam")}
+
+    def summarize(self, scenario: Scenario, samples: dict, quantiles=DEFAULT_QUANTILES) -> pd.DataFrame:
+        hours, locations = np.meshgrid(np.arange(24), scenario.locations, indexing="ij")
+        df = pd.DataFrame({"location": locations.ravel(), "hour": hours.ravel()})
+        df["runs"] = len(samples["vehicles"])
+
+        for metric in ("vehicles", "speed"):
+            values = samples[metric].astype(float)
+            df[f"{metric}_mean"] = values.mean(axis=0).ravel().round(1)
+            for q, result in zip(quantiles, np.quantile(values, quantiles, axis=0)):
+                df[f"{metric}_p{round(q * 100)}"] = result.ravel().round(1)
+        df["jam_probability"] = samples["jam"].astype(float).mean(axis=0).ravel().round(3)
+
+        return df.sort_values(["location", "hour"]).reset_index(drop=True)
+
+    def run(self, scenario: Scenario, runs: int = 1000, seed: int = 0,
+            quantiles=DEFAULT_QUANTILES) -> pd.DataFrame:
+        return self.summarize(scenario, self.simulate(scenario, runs, seed), quantiles)
+
+    def compare(self, scenario: Scenario, baseline: Scenario = None, runs: int = 1000,
+                seed: int = 0) -> pd.DataFrame:
+        # Seed yang sama untuk kedua skenario (common random numbers): selisih
+        # hanya berasal dari override, bukan dari noise antar run.
+        baseline = baseline or Scenario(weekend=scenario.weekend, network=scenario.network)
+        base = self.run(baseline, runs, seed)
+        what_if = self.run(scenario, runs, seed)
+
+        df = what_if.merge(base[["location", "hour", "vehicles_mean", "speed_mean", "jam_probability"]],
+                           on=["location", "hour"], suffixes=("", "_baseline"))
+        for column in ("vehicles_mean", "speed_mean", "jam_probability"):
+            df[f"delta_{column}"] = (df[column] - df[f"{column}_baseline"]).round(3)
+        return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulasi Monte Carlo skenario what-if traffic")
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rain", choices=RAIN_CATEGORIES, help="Paksa kategori hujan")
+    parser.add_argument("--from-hour", type=int, default=16)
+    parser.add_argument("--to-hour", type=int, default=24)
+    parser.add_argument("--demand", type=float, default=None, help="Pengali jumlah kendaraan")
+    parser.add_argument("--locations", nargs="+", default=None)
+    parser.add_argument("--weekend", action="store_true")
+    parser.add_argument("--network", action="store_true", help="Limpahan macet antar wilayah")
+    parser.add_argument("--show-hours", type=int, nargs=2, default=[15, 20], metavar=("FROM", "TO"))
+    args = parser.parse_args()
+
+    scenario = Scenario("what-if", weekend=args.weekend, network=args.network)
+    if args.rain:
+        scenario.with_rain(args.rain, args.from_hour, args.to_hour, args.locations)
+    if args.demand:
+        scenario.with_demand(args.demand, args.from_hour, args.to_hour, args.locations)
+
+    runner = ScenarioRunner(args.workers)
+    try:
+        df = runner.compare(scenario, runs=args.runs, seed=args.seed)
+    finally:
+        runner.close()
+
+    df = df[df["hour"].between(*args.show_hours)]
+    columns = ["location", "hour", "vehicles_mean", "vehicles_p5", "vehicles_p95", "delta_vehicles_mean",
+               "speed_mean", "delta_speed_mean", "jam_probability", "delta_jam_probability"]
+    print(f"\n🎲 {args.runs:,} run Monte Carlo — skenario vs baseline")
+    print(df[columns].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
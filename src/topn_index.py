@@ -0,0 +1,130 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+TOPN_WINDOWS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(days=7),
+    "all": None,
+}
+
+TOPN_COLUMNS = ["id", "timestamp", "location", "vehicle_count", "condition", "speed_kmh", "rain_factor"]
+
+
+class _WindowHeap:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries = []
+        self.ids = set()
+        self.loaded = False
+        # (vehicle_count, id) terbesar yang pernah dibuang karena heap penuh.
+        self.discarded = None
+
+    def _discard(self, key: tuple):
+        if self.discarded is None or key > self.discarded:
+            self.discarded = key
+
+    def push(self, row: dict):
+        if row["id"] in self.ids:
+            return
+        entry = (row["vehicle_count"], row["id"], row)
+        if len(self.entries) < self.capacity:
+            heapq.heappush(self.entries, entry)
+            self.ids.add(row["id"])
+            return
+
+        if entry > self.entries[0]:
+            removed = heapq.heapreplace(self.entries, entry)
+            self.ids.discard(removed[1])
+            self.ids.add(row["id"])
+            self._discard(removed[:2])
+        else:
+            self._discard(entry[:2])
+
+    def trusted(self) -> int:
+        # Hanya entri di atas record terbesar yang pernah dibuang yang pasti
+        # benar urutannya; di bawah itu bisa ada record yang hilang.
+        if self.discarded is None:
+            return len(self.entries)
+        return sum(1 for entry in self.entries if entry[:2] >= self.discarded)
+
+    def expire(self, cutoff: str):
+        kept = [entry for entry in self.entries if entry[2]["timestamp"] >= cutoff]
+        if len(kept) != len(self.entries):
+            heapq.heapify(kept)
+            self.entries = kept
+            self.ids = {entry[1] for entry in kept}
+
+
+class TopCongestionIndex:
+    # Setelah entri kedaluwarsa dihapus, record kecil yang masuk belakangan
+    # bisa berada di bawah record yang dulu dibuang. Rebuild dari database
+    # perlu begitu kurang dari n entri berada di atas record terbesar yang
+    # pernah dibuang.
+    def __init__(self, capacity: int = 50):
+        self.capacity = capacity
+        self._heaps = {}
+        self._lock = threading.Lock()
+
+    def _heap(self, window: str, location: str) -> _WindowHeap:
+        key = (window, location)
+        heap = self._heaps.get(key)
+        if heap is None:
+            heap = _WindowHeap(self.capacity)
+            self._heaps[key] = heap
+        return heap
+
+    def _cutoff(self, window: str, now: datetime = None) -> str:
+        span = TOPN_WINDOWS[window]
+        if span is None:
+            return ""
+        return ((now or datetime.now()) - span).strftime("%Y-%m-%d %H:%M:%S")
+
+    def observe(self, rows: list, now: datetime = None):
+        if not rows:
+            return
+        with self._lock:
+            for window in TOPN_WINDOWS:
+                cutoff = self._cutoff(window, now)
+                for row in rows:
+                    if row["timestamp"] < cutoff:
+                        continue
+                    self._heap(window, None).push(row)
+                    self._heap(window, row["location"]).push(row)
+
+    def reset(self):
+        with self._lock:
+            self._heaps = {}
+
+    def top(self, window: str = "all", location: str = None, n: int = 10,
+            loader=None, now: datetime = None) -> list:
+        if window not in TOPN_WINDOWS:
+            raise ValueError(f"Window tidak dikenal: {window}")
+        if n > self.capacity:
+            raise ValueError(f"n maksimal {self.capacity}")
+
+        cutoff = self._cutoff(window, now)
+        with self._lock:
+            heap = self._heap(window, location)
+            heap.expire(cutoff)
+            needs_rebuild = not heap.loaded or heap.trusted() < n
+
+        if needs_rebuild and loader is not None:
+            rows = loader(cutoff, location, self.capacity)
+            with self._lock:
+                heap = self._heap(window, location)
+                # Loader mengembalikan top-capacity urut menurun; kalau penuh,
+                # sisa record di database ada di bawah baris terakhirnya.
+                heap.discarded = None
+                if len(rows) >= self.capacity:
+                    heap._discard((rows[-1]["vehicle_count"], rows[-1]["id"]))
+                for row in rows:
+                    heap.push(row)
+                heap.expire(cutoff)
+                heap.loaded = True
+
+        with self._lock:
+            heap = self._heap(window, location)
+            entries = sorted(heap.entries, reverse=True)[:n]
+        return [entry[2] for entry in entries]
@@ -4,30 +4,27 @@ from config import (
     LOCATIONS,
     VEHICLE_PATTERN,
     RAIN_IMPACT,
-    TRAFFIC_THRESHOLDS,
-    PEAK_MORNING,
-    PEAK_EVENING,
 )
 from database import TrafficDatabase
+from network_sim import NetworkSimulator, RoadNetwork
+from traffic_rules import get_traffic_condition, is_peak_hour
 from weather_api import WeatherAPI
 
 
 class TrafficEngine:
-    def __init__(self):
-        self.db = TrafficDatabase()
-        self.weather_api = WeatherAPI()
+    def __init__(self, db: TrafficDatabase = None, weather_api: WeatherAPI = None,
+                 network: RoadNetwork = None):
+        self.db = db or TrafficDatabase()
+        self.weather_api = weather_api or WeatherAPI(db=self.db)
         self.last_weather = {}
+        # Mode jaringan: kemacetan satu node meluap ke tetangganya tiap siklus.
+        self.network_sim = NetworkSimulator(network) if network is not None else None
 
     def is_peak_hour(self, hour: int) -> bool:
-        is_morning_peak = PEAK_MORNING["start"] <= hour < PEAK_MORNING["end"]
-        is_evening_peak = PEAK_EVENING["start"] <= hour < PEAK_EVENING["end"]
-        return is_morning_peak or is_evening_peak
+        return is_peak_hour(hour)
 
     def get_traffic_condition(self, vehicle_count: int) -> str:
-        for condition, (low, high) in TRAFFIC_THRESHOLDS.items():
-            if low <= vehicle_count < high:
-                return condition
-        return "Macet"
+        return get_traffic_condition(vehicle_count)
 
     def calculate_speed(self, vehicle_count: int, rain_factor: float) -> float:
         max_speed = 60.0
@@ -73,6 +70,12 @@ class TrafficEngine:
 
         return result
 
+    def simulate_network(self, weather_map: dict) -> list:
+        now = datetime.now()
+        rain_categories = {location: w.get("rain_category", "none") for location, w in weather_map.items()}
+        result = self.network_sim.tick(now.hour, self.network_sim.rain_factors(rain_categories))
+        return self.network_sim.records(result, now)
+
     def run_simulation_cycle(self) -> list:
         print("\n🔄 Running simulation cycle...")
         print("─" * 40)
@@ -83,22 +86,29 @@ class TrafficEngine:
         for w in weather_list:
             weather_map[w["location"]] = w
 
-        traffic_records = []
-
-        for location in LOCATIONS:
-            weather = weather_map.get(location)
-            traffic = self.simulate_location(location, weather)
-            traffic_records.append(traffic)
+        if self.network_sim is not None:
+            traffic_records = self.simulate_network(weather_map)
+        else:
+            traffic_records = [self.simulate_location(location, weather_map.get(location))
+                               for location in LOCATIONS]
 
+        for traffic in traffic_records:
+            if traffic["location"] not in LOCATIONS:
+                continue
             emoji = "🟢" if traffic["condition"] == "Lancar" else \
                     "🟡" if traffic["condition"] == "Sedang" else \
                     "🟠" if traffic["condition"] == "Padat" else \
                     "🔴"
-            print(f"  {emoji} {location}: "
+            print(f"  {emoji} {traffic['location']}: "
                   f"{traffic['vehicle_count']} kendaraan, "
                   f"{traffic['condition']}, "
                   f"{traffic['speed_kmh']} km/h")
 
+        if self.network_sim is not None:
+            jammed = sum(1 for t in traffic_records if t["condition"] == "Macet")
+            print(f"  🕸️  Network: {len(traffic_records)} node, {jammed} macet, "
+                  f"limpahan {self.network_sim.excess.sum():.0f} kendaraan")
+
         self.db.insert_traffic_data(traffic_records)
 
         print("─" * 40)
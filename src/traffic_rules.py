@@ -0,0 +1,14 @@
+from config import PEAK_EVENING, PEAK_MORNING, TRAFFIC_THRESHOLDS
+
+
+def is_peak_hour(hour: int) -> bool:
+    is_morning_peak = PEAK_MORNING["start"] <= hour < PEAK_MORNING["end"]
+    is_evening_peak = PEAK_EVENING["start"] <= hour < PEAK_EVENING["end"]
+    return is_morning_peak or is_evening_peak
+
+
+def get_traffic_condition(vehicle_count: int) -> str:
+    for condition, (low, high) in TRAFFIC_THRESHOLDS.items():
+        if low <= vehicle_count < high:
+            return condition
+    return "Macet"
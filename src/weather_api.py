@@ -1,14 +1,33 @@
+import argparse
+import glob
+import json
+import os
 import requests
 from datetime import datetime
-from config import WEATHER_API_URL, LOCATIONS, WEATHER_PARAMS
+from config import WEATHER_API_URL, LOCATIONS, WEATHER_PARAMS, WEATHER_DIR
 from database import TrafficDatabase
 
 
+def _slug(location: str) -> str:
+    return location.lower().replace(" ", "_")
+
+
+def _hourly_value(hourly: dict, key: str, index: int):
+    values = hourly.get(key) or []
+    return values[index] if index < len(values) else None
+
+
 class WeatherAPI:
-    def __init__(self):
+    def __init__(self, db: TrafficDatabase = None, record: bool = False, replay: bool = False,
+                 weather_dir: str = WEATHER_DIR):
         self.api_url = WEATHER_API_URL
         self.locations = LOCATIONS
-        self.db = TrafficDatabase()
+        self.db = db or TrafficDatabase()
+        # record: simpan response mentah ke weather_dir; replay: baca response
+        # terakhir dari disk dan tidak memanggil API sama sekali.
+        self.record = record
+        self.replay = replay
+        self.weather_dir = weather_dir
 
     def decode_weather_code(self, code: int) -> dict:
         weather_map = {
@@ -38,25 +57,88 @@ class WeatherAPI:
         }
         return weather_map.get(code, {"description": "Unknown", "rain_category": "none"})
 
-    def get_weather(self, location: str) -> dict:
-        if location not in self.locations:
-            print(f"❌ Lokasi '{location}' tidak ditemukan!")
-            return None
+    def record_response(self, location: str, data: dict, fetched_at: str = None) -> str:
+        fetched_at = fetched_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        os.makedirs(self.weather_dir, exist_ok=True)
+        stamp = fetched_at.replace("-", "").replace(":", "").replace(" ", "_")
+        path = os.path.join(self.weather_dir, f"{_slug(location)}_{stamp}.json")
+        with open(path, "w") as f:
+            json.dump({"location": location, "fetched_at": fetched_at, "response": data}, f)
+        return path
+
+    def recorded_responses(self, location: str = None, paths: list = None) -> list:
+        if paths is None:
+            pattern = f"{_slug(location)}_*.json" if location else "*.json"
+            paths = glob.glob(os.path.join(self.weather_dir, pattern))
+
+        recorded = []
+        for path in paths:
+            with open(path) as f:
+                recorded.append(json.load(f))
+        return sorted(recorded, key=lambda r: (r["fetched_at"], r["location"]))
+
+    def fetch_response(self, location: str, past_days: int = 0) -> dict:
+        if self.replay:
+            recorded = self.recorded_responses(location)
+            if not recorded:
+                print(f"❌ Tidak ada response tersimpan untuk {location} di {self.weather_dir}")
+                return None
+            print(f"📼 Replay cuaca {location} ({recorded[-1]['fetched_at']})")
+            return recorded[-1]["response"]
 
         coords = self.locations[location]
         params = WEATHER_PARAMS.copy()
         params["latitude"] = coords["lat"]
         params["longitude"] = coords["lon"]
+        if past_days:
+            params["past_days"] = past_days
 
-        try:
-            print(f"🌤️  Fetching cuaca untuk {location}...")
-            response = requests.get(self.api_url, params=params, timeout=10)
+        print(f"🌤️  Fetching cuaca untuk {location}...")
+        response = requests.get(self.api_url, params=params, timeout=10)
+
+        if response.status_code != 200:
+            print(f"❌ API error: status {response.status_code}")
+            return None
+
+        data = response.json()
+        if self.record:
+            self.record_response(location, data)
+        return data
+
+    def hourly_records(self, location: str, data: dict, until: str = None) -> list:
+        # Satu response sudah berisi array per jam untuk seharian penuh; jam
+        # setelah `until` masih ramalan dan tidak disimpan sebagai histori.
+        hourly = data.get("hourly", {})
+        records = []
+        for i, time_str in enumerate(hourly.get("time", [])):
+            timestamp = datetime.fromisoformat(time_str).strftime("%Y-%m-%d %H:%M:%S")
+            if until and timestamp > until:
+                continue
+
+            weather_code = _hourly_value(hourly, "weathercode", i)
+            weather_info = self.decode_weather_code(weather_code)
+            records.append({
+                "location": location,
+                "temperature": _hourly_value(hourly, "temperature_2m", i),
+                "precipitation": _hourly_value(hourly, "precipitation", i) or 0.0,
+                "windspeed": _hourly_value(hourly, "windspeed_10m", i),
+                "weather_code": weather_code,
+                "weather_desc": weather_info["description"],
+                "rain_category": weather_info["rain_category"],
+                "timestamp": timestamp,
+            })
+        return records
 
-            if response.status_code != 200:
-                print(f"❌ API error: status {response.status_code}")
+    def get_weather(self, location: str) -> dict:
+        if location not in self.locations:
+            print(f"❌ Lokasi '{location}' tidak ditemukan!")
+            return None
+
+        try:
+            data = self.fetch_response(location)
+            if data is None:
                 return None
 
-            data = response.json()
             current = data.get("current_weather", {})
             hourly = data.get("hourly", {})
 
@@ -121,4 +203,61 @@ class WeatherAPI:
             self.db.insert_weather_data(weather)
 
         print(f"💾 Saved {len(weather_list)} weather records to database")
-        return weather_list
\ No newline at end of file
+        return weather_list
+
+    def _save_hourly(self, records: list) -> int:
+        inserted = self.db.insert_weather_hourly(records)
+        print(f"💾 Saved {inserted} weather records per jam "
+              f"({len(records) - inserted} duplikat dilewati)")
+        return inserted
+
+    def fetch_hourly(self, past_days: int = 0, include_forecast: bool = False) -> int:
+        if self.replay:
+            return self.replay_hourly(include_forecast=include_forecast)
+
+        print("\n🌍 Fetching cuaca per jam semua lokasi Jakarta...")
+        print("─" * 40)
+        fetched_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        records = []
+        for location in self.locations:
+            try:
+                data = self.fetch_response(location, past_days)
+            except requests.exceptions.RequestException as e:
+                print(f"❌ {location}: {e}")
+                continue
+            if data:
+                records.extend(self.hourly_records(location, data, None if include_forecast else fetched_at))
+        print("─" * 40)
+        return self._save_hourly(records)
+
+    def replay_hourly(self, paths: list = None, include_forecast: bool = False) -> int:
+        recorded = self.recorded_responses(paths=paths)
+        records = []
+        for item in recorded:
+            until = None if include_forecast else item["fetched_at"]
+            records.extend(self.hourly_records(item["location"], item["response"], until))
+        print(f"📼 {len(recorded)} response tersimpan → {len(records)} baris cuaca per jam")
+        return self._save_hourly(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill data cuaca per jam dari Open-Meteo")
+    parser.add_argument("--past-days", type=int, default=0, help="Ikut ambil N hari ke belakang")
+    parser.add_argument("--record", action="store_true", help="Simpan response mentah ke WEATHER_DIR")
+    parser.add_argument("--replay", nargs="*", metavar="FILE",
+                        help="Muat response tersimpan (default: semua file di WEATHER_DIR)")
+    parser.add_argument("--include-forecast", action="store_true")
+    parser.add_argument("--weather-dir", default=WEATHER_DIR)
+    args = parser.parse_args()
+
+    db = TrafficDatabase()
+    db.init_tables()
+    api = WeatherAPI(db=db, record=args.record, weather_dir=args.weather_dir)
+    if args.replay is not None:
+        api.replay_hourly(args.replay or None, args.include_forecast)
+    else:
+        api.fetch_hourly(args.past_days, args.include_forecast)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from database import TrafficDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = TrafficDatabase(db_path=str(tmp_path / "test.db"))
+    db.init_tables()
+    return db
@@ -0,0 +1,64 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregate_cube import AggregateCube, rain_category_for, rebuild_cube
+from benchmark import synthetic_rows
+from database import BULK_TRAFFIC_COLUMNS
+
+
+def _fill(db, count: int = 3000):
+    records = [dict(zip(BULK_TRAFFIC_COLUMNS, row)) for row in synthetic_rows(count)]
+    records[5]["speed_kmh"] = None
+    for i in range(0, len(records), 250):
+        db.insert_generated_data(records[i:i + 250], [])
+
+
+def _raw(db) -> pd.DataFrame:
+    conn = sqlite3.connect(db.db_path)
+    df = pd.read_sql_query("SELECT * FROM traffic_data", conn)
+    conn.close()
+    return df
+
+
+def test_rollup_matches_raw_aggregates(db):
+    _fill(db)
+    raw = _raw(db)
+    cube = AggregateCube(db).rollup(["hour"], {"location": "Jakarta Pusat"})
+
+    expected = raw[raw["location"] == "Jakarta Pusat"].groupby("hour").agg(
+        record_count=("id", "size"), avg_vehicles=("vehicle_count", "mean"),
+        std_vehicles=("vehicle_count", "std"), vehicles_max=("vehicle_count", "max"),
+        avg_speed=("speed_kmh", "mean"),
+    ).reset_index()
+    for column in expected.columns:
+        np.testing.assert_allclose(cube[column], expected[column], rtol=1e-9)
+
+    total = AggregateCube(db).rollup()
+    assert total["record_count"].iloc[0] == len(raw)
+    assert total["macet_count"].iloc[0] == (raw["condition"] == "Macet").sum()
+    corr = np.corrcoef(raw["rain_factor"], raw["vehicle_count"])[0, 1]
+    assert AggregateCube(db).correlation() == pytest.approx(corr)
+
+
+def test_incremental_cube_matches_rebuild(db):
+    _fill(db)
+    before = AggregateCube(db).rollup(["location", "day_of_week", "rain_category", "is_peak"])
+    db._write(rebuild_cube)
+    after = AggregateCube(db).rollup(["location", "day_of_week", "rain_category", "is_peak"])
+    pd.testing.assert_frame_equal(before, after)
+
+
+def test_rollup_rejects_unknown_dimension(db):
+    with pytest.raises(ValueError):
+        AggregateCube(db).rollup(["weather"])
+    with pytest.raises(ValueError):
+        AggregateCube(db).rollup([], {"timestamp": "2024-01-01"})
+
+
+def test_rain_category_boundaries():
+    assert rain_category_for(1.0) == "Tidak Hujan"
+    assert rain_category_for(1.3) == "Hujan Ringan"
+    assert rain_category_for(2.0) == "Hujan Ekstrem"
@@ -0,0 +1,65 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from api_server import AnalyticsAPI, create_server
+from benchmark import synthetic_rows
+
+
+@pytest.fixture
+def api(db):
+    db.bulk_load_traffic(synthetic_rows(2000))
+    return AnalyticsAPI(db=db, version_ttl=0)
+
+
+def test_etag_revalidation_and_cache(api):
+    status, headers, body = api.handle("GET", "/api/stats", "")
+    assert status == 200 and headers["X-Cache"] == "miss"
+    assert json.loads(body)["total_records"] == 2000
+
+    assert api.handle("GET", "/api/stats", "")[1]["X-Cache"] == "hit"
+    status, not_modified, body = api.handle("GET", "/api/stats", "", if_none_match=headers["ETag"])
+    assert status == 304 and body == b"" and not_modified["ETag"] == headers["ETag"]
+
+    api.db.bulk_load_traffic(synthetic_rows(10, seed=5))
+    status, changed, body = api.handle("GET", "/api/stats", "", if_none_match=headers["ETag"])
+    assert status == 200 and changed["ETag"] != headers["ETag"]
+    assert changed["X-Cache"] == "miss" and json.loads(body)["total_records"] == 2010
+
+
+def test_keyset_pages_and_bad_requests(api):
+    status, _, body = api.handle("GET", "/api/traffic", "location=Jakarta+Pusat&limit=150")
+    first = json.loads(body)
+    assert status == 200 and len(first["rows"]) == 150 and first["next"]
+
+    _, _, body = api.handle("GET", "/api/traffic", f"location=Jakarta+Pusat&limit=150&after={first['next']}")
+    second = json.loads(body)
+    assert {r["id"] for r in first["rows"]}.isdisjoint(r["id"] for r in second["rows"])
+
+    for query in ("limit=0", "after=kemarin", "location=Bogor"):
+        assert api.handle("GET", "/api/traffic", query)[0] == 400
+    assert api.handle("GET", "/api/predict", "location=Jakarta+Pusat&hour=25")[0] == 400
+    assert api.handle("GET", "/api/unknown", "")[0] == 404
+    assert api.handle("POST", "/api/stats", "")[0] == 405
+
+
+def test_wsgi_server_round_trip(api):
+    server = create_server(api, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/api/locations"
+    try:
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers["ETag"]
+            assert response.headers["Content-Type"].startswith("application/json")
+            assert len(json.loads(response.read())) == 5
+        request = urllib.request.Request(url, headers={"If-None-Match": etag})
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 304
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from asof_join import WeatherAsOfJoin, lagged_rain_effect, precipitation_effect, precipitation_speed_curve
+
+START = datetime(2024, 1, 1)
+
+
+def _fill(db):
+    traffic, weather = [], []
+    for i in range(48 * 4):
+        at = START + timedelta(minutes=15 * i)
+        rain = float((i // 4) % 6 * 3)
+        traffic.append({
+            "timestamp": at.strftime("%Y-%m-%d %H:%M:%S"), "location": "Sudirman",
+            "vehicle_count": int(300 + rain * 10 + i % 3), "condition": "Padat",
+            "speed_kmh": 40.0 - rain, "hour": at.hour, "is_peak": 0, "rain_factor": 1.0,
+            "data_source": "test",
+        })
+        if i % 4 == 0:
+            weather.append({
+                "timestamp": at.strftime("%Y-%m-%d %H:%M:%S"), "location": "Sudirman",
+                "temperature": 28.0, "precipitation": rain, "windspeed": 5.0,
+                "weather_code": 61, "weather_desc": "Hujan", "rain_category": "moderate",
+            })
+    db.insert_generated_data(traffic, weather)
+
+
+def test_join_attaches_latest_weather_within_tolerance(db):
+    _fill(db)
+    joined = WeatherAsOfJoin(db).join(end="2024-01-01 02:59:59")
+
+    assert len(joined) == 12
+    assert "lag" not in joined.columns
+    assert (joined["weather_time"] <= joined["traffic_time"]).all()
+    assert (joined["traffic_time"] - joined["weather_time"] < timedelta(hours=1)).all()
+
+    lagged = WeatherAsOfJoin(db).join(end="2024-01-01 02:59:59", lag=timedelta(hours=1))
+    assert lagged["precipitation"].isna().sum() == 4
+
+
+def test_precipitation_effect_matches_separate_passes(db):
+    _fill(db)
+    joiner = WeatherAsOfJoin(db, tolerance=timedelta(minutes=30))
+    curve, lagged = precipitation_effect(joiner, lags_hours=(0, 1, 2))
+
+    assert curve.equals(precipitation_speed_curve(joiner))
+    assert lagged.equals(lagged_rain_effect(joiner, (0, 1, 2)))
+    assert list(lagged["lag_hours"]) == [0, 1, 2]
+    assert curve["records"].sum() == 48 * 3
+
+    for lag in (0, 1, 2):
+        joined = joiner.join(lag=timedelta(hours=lag)).dropna(subset=["precipitation"])
+        expected = np.corrcoef(joined["precipitation"], joined["speed_kmh"])[0, 1]
+        row = lagged[lagged["lag_hours"] == lag].iloc[0]
+        assert row["samples"] == len(joined)
+        assert row["corr_precipitation_speed"] == pytest.approx(expected, abs=1e-3)
@@ -0,0 +1,49 @@
+import time
+from datetime import datetime, timedelta
+
+import backfill
+import data_generator
+from backfill import LOCK_NAME, BackfillWorker
+from data_generator import DataGenerator
+
+
+def _wait_for(worker, states, timeout: float = 60.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = worker.status()
+        if status["state"] in states:
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"Worker tidak mencapai {states}: {worker.status()}")
+
+
+def test_backfill_completes_and_fills_gaps(db, monkeypatch):
+    monkeypatch.setattr(data_generator, "HISTORICAL_DAYS", 1)
+    worker = BackfillWorker(db=db)
+    worker.start()
+    status = _wait_for(worker, ("done", "error"))
+    worker.stop(timeout=5)
+
+    assert status["state"] == "done" and status["error"] is None
+    assert status["completed_days"] == status["total_days"] == 2
+    assert db.get_traffic_count() > 0
+    # Hanya interval yang lewat sejak worker selesai yang boleh masih kosong.
+    recent = datetime.now() - timedelta(minutes=10)
+    gaps = DataGenerator(db=db).find_gaps(scan_window=True)
+    assert all(start >= recent for ranges in gaps.values() for start, _ in ranges)
+    assert db.acquire_job_lock(LOCK_NAME, "other-owner")
+
+
+def test_backfill_waits_while_another_owner_holds_the_lock(db, monkeypatch):
+    monkeypatch.setattr(data_generator, "HISTORICAL_DAYS", 1)
+    monkeypatch.setattr(backfill, "RETRY_SECONDS", 0.05)
+    assert db.acquire_job_lock(LOCK_NAME, "other-owner")
+
+    worker = BackfillWorker(db=db)
+    worker.start()
+    status = _wait_for(worker, ("waiting",))
+    assert status["completed_days"] == 0
+
+    db.release_job_lock(LOCK_NAME, "other-owner")
+    assert _wait_for(worker, ("done", "error"))["state"] == "done"
+    worker.stop(timeout=5)
@@ -0,0 +1,75 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from benchmark import synthetic_rows
+from database import BULK_TRAFFIC_COLUMNS, TrafficDatabase
+
+
+def _snapshot(db) -> dict:
+    conn = sqlite3.connect(db.db_path)
+    snapshot = {
+        "events": conn.execute("""
+            SELECT location, start_time, end_time, peak_vehicles, samples, vehicles_sum
+            FROM congestion_events ORDER BY location, start_time
+        """).fetchall(),
+        "cube": conn.execute("""
+            SELECT location, day_of_week, hour, rain_category, is_peak, record_count, vehicles_sum, macet_count
+            FROM traffic_cube ORDER BY 1, 2, 3, 4, 5
+        """).fetchall(),
+        "sketches": conn.execute("SELECT metric, location, hour, n FROM traffic_sketches ORDER BY 1, 2, 3").fetchall(),
+        "latest": conn.execute("SELECT location, timestamp, vehicle_count FROM traffic_latest ORDER BY 1").fetchall(),
+    }
+    conn.close()
+    snapshot["counts"] = {location: db.get_traffic_count(location) for location in db.get_last_traffic_timestamps()}
+    return snapshot
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    db = TrafficDatabase(db_path=str(tmp_path / "legacy.db"))
+    db.init_tables()
+    return db
+
+
+def test_bulk_load_matches_legacy_insert(db, legacy_db):
+    rows = list(synthetic_rows(6000))
+    records = [dict(zip(BULK_TRAFFIC_COLUMNS, row)) for row in rows]
+    for i in range(0, len(records), 1000):
+        legacy_db.insert_generated_data(records[i:i + 1000], [])
+
+    stats = db.bulk_load_traffic(rows[:4000], chunksize=1500)
+    db.bulk_load_traffic(pd.DataFrame(records[4000:]))
+
+    assert stats["rows"] == 4000 and stats["rows_per_sec"] > 0
+    assert _snapshot(db) == _snapshot(legacy_db)
+
+
+def test_bulk_load_restores_indexes_and_version(db):
+    conn = sqlite3.connect(db.db_path)
+    indexes = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'traffic_data'").fetchall()
+    version = db.get_data_version(refresh=True)["traffic_data"]
+
+    db.bulk_load_traffic(synthetic_rows(500), drop_indexes=True)
+
+    assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' "
+                        "AND tbl_name = 'traffic_data'").fetchall() == indexes
+    assert db.get_data_version(refresh=True)["traffic_data"] == version + 1
+    conn.close()
+
+
+def test_out_of_order_bulk_load_rebuilds_events(db, legacy_db):
+    late = list(synthetic_rows(1000, start=datetime(2024, 1, 1), seed=1))
+    early = list(synthetic_rows(1000, start=datetime(2023, 12, 1), seed=2))
+    db.bulk_load_traffic(late)
+    db.bulk_load_traffic(early)
+    legacy_db.bulk_load_traffic(early + late)
+
+    assert _snapshot(db)["events"] == _snapshot(legacy_db)["events"]
+
+
+def test_bulk_load_rejects_missing_columns(db):
+    with pytest.raises(ValueError):
+        db.bulk_load_traffic({"timestamp": ["2024-01-01 00:00:00"]})
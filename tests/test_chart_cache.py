@@ -0,0 +1,65 @@
+import time
+
+import pandas as pd
+import pytest
+
+from chart_cache import ChartCache, frame_digest
+
+
+def _hourly(scale: float = 1.0) -> pd.DataFrame:
+    return pd.DataFrame({"hour": range(24), "avg_vehicles": [scale * (100 + 10 * h) for h in range(24)]})
+
+
+@pytest.fixture
+def cache():
+    cache = ChartCache()
+    yield cache
+    cache.close()
+
+
+def test_render_then_hit(cache):
+    png = cache.render("hourly_bar", {"location": None}, 1, _hourly())
+    assert png.startswith(b"\x89PNG")
+    assert cache.render("hourly_bar", {"location": None}, 1, _hourly()) is png
+    assert cache.get("hourly_bar", {"location": None}, 2) is None
+
+    svg = cache.render("hourly_bar", {"location": None}, 1, _hourly(), fmt="svg")
+    assert b"<svg" in svg
+    stats = cache.stats()
+    assert stats["renders"] == 2 and stats["hits"] == 1
+
+
+def test_new_version_serves_stale_while_rendering(cache):
+    first, state = cache.request("hourly_bar", {}, 1, _hourly(), wait=10)
+    assert state == "rendered"
+
+    stale, state = cache.request("hourly_bar", {}, 2, _hourly(2.0), wait=10)
+    assert state == "stale" and stale is first
+
+    deadline = time.monotonic() + 10
+    while cache.get("hourly_bar", {}, 2) is None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    fresh, state = cache.request("hourly_bar", {}, 2, _hourly(2.0))
+    assert state == "fresh" and fresh != first
+
+
+def test_eviction_is_bounded_by_bytes():
+    cache = ChartCache(max_bytes=1)
+    try:
+        for version in range(3):
+            cache.render("hourly_bar", {}, version, _hourly())
+        stats = cache.stats()
+        assert stats["entries"] == 1
+        assert cache.get("hourly_bar", {}, 2) is not None
+        assert cache.get("hourly_bar", {}, 0) is None
+    finally:
+        cache.close()
+
+
+def test_unknown_chart_and_frame_digest(cache):
+    with pytest.raises(ValueError):
+        cache.render("pie", {}, 1, _hourly())
+    with pytest.raises(ValueError):
+        cache.render("hourly_bar", {}, 1, _hourly(), fmt="gif")
+    assert frame_digest(_hourly()) == frame_digest(_hourly())
+    assert frame_digest(_hourly()) != frame_digest(_hourly(2.0))
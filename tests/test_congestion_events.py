@@ -0,0 +1,71 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from congestion_events import CongestionDetector, _to_seconds
+
+START = datetime(2024, 1, 1, 6, 0)
+
+
+def _records(location: str, vehicles: list, start: datetime = START, step_minutes: int = 5) -> list:
+    return [{
+        "timestamp": (start + timedelta(minutes=i * step_minutes)).strftime("%Y-%m-%d %H:%M:%S"),
+        "location": location, "vehicle_count": int(count), "condition": "Lancar",
+        "speed_kmh": 60.0 - count / 20, "hour": (start + timedelta(minutes=i * step_minutes)).hour,
+        "is_peak": 0, "rain_factor": 1.0, "data_source": "test",
+    } for i, count in enumerate(vehicles)]
+
+
+def _events(db) -> list:
+    conn = sqlite3.connect(db.db_path)
+    rows = conn.execute("""
+        SELECT location, start_time, end_time, last_time, peak_time, peak_vehicles,
+               samples, vehicles_sum, duration_minutes
+        FROM congestion_events ORDER BY location, start_time
+    """).fetchall()
+    conn.close()
+    return rows
+
+
+def test_feed_many_matches_feed():
+    rng = np.random.default_rng(3)
+    records = _records("Sudirman", rng.integers(200, 800, 400))
+    records = [r for r in records if rng.random() > 0.1]
+
+    single = CongestionDetector()
+    for record in records:
+        single.feed(record)
+    batched = CongestionDetector()
+    for part in (records[:150], records[150:]):
+        batched.feed_many("Sudirman", [_to_seconds(r["timestamp"]) for r in part],
+                          [r["vehicle_count"] for r in part], [r["speed_kmh"] for r in part])
+
+    assert single.states["Sudirman"]["watermark"] == batched.states["Sudirman"]["watermark"]
+    closed = lambda events: sorted((e["start_time"], e["end_time"], e["samples"], e["peak_vehicles"])
+                                   for e in events if e["end_time"])
+    assert closed(single.take_touched()) == closed(batched.take_touched())
+
+
+def test_late_records_rebuild_affected_episodes(db):
+    vehicles = [300, 600, 650, 700, 400, 300, 200, 550, 600, 300, 200, 200]
+    records = _records("Sudirman", vehicles) + _records("Thamrin", vehicles)
+    early = [r for i, r in enumerate(records) if i % 12 not in (3, 4, 5)]
+    late = [r for i, r in enumerate(records) if i % 12 in (3, 4, 5)]
+
+    db.insert_generated_data(early, [])
+    before = _events(db)
+    db.insert_generated_data(late, [])
+    after = _events(db)
+
+    db.rebuild_congestion_events()
+    assert after == _events(db)
+    assert after != before
+
+
+def test_duplicate_tick_does_not_change_episodes(db):
+    records = _records("Sudirman", [300, 600, 650, 300])
+    db.insert_generated_data(records, [])
+    before = _events(db)
+    db.insert_generated_data([dict(records[-1], vehicle_count=900)], [])
+    assert _events(db) == before
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from dashboard_loader import DashboardLoader
+
+
+@pytest.fixture
+def loader():
+    loader = DashboardLoader(max_workers=4, timeout=1.0)
+    yield loader
+    loader.close()
+
+
+def test_panels_load_concurrently(loader):
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    results, elapsed_ms = loader.load({"a": (slow, 1), "b": (slow, 2), "c": (slow, 3)})
+
+    assert {name: r["value"] for name, r in results.items()} == {"a": 1, "b": 2, "c": 3}
+    assert all(r["status"] == "ok" for r in results.values())
+    assert elapsed_ms < 500
+
+
+def test_timeout_and_error_fall_back_to_last_good_value(loader):
+    gate = threading.Event()
+    calls = []
+
+    def panel(location):
+        calls.append(location)
+        if len(calls) > 1:
+            gate.wait(2)
+        return f"data {location}"
+
+    loader.load({"status": (panel, "Jakarta Pusat")})
+    results, _ = loader.load({"status": (panel, "Jakarta Pusat")}, timeouts={"status": 0.05})
+    assert results["status"]["status"] == "stale"
+    assert results["status"]["reason"] == "timeout"
+    assert results["status"]["value"] == "data Jakarta Pusat"
+
+    # Panel yang masih jalan tidak dikirim ulang.
+    loader.load({"status": (panel, "Jakarta Pusat")}, timeouts={"status": 0.05})
+    assert len(calls) == 2
+    gate.set()
+
+    # Cadangan per argumen: lokasi lain tidak mendapat data Jakarta Pusat.
+    def broken(location):
+        raise RuntimeError("database terkunci")
+
+    results, _ = loader.load({"status": (broken, "Jakarta Barat")})
+    assert results["status"]["status"] == "error"
+    assert results["status"]["value"] is None
+    assert results["status"]["error"] == "database terkunci"
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from benchmark import synthetic_rows
+
+
+def test_keyset_pages_cover_table_once(db):
+    db.bulk_load_traffic(synthetic_rows(1234))
+
+    seen = []
+    after = None
+    while True:
+        page, after = db.get_traffic_page(location="Jakarta Pusat", after=after, limit=100)
+        seen.extend(page["id"].tolist())
+        if after is None:
+            break
+
+    assert len(seen) == len(set(seen)) == db.get_traffic_count("Jakarta Pusat")
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_iter_pages_matches_full_table(db):
+    db.bulk_load_traffic(synthetic_rows(2500))
+
+    chunks = list(db.iter_pages("traffic_data", chunksize=1000))
+    exported = pd.concat(chunks, ignore_index=True)
+    full = db.get_all_traffic_data()
+
+    assert len(chunks) == 3
+    assert sorted(exported["id"]) == sorted(full["id"])
+
+
+def test_iter_pages_empty_table_yields_header_page(db):
+    chunks = list(db.iter_pages("weather_data"))
+    assert len(chunks) == 1 and chunks[0].empty
@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+
+import pytest
+
+from db_writer import SQLiteWriter, after_commit, get_writer
+
+
+@pytest.fixture
+def writer(tmp_path):
+    path = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+    conn.close()
+    return SQLiteWriter(path)
+
+
+def _names(writer) -> list:
+    conn = sqlite3.connect(writer.db_path)
+    names = [row[0] for row in conn.execute("SELECT name FROM items ORDER BY id")]
+    conn.close()
+    return names
+
+
+def _insert(name):
+    return lambda cursor: cursor.execute("INSERT INTO items (name) VALUES (?)", (name,)).lastrowid
+
+
+def test_queued_jobs_share_one_commit(writer):
+    gate = threading.Event()
+    blocker = writer.submit(lambda cursor: gate.wait(5))
+    futures = [writer.submit(_insert(f"item-{i}")) for i in range(20)]
+    gate.set()
+
+    assert [f.result(5) for f in futures] == list(range(1, 21))
+    blocker.result(5)
+    assert writer.stats["commits"] <= 2
+    assert writer.stats["jobs"] == 21
+
+
+def test_failed_job_rolls_back_only_its_savepoint(writer):
+    def half_then_fail(cursor):
+        cursor.execute("INSERT INTO items (name) VALUES ('partial')")
+        cursor.execute("INSERT INTO items (name) VALUES ('a')")
+
+    gate = threading.Event()
+    writer.submit(lambda cursor: gate.wait(5))
+    first = writer.submit(_insert("a"))
+    failing = writer.submit(half_then_fail)
+    last = writer.submit(_insert("b"))
+    gate.set()
+
+    first.result(5)
+    last.result(5)
+    with pytest.raises(sqlite3.IntegrityError):
+        failing.result(5)
+    assert _names(writer) == ["a", "b"]
+    assert writer.stats["failed_jobs"] == 1
+
+
+def test_after_commit_runs_only_for_committed_jobs(writer):
+    seen = []
+
+    def job(name, fail=False):
+        def write(cursor):
+            after_commit(lambda: seen.append(name))
+            if fail:
+                raise ValueError("gagal")
+            return _insert(name)(cursor)
+        return write
+
+    writer.execute(job("ok"))
+    with pytest.raises(ValueError):
+        writer.execute(job("rolled-back", fail=True))
+
+    assert seen == ["ok"]
+    with pytest.raises(RuntimeError):
+        after_commit(lambda: None)
+
+
+def test_on_commit_hook_and_shared_writer(tmp_path):
+    commits = []
+    path = str(tmp_path / "shared.db")
+    writer = get_writer(path, on_commit=lambda cursor: commits.append(cursor.connection.in_transaction))
+
+    writer.execute(lambda cursor: cursor.execute("CREATE TABLE t (x INTEGER)"))
+    assert commits == [False]
+    assert get_writer(path) is writer
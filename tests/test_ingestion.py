@@ -0,0 +1,61 @@
+import io
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+from ingestion import TrafficIngestor
+
+RAW = {"timestamp": "2024-01-01T01:30:00Z", "location": "Jakarta Pusat", "vehicle_count": "650",
+       "speed_kmh": "12.34", "rain_factor": "1.2"}
+
+
+def test_validate_normalises_record(db):
+    record = TrafficIngestor(db=db).validate(RAW)
+
+    assert record["timestamp"] == "2024-01-01 08:30:00"
+    assert record["hour"] == 8 and record["is_peak"] == 1
+    assert record["vehicle_count"] == 650 and record["condition"] == "Macet"
+    assert record["speed_kmh"] == 12.3
+    assert record["data_source"] == "sensor_feed"
+
+
+def test_validate_rejects_bad_values(db):
+    ingestor = TrafficIngestor(db=db)
+    future = (datetime.now() + timedelta(hours=1)).isoformat()
+    bad = [
+        {"location": "Jakarta Pusat", "vehicle_count": 10},
+        dict(RAW, location="Bandung"),
+        dict(RAW, timestamp=future),
+        dict(RAW, timestamp="kemarin"),
+        dict(RAW, vehicle_count="nan"),
+        dict(RAW, vehicle_count="1e999"),
+        dict(RAW, vehicle_count=-1),
+        dict(RAW, speed_kmh="inf"),
+        dict(RAW, rain_factor=0),
+    ]
+    assert [ingestor.validate(raw) for raw in bad] == [None] * len(bad)
+
+
+def test_ingest_stream_writes_valid_rows(db):
+    lines = "\n".join([
+        '{"timestamp": "2024-01-01 07:00:00", "location": "Jakarta Pusat", "vehicle_count": 300}',
+        "bukan json",
+        '{"timestamp": "2024-01-01 07:05:00", "location": "Jakarta Selatan", "vehicle_count": 420}',
+        '{"timestamp": "2024-01-01 07:10:00", "location": "Jakarta Pusat", "vehicle_count": "nan"}',
+    ])
+    with TrafficIngestor(db=db, flush_interval=0.05) as ingestor:
+        assert ingestor.ingest_stream(io.StringIO(lines)) == 2
+    summary = ingestor.summary()
+
+    assert summary["written"] == 2 and summary["rejected"] == 2
+    assert db.get_traffic_count() == 2
+
+
+def test_ingestion_does_not_import_weather_client():
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, ingestion; print('weather_api' in sys.modules)"],
+        cwd=src, capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from benchmark import synthetic_rows
+from database import BULK_TRAFFIC_COLUMNS
+from live_feed import LiveDashboardState
+
+
+def _records(count: int, seed: int) -> list:
+    return [dict(zip(BULK_TRAFFIC_COLUMNS, row)) for row in synthetic_rows(count, seed=seed)]
+
+
+def test_refresh_matches_fresh_bootstrap(db):
+    db.insert_generated_data(_records(1000, seed=1), [])
+    live = LiveDashboardState(db, top_n=5, feed_limit=64)
+    live.bootstrap()
+    assert live.refresh() == 0
+
+    later = _records(700, seed=2)
+    for i in range(0, len(later), 100):
+        db.insert_generated_data(later[i:i + 100], [])
+    assert live.refresh() == 700
+
+    fresh = LiveDashboardState(db, top_n=5)
+    fresh.bootstrap()
+    assert live.last_id == fresh.last_id
+    assert live.stats() == fresh.stats()
+    pd.testing.assert_frame_equal(live.hourly_frame(), fresh.hourly_frame())
+    pd.testing.assert_frame_equal(live.status_frame(), fresh.status_frame(), check_dtype=False)
+    for location in [None, "Jakarta Pusat"]:
+        pd.testing.assert_frame_equal(live.top_frame(location), fresh.top_frame(location), check_dtype=False)
+
+
+def test_empty_database(db):
+    live = LiveDashboardState(db)
+    live.bootstrap()
+    assert live.stats() == {"error": "Tidak ada data"}
+    assert live.status_frame().empty and live.top_frame().empty
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from network_sim import NetworkSimulator, RoadNetwork
+from traffic_rules import get_traffic_condition
+
+
+def test_transition_spreads_excess_without_creating_vehicles():
+    network = RoadNetwork.synthetic(200, seed=3)
+    excess = np.random.default_rng(0).uniform(0, 100, len(network))
+    spilled = network.transition @ excess
+
+    has_neighbours = np.asarray(network.adjacency.sum(axis=1)).ravel() > 0
+    assert spilled.sum() == pytest.approx(excess[has_neighbours].sum())
+    assert network.adjacency.nnz <= len(network) * 8
+
+
+def test_congestion_spills_along_edges():
+    network = RoadNetwork.from_edges(["A", "B", "C", "D"], [("A", "B"), ("B", "C")])
+    sim = NetworkSimulator(network, capacity=[50, 10000, 10000, 10000], seed=1)
+    for _ in range(3):
+        result = sim.tick(hour=8)
+
+    assert result["spillover"][1] > 0
+    assert result["spillover"][3] == 0
+    assert sim.excess[0] > 0
+
+
+def test_records_use_traffic_thresholds():
+    network = RoadNetwork.from_locations()
+    sim = NetworkSimulator(network, seed=2)
+    rain = sim.rain_factors({"Jakarta Pusat": "heavy"})
+    records = sim.records(sim.tick(hour=17, rain_factor=rain), now=datetime(2024, 1, 1, 17, 0))
+
+    assert [r["location"] for r in records] == network.names
+    assert all(r["condition"] == get_traffic_condition(r["vehicle_count"]) for r in records)
+    assert all(r["hour"] == 17 and r["is_peak"] == 1 for r in records)
+    assert rain[network.names.index("Jakarta Pusat")] > 1.0
+
+
+def test_rates_must_leave_the_queue_bounded():
+    with pytest.raises(ValueError):
+        NetworkSimulator(RoadNetwork.from_locations(), spill_rate=0.6, retain_rate=0.5)
@@ -0,0 +1,64 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import synthetic_rows
+from parallel_analytics import ParallelAnalytics
+
+
+@pytest.fixture
+def filled(db):
+    db.bulk_load_traffic(synthetic_rows(4000))
+    conn = sqlite3.connect(db.db_path)
+    raw = pd.read_sql_query("SELECT * FROM traffic_data", conn)
+    conn.close()
+    return db, raw
+
+
+def test_aggregate_matches_raw(filled):
+    db, raw = filled
+    start, end = "2024-01-01 12:00:00", "2024-01-02 06:00:00"
+    result = ParallelAnalytics(db, slices_per_worker=3).aggregate("hour", start, end)
+
+    window = raw[(raw["timestamp"] >= start) & (raw["timestamp"] <= end)]
+    expected = window.groupby("hour").agg(
+        record_count=("id", "size"), avg_vehicles=("vehicle_count", "mean"),
+        std_vehicles=("vehicle_count", "std"), speed_max=("speed_kmh", "max"),
+    ).reset_index()
+    for column in expected.columns:
+        np.testing.assert_allclose(result[column], expected[column], rtol=1e-9)
+
+
+def test_overall_stats_and_top(filled):
+    db, raw = filled
+    parallel = ParallelAnalytics(db)
+    stats = parallel.overall_stats()
+
+    assert stats["total_records"] == len(raw)
+    assert stats["max_vehicles"] == raw["vehicle_count"].max()
+    assert stats["most_common_condition"] == raw["condition"].value_counts().idxmax()
+    assert parallel.rain_correlation() == pytest.approx(np.corrcoef(raw["rain_factor"], raw["vehicle_count"])[0, 1])
+
+    top = parallel.top_congestion(5, location="Jakarta Utara")
+    expected = raw[raw["location"] == "Jakarta Utara"].sort_values(
+        ["vehicle_count", "id"], ascending=False).head(5)
+    assert list(top["id"]) == list(expected["id"])
+
+
+def test_worker_processes_give_same_result(filled):
+    db, _ = filled
+    single = ParallelAnalytics(db).aggregate("location")
+    parallel = ParallelAnalytics(db, workers=2)
+    try:
+        pd.testing.assert_frame_equal(parallel.aggregate("location"), single)
+    finally:
+        parallel.close()
+
+
+def test_unknown_group_and_empty_range(filled):
+    db, _ = filled
+    with pytest.raises(ValueError):
+        ParallelAnalytics(db).run("weekday")
+    assert ParallelAnalytics(db).overall_stats(start="2030-01-01 00:00:00") == {"error": "Tidak ada data"}
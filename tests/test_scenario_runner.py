@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from scenario_runner import Scenario, ScenarioRunner
+
+
+def test_results_do_not_depend_on_worker_count():
+    scenario = Scenario("hujan sore", network=True).with_rain("heavy", 16, 19)
+    single = ScenarioRunner(workers=1, chunk_runs=20).simulate(scenario, runs=50, seed=7)
+    runner = ScenarioRunner(workers=2, chunk_runs=20)
+    try:
+        parallel = runner.simulate(scenario, runs=50, seed=7)
+    finally:
+        runner.close()
+
+    assert single["vehicles"].shape == (50, 24, len(scenario.locations))
+    for key in ("vehicles", "speed", "jam"):
+        np.testing.assert_array_equal(single[key], parallel[key])
+
+
+def test_compare_isolates_the_override():
+    scenario = Scenario("hujan pusat").with_rain("extreme", 17, 18, locations=["Jakarta Pusat"])
+    df = ScenarioRunner(chunk_runs=40).compare(scenario, runs=80, seed=1)
+
+    hit = (df["location"] == "Jakarta Pusat") & (df["hour"] == 17)
+    assert (df.loc[hit, "delta_speed_mean"] < 0).all()
+    assert (df.loc[hit, "delta_vehicles_mean"] > 0).all()
+    assert (df.loc[~hit, "delta_vehicles_mean"] == 0).all()
+    assert len(df) == 24 * len(scenario.locations) and (df["runs"] == 80).all()
+
+
+def test_scenario_validation():
+    with pytest.raises(ValueError):
+        Scenario().with_rain("badai", 0)
+    with pytest.raises(ValueError):
+        Scenario().with_demand(1.5, locations=["Bogor"])
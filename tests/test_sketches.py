@@ -0,0 +1,70 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from benchmark import synthetic_rows
+from database import BULK_TRAFFIC_COLUMNS
+import sketches
+from sketches import HyperLogLog, KLLSketch, SketchStore, load_sketch
+
+
+def test_kll_quantiles_within_documented_error():
+    sketches._coin.seed(1)
+    values = np.random.default_rng(7).normal(40, 12, 200000)
+    sketch = KLLSketch()
+    for part in np.array_split(values, 20):
+        sketch.update(part)
+
+    assert sketch.n == len(values)
+    assert sketch.size() <= 3000
+    for q, estimate in zip((0.5, 0.9, 0.99), sketch.quantiles((0.5, 0.9, 0.99))):
+        rank = (values < estimate).mean()
+        assert abs(rank - q) < 0.025
+
+    restored = KLLSketch.from_bytes(sketch.to_bytes())
+    assert restored.n == sketch.n
+    assert restored.quantiles((0.5,)) == sketch.quantiles((0.5,))
+
+
+def test_hll_count_and_merge():
+    left, right = HyperLogLog(), HyperLogLog()
+    left.update(range(0, 30000))
+    right.update(range(20000, 50000))
+    left.merge(right)
+
+    assert left.count() == pytest.approx(50000, rel=0.05)
+    assert HyperLogLog.from_bytes(left.to_bytes()).count() == left.count()
+
+
+def test_store_tracks_inserted_rows(db):
+    records = [dict(zip(BULK_TRAFFIC_COLUMNS, row)) for row in synthetic_rows(5000)]
+    for i in range(0, len(records), 500):
+        db.insert_generated_data(records[i:i + 500], [])
+
+    store = SketchStore(db)
+    speeds = np.array([r["speed_kmh"] for r in records])
+    result = store.quantiles("speed_kmh")
+    assert result["count"] == len(records)
+    assert abs((speeds < result["p50"]).mean() - 0.5) < 0.03
+
+    timestamps = {r["timestamp"] for r in records}
+    assert store.distinct() == pytest.approx(len(timestamps), rel=0.05)
+
+    by_hour = store.quantiles_by("vehicle_count", "hour")
+    assert by_hour["count"].sum() == len(records)
+
+    conn = sqlite3.connect(db.db_path)
+    payload, n = conn.execute("""
+        SELECT payload, n FROM traffic_sketches
+        WHERE metric = 'vehicle_count' AND location = ? AND hour = 0
+    """, (records[0]["location"],)).fetchone()
+    conn.close()
+    assert load_sketch("vehicle_count", payload).n == n
+
+
+def test_store_rejects_unknown_metric(db):
+    with pytest.raises(ValueError):
+        SketchStore(db).quantiles("timestamp")
+    with pytest.raises(ValueError):
+        SketchStore(db).distinct("speed_kmh")
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from topn_index import TopCongestionIndex
+
+
+def _row(row_id: int, timestamp: str, vehicle_count: int) -> dict:
+    return {"id": row_id, "timestamp": timestamp, "location": "Jakarta Pusat",
+            "vehicle_count": vehicle_count, "condition": "Macet", "speed_kmh": 10.0, "rain_factor": 1.0}
+
+
+def test_top_after_expiry_includes_discarded_row():
+    table = []
+
+    def loader(since, location, limit):
+        rows = [row for row in table if row["timestamp"] >= since]
+        return sorted(rows, key=lambda row: (row["vehicle_count"], row["id"]), reverse=True)[:limit]
+
+    def insert(*rows):
+        table.extend(rows)
+        index.observe(list(rows), now=datetime(2024, 1, 1, 12, 30))
+
+    index = TopCongestionIndex(capacity=3)
+    insert(_row(1, "2024-01-01 12:00:00", 900), _row(2, "2024-01-01 12:00:00", 900),
+           _row(3, "2024-01-01 12:10:00", 900))
+    index.top("hour", n=2, loader=loader, now=datetime(2024, 1, 1, 12, 15))
+
+    # Heap penuh: 500 dibuang, lalu dua 900 pertama kedaluwarsa.
+    insert(_row(4, "2024-01-01 12:30:00", 500))
+    top = index.top("hour", n=1, loader=loader, now=datetime(2024, 1, 1, 13, 5))
+    assert [row["vehicle_count"] for row in top] == [900]
+
+    insert(*(_row(i, "2024-01-01 13:10:00", 10) for i in range(5, 8)))
+    top = index.top("hour", n=2, loader=loader, now=datetime(2024, 1, 1, 13, 25))
+    assert [row["vehicle_count"] for row in top] == [500, 10]
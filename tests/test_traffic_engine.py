@@ -0,0 +1,26 @@
+from config import LOCATIONS
+from network_sim import RoadNetwork
+from traffic_engine import TrafficEngine
+
+
+class StubWeatherAPI:
+    def fetch_and_save(self):
+        return [{"location": location, "rain_category": "heavy"} for location in LOCATIONS]
+
+
+def test_simulation_cycle_writes_rows(db):
+    engine = TrafficEngine(db=db, weather_api=StubWeatherAPI())
+    records = engine.run_simulation_cycle()
+
+    assert len(records) == len(LOCATIONS)
+    assert db.get_traffic_count() == len(LOCATIONS)
+    assert set(db.get_current_traffic()["location"]) == set(LOCATIONS)
+
+
+def test_network_cycle_writes_rows(db):
+    network = RoadNetwork.synthetic(30, seed=1)
+    engine = TrafficEngine(db=db, weather_api=StubWeatherAPI(), network=network)
+    records = engine.run_simulation_cycle()
+
+    assert len(records) == 30
+    assert db.get_traffic_count() == 30
@@ -0,0 +1,60 @@
+import sqlite3
+
+import requests
+
+from weather_api import WeatherAPI
+
+
+def _response(day: str, rain_hours=()) -> dict:
+    hours = [f"{day}T{hour:02d}:00" for hour in range(24)]
+    return {
+        "current_weather": {"temperature": 29.5, "windspeed": 7.0, "weathercode": 63},
+        "hourly": {
+            "time": hours,
+            "temperature_2m": [28.0] * 24,
+            "precipitation": [3.0 if hour in rain_hours else 0.0 for hour in range(24)],
+            "windspeed_10m": [6.0] * 24,
+            "weathercode": [63 if hour in rain_hours else 1 for hour in range(24)],
+        },
+    }
+
+
+def _no_network(*args, **kwargs):
+    raise AssertionError("Replay tidak boleh memanggil API")
+
+
+def test_replay_inserts_observed_hours_once(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(requests, "get", _no_network)
+    api = WeatherAPI(db=db, weather_dir=str(tmp_path))
+    api.record_response("Jakarta Pusat", _response("2024-01-01"), "2024-01-01 12:30:00")
+    api.record_response("Jakarta Pusat", _response("2024-01-01", rain_hours=(7, 8)), "2024-01-01 18:10:00")
+    api.record_response("Jakarta Barat", _response("2024-01-01"), "2024-01-01 05:00:00")
+
+    # Jam 00-18 Jakarta Pusat (jam yang tumpang tindih diambil dari response
+    # terbaru) dan 00-05 Jakarta Barat; jam ramalan tidak disimpan.
+    assert api.replay_hourly() == 19 + 6
+    assert api.replay_hourly() == 0
+    assert db.get_weather_count() == 25
+
+    conn = sqlite3.connect(db.db_path)
+    rainy = conn.execute("""
+        SELECT timestamp, rain_category FROM weather_data
+        WHERE location = 'Jakarta Pusat' AND precipitation > 0 ORDER BY timestamp
+    """).fetchall()
+    conn.close()
+    assert rainy == [("2024-01-01 07:00:00", "moderate"), ("2024-01-01 08:00:00", "moderate")]
+
+
+def test_replay_mode_serves_latest_recorded_response(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(requests, "get", _no_network)
+    recorder = WeatherAPI(db=db, weather_dir=str(tmp_path))
+    recorder.record_response("Jakarta Pusat", _response("2024-01-01"), "2024-01-01 10:00:00")
+    recorder.record_response("Jakarta Pusat", _response("2024-01-02"), "2024-01-02 10:00:00")
+
+    api = WeatherAPI(db=db, replay=True, weather_dir=str(tmp_path))
+    assert api.fetch_response("Jakarta Pusat")["hourly"]["time"][0] == "2024-01-02T00:00"
+    assert api.fetch_response("Jakarta Utara") is None
+
+    current = api.get_weather("Jakarta Pusat")
+    assert current["weather_desc"] == "Hujan Sedang" and current["temperature"] == 29.5
+    assert api.fetch_hourly(include_forecast=True) == 48